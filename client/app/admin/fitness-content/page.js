@@ -10,6 +10,8 @@ import '../../style.css'
 export default function FitnessContentAdmin() {
   const router = useRouter()
   const [contents, setContents] = useState([])
+  const [nextPage, setNextPage] = useState(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [isLoading, setIsLoading] = useState(true)
   const [error, setError] = useState('')
   const [formData, setFormData] = useState({
@@ -45,7 +47,8 @@ export default function FitnessContentAdmin() {
       const response = await axios.get(`${API_URL}/api/fitness-content/`, {
         withCredentials: true
       })
-      setContents(response.data)
+      setContents(response.data.results)
+      setNextPage(response.data.next)
     } catch (err) {
       console.error('Error fetching content:', err)
       setError('Failed to load fitness content. Please try again.')
@@ -54,6 +57,23 @@ export default function FitnessContentAdmin() {
     }
   }
 
+  const fetchMoreContents = async () => {
+    if (!nextPage) return
+    setIsLoadingMore(true)
+    try {
+      const response = await axios.get(nextPage, {
+        withCredentials: true
+      })
+      setContents(prev => [...prev, ...response.data.results])
+      setNextPage(response.data.next)
+    } catch (err) {
+      console.error('Error fetching content:', err)
+      setError('Failed to load more fitness content. Please try again.')
+    } finally {
+      setIsLoadingMore(false)
+    }
+  }
+
   const handleChange = (e) => {
     const { name, value } = e.target
     setFormData(prev => ({
@@ -393,6 +413,17 @@ export default function FitnessContentAdmin() {
                 ))}
               </div>
             )}
+
+            {!isLoading && nextPage && (
+              <button
+                className='btn btn-primary'
+                style={{ marginTop: "1rem" }}
+                onClick={fetchMoreContents}
+                disabled={isLoadingMore}
+              >
+                {isLoadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         </div>
       </div>
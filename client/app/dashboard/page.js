@@ -1,7 +1,7 @@
 'use client'
 
 import { getProfile } from '../utils/profile'
-import getRecommendations from '../utils/recommendations'
+import getRecommendations, { streamRecommendations } from '../utils/recommendations'
 import { getSearch } from '../utils/rag-search'
 import getGenAI from '../utils/gen_ai'
 import { useEffect, useState } from 'react'
@@ -29,7 +29,10 @@ export default function Dashboard() {
   const loadRecommendations = async () => {
     setLoading(true)
     try {
-      const recommendationData = await getRecommendations()
+      const recommendationData = await streamRecommendations((partial) => {
+        setRecommendations(partial)
+        setLoading(false)
+      })
       if (recommendationData) {
         console.log('Recommendations loaded:', recommendationData)
         setRecommendations(recommendationData)
@@ -178,7 +181,7 @@ export default function Dashboard() {
             <hr className='line' />
             <h1 className='gradient-text'>Workout Recommendations</h1>
             <div className={styles.recBox}>
-              {recommendations?.workoutRecommendations.map((item, index) => (
+              {recommendations?.workoutRecommendations?.map((item, index) => (
                 <div key={index} className={styles.workoutRecommendationsContainer}>
                   <div className='recommend-header'><h3>{item.category}</h3><span><span className='badge-light'>{item.duration}</span><span className='badge-light'>{item.frequency}</span></span></div>
                   <div className='form-label text'>{item.description}</div>
@@ -190,7 +193,7 @@ export default function Dashboard() {
             <hr className='line' />
             <h1 className='gradient-text'>Nutrition Recommendations</h1>
             <div className={styles.recBox}>
-              {recommendations?.nutritionRecommendations.map((item, index) => (
+              {recommendations?.nutritionRecommendations?.map((item, index) => (
                 <div key={index} className={styles.workoutRecommendationsContainer}>
                   <div className='recommend-header'><h3>{item.category}</h3></div>
                   <div className='form-label text'>{item.recommendation}</div>
@@ -202,7 +205,7 @@ export default function Dashboard() {
             <hr className='line' />
             <h1 className='gradient-text'>Lifestyle Recommendations</h1>
             <div className={styles.recBox}>
-              {recommendations?.lifestyleRecommendations.map((item, index) => (
+              {recommendations?.lifestyleRecommendations?.map((item, index) => (
                 <div key={index} className={styles.workoutRecommendationsContainer}>
                   <div className='recommend-header'><h3>{item.category}</h3></div>
                   <div className='form-label text'>{item.recommendation}</div>
@@ -1,12 +1,8 @@
-import axios from 'axios';
-
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
-axios.defaults.withCredentials = true;
-
 let isRequestInProgress = false;
 
-export default async function getGenAI(query, onStreamUpdate) {
+export default async function getGenAI(query, onStreamUpdate, onCitations) {
   if (isRequestInProgress) {
     console.log('chat request already in progress, skipping duplicate call');
     return null;
@@ -14,20 +10,48 @@ export default async function getGenAI(query, onStreamUpdate) {
 
   try {
     isRequestInProgress = true;
-    const response = await axios.post(`${API_URL}/api/chat/`, 
-      { query: query },
-      { 
-        responseType: 'text',
-        onDownloadProgress: (progressEvent) => {
-          const text = progressEvent.event.target.responseText;
-          if (text && onStreamUpdate) {
-            onStreamUpdate(text);
-          }
+    const response = await fetch(`${API_URL}/api/chat/`, {
+      method: 'POST',
+      credentials: 'include',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ query: query }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Chat request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let reply = '';
+    let citations = [];
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+
+        if (event === 'delta') {
+          reply += data.text;
+          onStreamUpdate?.(reply);
+        } else if (event === 'citations') {
+          citations = data.citations;
+          onCitations?.(citations);
+        } else if (event === 'error') {
+          throw new Error(data.error);
         }
       }
-    );
-    
-    return { reply: response.data };
+    }
+
+    return { reply, citations };
   } catch (error) {
     console.log(error);
     throw error;
@@ -24,3 +24,60 @@ export default async function getRecommendations() {
     isRequestInProgress = false;
   }
 }
+
+export async function streamRecommendations(onSection) {
+  if (isRequestInProgress) {
+    console.log('Recommendation request already in progress, skipping duplicate call');
+    return null;
+  }
+
+  try {
+    isRequestInProgress = true;
+    const response = await fetch(`${API_URL}/api/recommendations/stream/`, {
+      method: 'POST',
+      credentials: 'include',
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Recommendation stream failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const recommendations = {};
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+
+        if (event === 'section') {
+          const [key, day] = data.path;
+          if (day) {
+            recommendations[key] = { ...(recommendations[key] || {}), [day]: data.value };
+          } else {
+            recommendations[key] = data.value;
+          }
+          onSection?.({ ...recommendations });
+        } else if (event === 'error') {
+          throw new Error(data.error);
+        }
+      }
+    }
+
+    return recommendations;
+  } catch (error) {
+    console.log(error)
+    throw error
+  } finally {
+    isRequestInProgress = false;
+  }
+}
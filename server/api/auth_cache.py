@@ -0,0 +1,177 @@
+"""Cache of authenticated users for CookieJWTAuthentication.
+
+Each user has a version token in a Django cache (AUTH_USER_CACHE_ALIAS), and
+the pickled user -- joined with its profiles by api.context.load_user -- is
+stored under that version. A per-process LRU keeps the pickle for the
+version it was loaded at, so a steady-state request costs one cache read for
+the version and no database queries. Saving or deleting a user or one of
+their profiles replaces the version (see api.signals), which every process
+sees on its next lookup.
+
+The alias must be shared by every worker process, or invalidations would
+reach only the worker that saved. A local-memory alias is therefore not
+used: users are then loaded from the database on every request.
+
+Every lookup unpickles a fresh copy, so views can modify request.user
+without affecting other requests. Writes that skip signals, such as
+queryset.update(), must call invalidate() themselves. Otherwise they become
+visible once the entry expires after AUTH_USER_CACHE_TTL.
+"""
+
+import logging
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    def __init__(self, shared_cache, timeout=300, max_entries=10000):
+        self.shared_cache = shared_cache
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def version_key(self, user_id):
+        return f"auth-user:{user_id}:version"
+
+    def data_key(self, user_id, version):
+        return f"auth-user:{user_id}:{version}"
+
+    def _store_local(self, user_id, version, data):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (version, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_version(self, user_id):
+        try:
+            return self.shared_cache.get(self.version_key(user_id))
+        except Exception as e:
+            logger.warning(f"Auth user cache read failed: {str(e)}")
+            return None
+
+    def get(self, user_id, loader):
+        """Return the user for user_id, calling loader() to fetch it on a miss"""
+        if self.shared_cache is None:
+            with self._lock:
+                self.misses += 1
+            return loader()
+
+        # Token claims may carry the id as a string, signals as an int
+        user_id = str(user_id)
+        version = self._get_version(user_id)
+
+        if version is not None:
+            with self._lock:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[0] == version:
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return pickle.loads(entry[1])
+
+            try:
+                data = self.shared_cache.get(self.data_key(user_id, version))
+            except Exception as e:
+                logger.warning(f"Auth user cache read failed: {str(e)}")
+                data = None
+            if data is not None:
+                self._store_local(user_id, version, data)
+                with self._lock:
+                    self.shared_hits += 1
+                return pickle.loads(data)
+
+        with self._lock:
+            self.misses += 1
+
+        # Fix the version before loading, so an invalidation that lands while
+        # loader() runs leaves this (possibly stale) entry unreachable
+        if version is None:
+            version = uuid.uuid4().hex
+            try:
+                self.shared_cache.add(self.version_key(user_id), version, self.timeout)
+                version = self._get_version(user_id) or version
+            except Exception as e:
+                logger.warning(f"Auth user cache write failed: {str(e)}")
+
+        user = loader()
+        data = pickle.dumps(user, pickle.HIGHEST_PROTOCOL)
+        self._store_local(user_id, version, data)
+        try:
+            self.shared_cache.set(self.data_key(user_id, version), data, self.timeout)
+        except Exception as e:
+            logger.warning(f"Auth user cache write failed: {str(e)}")
+        return user
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+        if self.shared_cache is None:
+            return
+        try:
+            self.shared_cache.set(
+                self.version_key(user_id), uuid.uuid4().hex, self.timeout
+            )
+        except Exception as e:
+            logger.warning(f"Auth user cache invalidation failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": (
+                    (self.hits + self.shared_hits) / lookups if lookups else 0.0
+                ),
+            }
+
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                alias = getattr(settings, "AUTH_USER_CACHE_ALIAS", "auth")
+                shared_cache = caches[alias]
+                if isinstance(shared_cache, LocMemCache):
+                    logger.warning(
+                        f"AUTH_USER_CACHE_ALIAS {alias!r} is local to each "
+                        "process, so users are not cached"
+                    )
+                    shared_cache = None
+                _user_cache = UserCache(
+                    shared_cache,
+                    timeout=getattr(settings, "AUTH_USER_CACHE_TTL", 300),
+                    max_entries=getattr(settings, "AUTH_USER_CACHE_MAX_ENTRIES", 10000),
+                )
+    return _user_cache
+
+
+def invalidate_user(user_id):
+    get_user_cache().invalidate(user_id)
@@ -1,7 +1,13 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
 from django.conf import settings
 from rest_framework.exceptions import AuthenticationFailed
 
+from .auth_cache import get_user_cache
+from .context import load_user
+
 
 class CookieJWTAuthentication(JWTAuthentication):
     
@@ -20,4 +26,34 @@ class CookieJWTAuthentication(JWTAuthentication):
         
         user = self.get_user(validated_token)
         
-        return user, validated_token 
\ No newline at end of file
+        return user, validated_token
+
+    def get_user(self, validated_token):
+        """JWTAuthentication.get_user, but cached and joined with the user's profiles.
+
+        See api.auth_cache and api.context.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        try:
+            user = get_user_cache().get(
+                user_id, lambda: load_user(**{api_settings.USER_ID_FIELD: user_id})
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    "The user's password has been changed.", code="password_changed"
+                )
+
+        return user
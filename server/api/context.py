@@ -0,0 +1,85 @@
+"""Loading a user together with their profiles.
+
+Physical, fitness and dietary profiles are one-to-one with User, so one
+select_related query fetches everything a request reads about its user.
+select_related also caches a missing profile as "does not exist", so later
+hasattr(user, "fitness_profile") checks and reads cost no queries.
+CookieJWTAuthentication loads request.user this way; writes re-read it
+with UserContext.for_update().
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+
+PROFILE_RELATIONS = ("physical_profile", "fitness_profile", "dietary_profile")
+
+
+def user_queryset():
+    return get_user_model().objects.select_related(*PROFILE_RELATIONS)
+
+
+def load_user(**lookup):
+    """Fetch one user and all their profiles in a single query"""
+    return user_queryset().get(**lookup)
+
+
+class UserContext:
+    """A user and their profiles, each of which may be None.
+
+    Profiles are read through the user's relation cache rather than copied,
+    so a profile created during the request (which sets that cache) is seen
+    by later reads.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def load(cls, user_id):
+        return cls(load_user(pk=user_id))
+
+    @classmethod
+    def for_update(cls, user_id):
+        """Re-read a user and their profiles for a write, locking the user row.
+
+        Call inside transaction.atomic(). request.user may be a cached copy
+        (api.auth_cache), and saving a stale instance writes back every
+        column, undoing changes made meanwhile by other requests. The lock
+        also serializes concurrent writes to the user's profiles.
+        """
+        return cls(
+            user_queryset().select_for_update(of=("self",)).get(pk=user_id)
+        )
+
+    @classmethod
+    def for_user(cls, user):
+        """Wrap user, loading its profiles with one query if not already joined"""
+        relations = [user._meta.get_field(name) for name in PROFILE_RELATIONS]
+        if not all(relation.is_cached(user) for relation in relations):
+            joined = load_user(pk=user.pk)
+            for relation in relations:
+                if not relation.is_cached(user):
+                    relation.set_cached_value(user, relation.get_cached_value(joined))
+        return cls(user)
+
+    def _profile(self, name):
+        try:
+            return getattr(self.user, name)
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def physical_profile(self):
+        return self._profile("physical_profile")
+
+    @property
+    def fitness_profile(self):
+        return self._profile("fitness_profile")
+
+    @property
+    def dietary_profile(self):
+        return self._profile("dietary_profile")
+
+    @property
+    def missing_profiles(self):
+        return [name for name in PROFILE_RELATIONS if self._profile(name) is None]
@@ -0,0 +1,213 @@
+"""Full-text index for FitnessContent keyword search.
+
+SQLite uses an external-content FTS5 table kept in sync by triggers, and
+PostgreSQL a generated, weighted tsvector column with a GIN index. Both are
+created by migration 0005 and maintained by the database itself, so saves,
+deletes, bulk_create and queryset.update() all keep the index current.
+
+Migrations that make SQLite rebuild api_fitnesscontent (which drops its
+triggers) must call install() again afterwards.
+"""
+
+import re
+
+from django.db import connection
+
+TABLE = "api_fitnesscontent"
+FTS_TABLE = "api_fitnesscontent_fts"
+INDEXED_FIELDS = ("title", "description", "target_muscles", "equipment_required")
+
+# Column weights for FTS5 bm25(), in INDEXED_FIELDS order
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+
+TERM_RE = re.compile(r"\w+")
+MAX_TERMS = 16
+
+
+def _sqlite_install_sql():
+    columns = ", ".join(INDEXED_FIELDS)
+    new_values = ", ".join(f"new.{field}" for field in INDEXED_FIELDS)
+    old_values = ", ".join(f"old.{field}" for field in INDEXED_FIELDS)
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = (
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{TABLE}', content_rowid='id', "
+        f"tokenize='porter unicode61', prefix='2 3')",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {TABLE} "
+        f"BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+POSTGRES_INSTALL_SQL = [
+    f"""
+    ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(target_muscles, '') || ' ' ||
+                                         coalesce(equipment_required, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {TABLE}_search_gin ON {TABLE} USING GIN (search_vector)",
+]
+
+
+def install(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        statements = _sqlite_install_sql()
+    elif vendor == "postgresql":
+        statements = POSTGRES_INSTALL_SQL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {TABLE}_search_gin")
+        schema_editor.execute(f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector")
+
+
+def is_supported():
+    return connection.vendor in ("sqlite", "postgresql")
+
+
+def _tag_clause(column, tags):
+    """Match rows whose comma-separated column holds any of the tags"""
+    # ",barbell,dumbbell," LIKE "%,dumbbell,%", ignoring case and the spaces
+    # around commas
+    normalized = f"REPLACE(REPLACE(LOWER(TRIM(c.{column})), ', ', ','), ' ,', ',')"
+    field = f"',' || {normalized} || ','"
+    escaped = [
+        tag.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        for tag in tags
+    ]
+    clause = " OR ".join(f"{field} LIKE %s ESCAPE '\\'" for _ in tags)
+    return f"({clause})", [f"%,{tag},%" for tag in escaped]
+
+
+def _filters(content_type, difficulty_level, equipment_tags=(), muscle_tags=()):
+    clauses, params = [], []
+    if content_type:
+        clauses.append("c.content_type = %s")
+        params.append(content_type)
+    if difficulty_level:
+        clauses.append("c.difficulty_level = %s")
+        params.append(int(difficulty_level))
+    for column, tags in (
+        ("equipment_required", equipment_tags),
+        ("target_muscles", muscle_tags),
+    ):
+        if tags:
+            clause, tag_params = _tag_clause(column, tags)
+            clauses.append(clause)
+            params.extend(tag_params)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def _search_sqlite(terms, filters, match_any, limit):
+    # Each term matches as a prefix ("squ" finds "squat")
+    match = (" OR " if match_any else " ").join(f'"{term}"*' for term in terms)
+    where, params = _filters(*filters)
+    weights = ", ".join(str(weight) for weight in SQLITE_WEIGHTS)
+    sql = f"""
+        SELECT c.id,
+               -bm25({FTS_TABLE}, {weights}) AS rank,
+               highlight({FTS_TABLE}, 0, '<mark>', '</mark>'),
+               snippet({FTS_TABLE}, 1, '<mark>', '</mark>', '...', 24)
+        FROM {FTS_TABLE}
+        JOIN {TABLE} c ON c.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s{where}
+        ORDER BY rank DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *params, limit])
+        return cursor.fetchall()
+
+
+def _search_postgres(terms, filters, match_any, limit):
+    query = (" | " if match_any else " & ").join(f"{term}:*" for term in terms)
+    where, params = _filters(*filters)
+    options = "StartSel=<mark>, StopSel=</mark>"
+    sql = f"""
+        SELECT c.id,
+               ts_rank_cd(c.search_vector, q) AS rank,
+               ts_headline('english', c.title, q, %s),
+               ts_headline('english', c.description, q, %s)
+        FROM {TABLE} c, to_tsquery('english', %s) q
+        WHERE c.search_vector @@ q{where}
+        ORDER BY rank DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            [
+                options + ", HighlightAll=true",
+                options + ", MaxWords=24, MinWords=8, MaxFragments=1",
+                query,
+                *params,
+                limit,
+            ],
+        )
+        return cursor.fetchall()
+
+
+def search(
+    search_term,
+    content_type=None,
+    difficulty_level=None,
+    limit=50,
+    equipment_tags=(),
+    muscle_tags=(),
+    match_any=False,
+):
+    """Ranked keyword search over FitnessContent.
+
+    Every word of the term must match unless ``match_any`` is set, in which
+    case rows matching any of them are ranked. ``equipment_tags`` and
+    ``muscle_tags`` (lowercase, see llm.rag.content_tags) keep rows carrying
+    any of the tags.
+
+    Returns up to limit dicts, best first, with ``id``, ``rank`` (higher is
+    better) and ``highlight`` ({"title", "snippet"} with matches wrapped in
+    <mark>). Returns [] when the term has no searchable words.
+    """
+    terms = TERM_RE.findall(search_term.casefold())[:MAX_TERMS]
+    if not terms:
+        return []
+
+    filters = (content_type, difficulty_level, equipment_tags, muscle_tags)
+    if connection.vendor == "sqlite":
+        rows = _search_sqlite(terms, filters, match_any, limit)
+    else:
+        rows = _search_postgres(terms, filters, match_any, limit)
+
+    return [
+        {
+            "id": content_id,
+            "rank": float(rank),
+            "highlight": {"title": title, "snippet": snippet},
+        }
+        for content_id, rank, title, snippet in rows
+    ]
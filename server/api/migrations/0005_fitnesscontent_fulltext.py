@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from api import fulltext
+
+
+def install_fulltext(apps, schema_editor):
+    fulltext.install(schema_editor)
+
+
+def uninstall_fulltext(apps, schema_editor):
+    fulltext.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_fitnesscontent'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_fulltext, uninstall_fulltext),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_fitnesscontent_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fitnesscontent',
+            index=models.Index(fields=['created_at', 'id'], name='api_fitness_created_e43f95_idx'),
+        ),
+    ]
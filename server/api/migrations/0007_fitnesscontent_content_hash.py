@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_fitnesscontent_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fitnesscontent',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
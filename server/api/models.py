@@ -126,6 +126,8 @@ class FitnessContent(models.Model):
     calories_burned = models.PositiveIntegerField(null=True, blank=True)
     target_muscles = models.CharField(max_length=255, blank=True)
     embedding_id = models.CharField(max_length=255, blank=True, null=True)
+    # Hash of what was last written to the vector index (llm.rag.content_hash)
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -136,5 +138,6 @@ class FitnessContent(models.Model):
         indexes = [
             models.Index(fields=['content_type']),
             models.Index(fields=['difficulty_level']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
@@ -0,0 +1,180 @@
+"""Fast read-path serialization.
+
+A ModelReader is compiled once from a ModelSerializer class and then turns
+model instances -- or rows from queryset.values(), skipping model
+instantiation altogether -- into exactly the dicts serializer.data would
+produce, without DRF's per-field get_attribute/to_representation machinery.
+Writes and validation still go through the serializers; api/tests.py keeps
+the two in parity.
+"""
+
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from rest_framework import serializers
+
+from .serializer import (
+    DietaryProfileSerializer,
+    FitnessContentSerializer,
+    FitnessProfileSerializer,
+    PhysicalProfileSerializer,
+    ProfileSerializer,
+    UserDetailSerializer,
+)
+
+# Fields whose to_representation is the identity for the values our models
+# store (str for char fields, int for integer/choice fields)
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+)
+
+
+def format_datetime(value, tz=None):
+    """DRF's default ISO 8601 DateTimeField output.
+
+    tz is the timezone to render aware values in; resolve it once per batch
+    with current_timezone() since looking it up per value is the slow part.
+    """
+    if value is None:
+        return None
+    if tz is not None and value.utcoffset() is not None:
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def current_timezone():
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def format_date(value):
+    return None if value is None else value.isoformat()
+
+
+class ModelReader:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._compiled = None
+        self._lock = threading.Lock()
+
+    def _compile(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        entries = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, serializers.BaseSerializer):
+                entries.append((name, field.source, ModelReader(type(field))))
+                continue
+
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                attname, convert = model._meta.get_field(field.source).attname, None
+            elif isinstance(field, serializers.DateTimeField):
+                attname, convert = field.source, format_datetime
+            elif isinstance(field, serializers.DateField):
+                attname, convert = field.source, format_date
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                attname, convert = field.source, None
+            else:
+                attname, convert = field.source, field.to_representation
+            entries.append((name, attname, convert))
+
+        self._compiled = entries
+        return entries
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compile()
+        return self._compiled
+
+    @property
+    def field_names(self):
+        return [entry[0] for entry in self.compiled]
+
+    def _entries(self, fields):
+        """Compiled entries limited to fields, with datetimes bound to the active timezone"""
+        entries = self.compiled
+        if fields is not None:
+            fields = set(fields)
+            entries = [entry for entry in entries if entry[0] in fields]
+        if any(convert is format_datetime for _, _, convert in entries):
+            tz = current_timezone()
+            entries = [
+                (name, attname, partial(format_datetime, tz=tz))
+                if convert is format_datetime
+                else (name, attname, convert)
+                for name, attname, convert in entries
+            ]
+        return entries
+
+    def _dump(self, instance, entries):
+        data = {}
+        for name, attname, convert in entries:
+            if isinstance(convert, ModelReader):
+                # DRF renders a missing reverse one-to-one as null
+                try:
+                    related = getattr(instance, attname)
+                except ObjectDoesNotExist:
+                    related = None
+                data[name] = None if related is None else convert.one(related)
+                continue
+
+            value = getattr(instance, attname)
+            data[name] = value if convert is None or value is None else convert(value)
+        return data
+
+    def one(self, instance, fields=None):
+        """Serialize a model instance like serializer_class(instance).data"""
+        return self._dump(instance, self._entries(fields))
+
+    def many(self, instances, fields=None):
+        entries = self._entries(fields)
+        return [self._dump(instance, entries) for instance in instances]
+
+    def value_names(self, fields=None):
+        """Columns to pass to queryset.values() for from_values()"""
+        entries = self._entries(fields)
+        if any(isinstance(convert, ModelReader) for _, _, convert in entries):
+            raise ValueError(
+                f"{self.serializer_class.__name__} has nested serializers; "
+                "use one()/many() instead"
+            )
+        return [attname for _, attname, _ in entries]
+
+    def from_values(self, rows, fields=None):
+        """Serialize rows from queryset.values(*value_names(fields))"""
+        entries = self._entries(fields)
+        results = []
+        for row in rows:
+            data = {}
+            for name, attname, convert in entries:
+                value = row[attname]
+                data[name] = value if convert is None or value is None else convert(value)
+            results.append(data)
+        return results
+
+    def values(self, queryset, fields=None):
+        """Serialize a queryset through .values(), without building model instances"""
+        return self.from_values(queryset.values(*self.value_names(fields)), fields)
+
+
+fitness_content_reader = ModelReader(FitnessContentSerializer)
+profile_reader = ModelReader(ProfileSerializer)
+physical_profile_reader = ModelReader(PhysicalProfileSerializer)
+fitness_profile_reader = ModelReader(FitnessProfileSerializer)
+dietary_profile_reader = ModelReader(DietaryProfileSerializer)
+user_detail_reader = ModelReader(UserDetailSerializer)
@@ -0,0 +1,81 @@
+import contextlib
+import datetime
+import decimal
+
+import orjson
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from django.utils.http import parse_header_parameters
+from rest_framework.renderers import BaseRenderer
+
+# UTC datetimes end in "Z" and non-str dict keys are allowed, as with DRF's
+# JSONEncoder; numpy arrays are serialized natively. Unlike DRF with
+# STRICT_JSON, NaN and Infinity are written as null rather than raising: orjson
+# has no option to reject them, and checking would mean walking every response
+DUMPS_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def default(obj):
+    """Fallback for the types orjson does not serialize natively.
+
+    Mirrors rest_framework.utils.encoders.JSONEncoder; datetime, date, time,
+    UUID, dataclasses and str/int/dict/list subclasses (e.g. ErrorDetail)
+    are handled by orjson itself.
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if isinstance(obj, tuple):
+        return list(obj)
+    if hasattr(obj, "__getitem__"):
+        try:
+            return dict(obj)
+        except Exception:
+            pass
+    if hasattr(obj, "__iter__"):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data, option=0):
+    """Serialize data to JSON bytes with orjson"""
+    return orjson.dumps(data, default=default, option=DUMPS_OPTIONS | option)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """Drop-in replacement for DRF's JSONRenderer backed by orjson.
+
+    An indent requested through the media type (``application/json;
+    indent=4``) or the renderer context (as the browsable API does) always
+    pretty-prints with two spaces, the only width orjson supports.
+    """
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def get_indent(self, accepted_media_type, renderer_context):
+        # Same lookup as JSONRenderer.get_indent
+        if accepted_media_type:
+            _, params = parse_header_parameters(accepted_media_type)
+            with contextlib.suppress(KeyError, ValueError, TypeError):
+                return max(min(int(params["indent"]), 8), 0) or None
+        return renderer_context.get("indent")
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        option = 0
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option = orjson.OPT_INDENT_2
+        return dumps(data, option)
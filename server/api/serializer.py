@@ -158,7 +158,8 @@ class UserDetailSerializer(serializers.ModelSerializer):
 class FitnessContentSerializer(serializers.ModelSerializer):
     class Meta:
         model = FitnessContent
-        fields = '__all__'
+        # content_hash is internal bookkeeping for the vector index sync
+        exclude = ['content_hash']
         read_only_fields = ['id', 'embedding_id', 'created_at', 'updated_at']
 
 
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth_cache import invalidate_user
+from .models import DietaryProfile, FitnessProfile, PhysicalProfile, User
+
+
+def _invalidate(user_id):
+    # Once now, and again after commit: a request that reads the old row
+    # before the transaction commits must not keep it cached
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+@receiver(post_save, sender=PhysicalProfile)
+@receiver(post_save, sender=FitnessProfile)
+@receiver(post_save, sender=DietaryProfile)
+@receiver(post_delete, sender=PhysicalProfile)
+@receiver(post_delete, sender=FitnessProfile)
+@receiver(post_delete, sender=DietaryProfile)
+def invalidate_cached_user_on_profile_change(sender, instance, **kwargs):
+    _invalidate(instance.user_id)
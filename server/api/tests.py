@@ -1,3 +1,344 @@
-from django.test import TestCase
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+import orjson
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .auth_cache import get_user_cache
+from .context import UserContext
+from .models import User, PhysicalProfile, FitnessProfile, DietaryProfile, FitnessContent
+from .pagination import cursor_paginate
+from .readers import (
+    dietary_profile_reader,
+    fitness_content_reader,
+    fitness_profile_reader,
+    physical_profile_reader,
+    profile_reader,
+    user_detail_reader,
+)
+from .renderers import ORJSONRenderer
+from .serializer import (
+    ProfileSerializer,
+    PhysicalProfileSerializer,
+    FitnessProfileSerializer,
+    DietaryProfileSerializer,
+    UserDetailSerializer,
+    FitnessContentSerializer,
+)
+
+
+def render(data):
+    return ORJSONRenderer().render(data)
+
+
+class RendererParityTests(SimpleTestCase):
+    data = {
+        "created_at": datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=dt_timezone.utc),
+        "updated_at": datetime(
+            2024, 5, 6, 7, 8, 9, tzinfo=dt_timezone(timedelta(hours=2))
+        ),
+        "naive": datetime(2024, 5, 6, 7, 8, 9),
+        "day": date(2024, 5, 6),
+        "time": time(7, 8, 9, 500),
+        "duration": timedelta(minutes=90),
+        "price": Decimal("12.50"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "items": [{"title": "Überkreuz-Crunch", "reps": 12}, None, True],
+    }
+
+    def test_matches_drf_json_renderer(self):
+        self.assertEqual(render(self.data), JSONRenderer().render(self.data))
+
+    def test_indent_pretty_prints_with_two_spaces(self):
+        indented = JSONRenderer().render(self.data, None, {"indent": 2})
+        for media_type, context in (
+            ("application/json; indent=4", {}),
+            ("application/json", {"indent": 4}),
+            (None, {"indent": 2}),
+        ):
+            with self.subTest(media_type=media_type, context=context):
+                self.assertEqual(
+                    ORJSONRenderer().render(self.data, media_type, context), indented
+                )
+
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, "application/json; indent=0", {}),
+            render(self.data),
+        )
+
+    def test_nan_and_infinity_are_written_as_null(self):
+        # DRF's JSONRenderer (STRICT_JSON) raises instead
+        data = {"nan": float("nan"), "inf": float("inf"), "ninf": float("-inf")}
+        self.assertEqual(render(data), b'{"nan":null,"inf":null,"ninf":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+
+class ReaderParityTests(TestCase):
+    """The fast readers must produce byte-identical JSON to the serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="parity",
+            email="parity@example.com",
+            password="pw",
+            first_name="Zoë",
+            age=31,
+            about_me="Runs 5k — most days",
+        )
+        cls.bare_user = User.objects.create_user(
+            username="bare", email="bare@example.com", password="pw"
+        )
+        PhysicalProfile.objects.create(
+            user=cls.user, height=180, weight=75, gender="female", body_fat=18
+        )
+        FitnessProfile.objects.create(
+            user=cls.user,
+            fitness_level=FitnessProfile.FitnessLevel.ADVANCED,
+            workout_frequency=4,
+            workout_duration=45,
+            workout_intensity=7,
+            workout_type="strength",
+            workout_goal="hypertrophy",
+            health_goal="mobility",
+        )
+        DietaryProfile.objects.create(
+            user=cls.user, diet_preference="vegetarian", diet_goal="maintain"
+        )
+
+        cls.contents = [
+            FitnessContent.objects.create(
+                title="Bulgarian Split Squat",
+                description="Single-leg squat",
+                content_type="exercise",
+                url="https://example.com/bss",
+                youtube_url="https://youtu.be/abc",
+                difficulty_level=3,
+                equipment_required="dumbbells",
+                duration_minutes=10,
+                calories_burned=80,
+                target_muscles="quads, glutes",
+                embedding_id="fitness-1",
+            ),
+            FitnessContent.objects.create(
+                title="Überkreuz-Crunch",
+                description="",
+                content_type="exercise",
+            ),
+        ]
+
+    def assertParity(self, reader_data, serializer_data):
+        self.assertEqual(render(reader_data), render(serializer_data))
+
+    def test_fitness_content_one(self):
+        for content in self.contents:
+            self.assertParity(
+                fitness_content_reader.one(content),
+                FitnessContentSerializer(content).data,
+            )
+
+    def test_fitness_content_values(self):
+        queryset = FitnessContent.objects.order_by("id")
+        self.assertParity(
+            fitness_content_reader.values(queryset),
+            FitnessContentSerializer(queryset, many=True).data,
+        )
+
+    def test_fitness_content_hides_content_hash(self):
+        content = self.contents[0]
+        content.content_hash = "0" * 64
+        self.assertNotIn("content_hash", FitnessContentSerializer(content).data)
+        self.assertNotIn("content_hash", fitness_content_reader.one(content))
+        queryset = FitnessContent.objects.order_by("id")
+        self.assertNotIn("content_hash", fitness_content_reader.values(queryset)[0])
+
+    def test_fitness_content_projection(self):
+        queryset = FitnessContent.objects.order_by("id")
+        data = fitness_content_reader.values(queryset, ["title", "id", "created_at"])
+        self.assertEqual(list(data[0]), ["id", "title", "created_at"])
+        self.assertParity(
+            data,
+            [
+                {key: item[key] for key in ("id", "title", "created_at")}
+                for item in FitnessContentSerializer(queryset, many=True).data
+            ],
+        )
+
+    def test_profiles(self):
+        self.assertParity(profile_reader.one(self.user), ProfileSerializer(self.user).data)
+        self.assertParity(
+            physical_profile_reader.one(self.user.physical_profile),
+            PhysicalProfileSerializer(self.user.physical_profile).data,
+        )
+        self.assertParity(
+            fitness_profile_reader.one(self.user.fitness_profile),
+            FitnessProfileSerializer(self.user.fitness_profile).data,
+        )
+        self.assertParity(
+            dietary_profile_reader.one(self.user.dietary_profile),
+            DietaryProfileSerializer(self.user.dietary_profile).data,
+        )
+
+    def test_user_detail_with_profiles(self):
+        self.assertParity(
+            user_detail_reader.one(self.user), UserDetailSerializer(self.user).data
+        )
+
+    def test_user_detail_without_profiles(self):
+        data = user_detail_reader.one(self.bare_user)
+        self.assertIsNone(data["physical_profile"])
+        self.assertParity(data, UserDetailSerializer(self.bare_user).data)
+
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_datetimes_follow_current_timezone(self):
+        FitnessContent.objects.filter(pk=self.contents[0].pk).update(
+            created_at=datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc)
+        )
+        content = FitnessContent.objects.get(pk=self.contents[0].pk)
+        self.assertParity(
+            fitness_content_reader.one(content), FitnessContentSerializer(content).data
+        )
+        self.assertEqual(
+            fitness_content_reader.one(content)["created_at"],
+            "2025-01-01T22:04:05.678901-05:00",
+        )
+
+    def test_values_rejects_nested_readers(self):
+        with self.assertRaises(ValueError):
+            user_detail_reader.value_names()
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        FitnessContent.objects.bulk_create(
+            FitnessContent(title=f"Item {i}", description="", content_type="exercise")
+            for i in range(7)
+        )
+        # Equal timestamps must still page by id without repeats
+        first = FitnessContent.objects.order_by("id").first()
+        FitnessContent.objects.filter(id__lte=first.id + 3).update(
+            created_at=first.created_at
+        )
+
+    def page(self, query):
+        request = APIRequestFactory().get(f"/api/fitness-content/{query}")
+        request.query_params = request.GET
+        return cursor_paginate(request, FitnessContent.objects.all(), fitness_content_reader)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids = []
+        page = self.page("?page_size=3")
+        while True:
+            ids += [item["id"] for item in page["results"]]
+            if not page["next"]:
+                break
+            page = self.page("?" + page["next"].split("?", 1)[1])
+
+        expected = list(
+            FitnessContent.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(ids, expected)
+
+    def test_results_match_serializer(self):
+        queryset = FitnessContent.objects.order_by("-created_at", "-id")
+        self.assertEqual(
+            render(self.page("?page_size=50")["results"]),
+            render(FitnessContentSerializer(queryset, many=True).data),
+        )
+
+
+class ReadEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", email="reader@example.com", password="pw"
+        )
+        FitnessProfile.objects.create(
+            user=cls.user,
+            workout_frequency=3,
+            workout_duration=30,
+            workout_intensity=5,
+            workout_type="cardio",
+            workout_goal="endurance",
+            health_goal="heart",
+        )
+
+    def setUp(self):
+        # Rolled-back test transactions send no signals to invalidate the cache
+        get_user_cache().invalidate(self.user.pk)
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+
+    def test_user_detail_endpoint(self):
+        response = self.client.get(reverse("user_detail"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content, render(UserDetailSerializer(self.user).data)
+        )
+
+    def test_fitness_profile_endpoint(self):
+        response = self.client.get(reverse("fitness_profile"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content,
+            render(FitnessProfileSerializer(self.user.fitness_profile).data),
+        )
+
+    def test_profile_endpoints_load_user_in_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse("user_detail"))
+
+        # Afterwards the user comes from the auth cache
+        for name in ("user_detail", "fitness_profile", "profile_setup"):
+            with self.subTest(name=name), self.assertNumQueries(0):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_cached_user_is_invalidated_on_save(self):
+        self.client.get(reverse("user_detail"))
+
+        self.user.fitness_profile.workout_goal = "speed"
+        self.user.fitness_profile.save()
+        response = self.client.get(reverse("fitness_profile"))
+        self.assertEqual(orjson.loads(response.content)["workout_goal"], "speed")
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("user_detail")).status_code, 401)
+
+
+class UserContextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="context", email="context@example.com", password="pw"
+        )
+        DietaryProfile.objects.create(user=cls.user, diet_goal="maintain")
+
+    def test_for_user_joins_profiles_once(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            context = UserContext.for_user(user)
+            self.assertIsNone(context.physical_profile)
+            self.assertIsNone(context.fitness_profile)
+            self.assertEqual(context.dietary_profile.diet_goal, "maintain")
+            self.assertEqual(
+                context.missing_profiles, ["physical_profile", "fitness_profile"]
+            )
+        with self.assertNumQueries(0):
+            UserContext.for_user(user)
+
+    def test_sees_profiles_created_later(self):
+        context = UserContext.load(self.user.pk)
+        PhysicalProfile.objects.create(user=context.user, height=170, weight=60)
+        with self.assertNumQueries(0):
+            self.assertEqual(context.physical_profile.height, 170)
@@ -4,6 +4,7 @@ from rest_framework.decorators import (
     authentication_classes,
 )
 from rest_framework.response import Response
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from .models import User, PhysicalProfile, FitnessProfile, DietaryProfile, FitnessContent
@@ -13,12 +14,23 @@ from .serializer import (
     PhysicalProfileSerializer,
     FitnessProfileSerializer,
     DietaryProfileSerializer,
-    UserDetailSerializer,
     FitnessContentSerializer,
 )
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from .authentication import CookieJWTAuthentication
+from .context import UserContext
+from . import fulltext
+from .pagination import cursor_paginate
+from .readers import (
+    dietary_profile_reader,
+    fitness_content_reader,
+    fitness_profile_reader,
+    physical_profile_reader,
+    profile_reader,
+    user_detail_reader,
+)
+from llm.indexing import enqueue_delete, enqueue_upsert
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -80,10 +92,11 @@ class RegisterView(APIView):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
+            context = UserContext.for_user(user)
 
-            has_physical = hasattr(user, "physical_profile")
-            has_fitness = hasattr(user, "fitness_profile")
-            has_dietary = hasattr(user, "dietary_profile")
+            has_physical = context.physical_profile is not None
+            has_fitness = context.fitness_profile is not None
+            has_dietary = context.dietary_profile is not None
 
             response_data = {
                 "message": "User registered successfully",
@@ -123,14 +136,15 @@ def profile_view(request):
     user = request.user
 
     if request.method == "GET":
-        serializer = ProfileSerializer(user)
-        return Response(serializer.data)
+        return Response(profile_reader.one(user))
 
     elif request.method == "PUT":
-        serializer = ProfileSerializer(user, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+        with transaction.atomic():
+            user = UserContext.for_update(user.pk).user
+            serializer = ProfileSerializer(user, data=request.data, partial=True)
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -142,15 +156,12 @@ def physical_profile_view(request):
 
     if request.method == "GET":
         try:
-            profile = PhysicalProfile.objects.get(user=user)
-            serializer = PhysicalProfileSerializer(profile)
-            return Response(serializer.data)
-        except PhysicalProfile.DoesNotExist:
-            default_profile = PhysicalProfile.objects.create(
-                user=user, height=0, weight=0, gender=""
-            )
-            serializer = PhysicalProfileSerializer(default_profile)
-            return Response(serializer.data)
+            profile = UserContext.for_user(user).physical_profile
+            if profile is None:
+                profile = PhysicalProfile.objects.create(
+                    user=user, height=0, weight=0, gender=""
+                )
+            return Response(physical_profile_reader.one(profile))
         except Exception as e:
             return Response(
                 {
@@ -161,34 +172,35 @@ def physical_profile_view(request):
             )
 
     elif request.method == "POST":
-        if hasattr(user, "physical_profile"):
-            return Response(
-                {"message": "Physical profile already exists"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        with transaction.atomic():
+            if UserContext.for_update(user.pk).physical_profile is not None:
+                return Response(
+                    {"message": "Physical profile already exists"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        data = request.data
-        serializer = PhysicalProfileSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save(user=user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            data = request.data
+            serializer = PhysicalProfileSerializer(data=data)
+            if serializer.is_valid():
+                serializer.save(user=user)
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "PUT":
-        try:
-            profile = PhysicalProfile.objects.get(user=user)
+        with transaction.atomic():
+            profile = UserContext.for_update(user.pk).physical_profile
+            if profile is None:
+                return Response(
+                    {"message": "Physical profile does not exist"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
             serializer = PhysicalProfileSerializer(
                 profile, data=request.data, partial=True
             )
             if serializer.is_valid():
                 serializer.save()
                 return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        except PhysicalProfile.DoesNotExist:
-            return Response(
-                {"message": "Physical profile does not exist"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["GET", "POST", "PUT"])
@@ -199,21 +211,18 @@ def fitness_profile_view(request):
 
     if request.method == "GET":
         try:
-            profile = FitnessProfile.objects.get(user=user)
-            serializer = FitnessProfileSerializer(profile)
-            return Response(serializer.data)
-        except FitnessProfile.DoesNotExist:
-            default_profile = FitnessProfile.objects.create(
-                user=user,
-                workout_frequency=0,
-                workout_duration=0,
-                workout_intensity=0,
-                workout_type="",
-                workout_goal="",
-                health_goal="",
-            )
-            serializer = FitnessProfileSerializer(default_profile)
-            return Response(serializer.data)
+            profile = UserContext.for_user(user).fitness_profile
+            if profile is None:
+                profile = FitnessProfile.objects.create(
+                    user=user,
+                    workout_frequency=0,
+                    workout_duration=0,
+                    workout_intensity=0,
+                    workout_type="",
+                    workout_goal="",
+                    health_goal="",
+                )
+            return Response(fitness_profile_reader.one(profile))
         except Exception as e:
             return Response(
                 {
@@ -224,34 +233,35 @@ def fitness_profile_view(request):
             )
 
     elif request.method == "POST":
-        if hasattr(user, "fitness_profile"):
-            return Response(
-                {"message": "Fitness profile already exists"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        with transaction.atomic():
+            if UserContext.for_update(user.pk).fitness_profile is not None:
+                return Response(
+                    {"message": "Fitness profile already exists"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        data = request.data
-        serializer = FitnessProfileSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save(user=user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            data = request.data
+            serializer = FitnessProfileSerializer(data=data)
+            if serializer.is_valid():
+                serializer.save(user=user)
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "PUT":
-        try:
-            profile = FitnessProfile.objects.get(user=user)
+        with transaction.atomic():
+            profile = UserContext.for_update(user.pk).fitness_profile
+            if profile is None:
+                return Response(
+                    {"message": "Fitness profile not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
             serializer = FitnessProfileSerializer(
                 profile, data=request.data, partial=True
             )
             if serializer.is_valid():
                 serializer.save()
                 return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        except FitnessProfile.DoesNotExist:
-            return Response(
-                {"message": "Fitness profile not found"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["GET", "POST", "PUT"])
@@ -262,13 +272,10 @@ def dietary_profile_view(request):
 
     if request.method == "GET":
         try:
-            profile = DietaryProfile.objects.get(user=user)
-            serializer = DietaryProfileSerializer(profile)
-            return Response(serializer.data)
-        except DietaryProfile.DoesNotExist:
-            default_profile = DietaryProfile.objects.create(user=user, diet_goal="")
-            serializer = DietaryProfileSerializer(default_profile)
-            return Response(serializer.data)
+            profile = UserContext.for_user(user).dietary_profile
+            if profile is None:
+                profile = DietaryProfile.objects.create(user=user, diet_goal="")
+            return Response(dietary_profile_reader.one(profile))
         except Exception as e:
             return Response(
                 {
@@ -279,43 +286,194 @@ def dietary_profile_view(request):
             )
 
     elif request.method == "POST":
-        if hasattr(user, "dietary_profile"):
-            return Response(
-                {"message": "Dietary profile already exists"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        with transaction.atomic():
+            if UserContext.for_update(user.pk).dietary_profile is not None:
+                return Response(
+                    {"message": "Dietary profile already exists"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        data = request.data
-        serializer = DietaryProfileSerializer(data=data)
-        if serializer.is_valid():
-            serializer.save(user=user)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            data = request.data
+            serializer = DietaryProfileSerializer(data=data)
+            if serializer.is_valid():
+                serializer.save(user=user)
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == "PUT":
-        try:
-            profile = DietaryProfile.objects.get(user=user)
+        with transaction.atomic():
+            profile = UserContext.for_update(user.pk).dietary_profile
+            if profile is None:
+                return Response(
+                    {"message": "Dietary profile not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
             serializer = DietaryProfileSerializer(
                 profile, data=request.data, partial=True
             )
             if serializer.is_valid():
                 serializer.save()
                 return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        except DietaryProfile.DoesNotExist:
-            return Response(
-                {"message": "Dietary profile not found"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 @authentication_classes([CookieJWTAuthentication])
 def user_detail_view(request):
-    user = request.user
-    serializer = UserDetailSerializer(user)
-    return Response(serializer.data)
+    user = UserContext.for_user(request.user).user
+    return Response(user_detail_reader.one(user))
+
+
+def _save_profile_setup(request, context):
+    user = context.user
+
+    data = request.data
+    user_profile_data = data.get("user_profile", {})
+    physical_profile_data = data.get("physical_profile", {})
+    fitness_profile_data = data.get("fitness_profile", {})
+    dietary_profile_data = data.get("dietary_profile", {})
+
+    # Debug logging
+    print("===== PROFILE SETUP DEBUG =====")
+    print(f"User profile data: {user_profile_data}")
+    print(f"Physical profile data: {physical_profile_data}")
+    print(f"Fitness profile data: {fitness_profile_data}")
+    print(f"Dietary profile data: {dietary_profile_data}")
+
+    if user_profile_data:
+        serializer = ProfileSerializer(user, data=user_profile_data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+        else:
+            print(f"User profile serializer errors: {serializer.errors}")
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Failed to update user profile",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    if physical_profile_data:
+        profile = context.physical_profile
+        if profile is not None:
+            serializer = PhysicalProfileSerializer(
+                profile, data=physical_profile_data, partial=True
+            )
+        else:
+            if (
+                "height" not in physical_profile_data
+                or "weight" not in physical_profile_data
+                or "gender" not in physical_profile_data
+            ):
+                physical_profile_data.update(
+                    {
+                        "height": physical_profile_data.get("height", 0),
+                        "weight": physical_profile_data.get("weight", 0),
+                        "gender": physical_profile_data.get("gender", ""),
+                    }
+                )
+            serializer = PhysicalProfileSerializer(data=physical_profile_data)
+
+        if serializer.is_valid():
+            if isinstance(serializer.instance, PhysicalProfile):
+                serializer.save()
+            else:
+                serializer.save(user=user)
+        else:
+            print(f"Physical profile serializer errors: {serializer.errors}")
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Failed to update physical profile",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    if fitness_profile_data:
+        profile = context.fitness_profile
+        if profile is not None:
+            serializer = FitnessProfileSerializer(
+                profile, data=fitness_profile_data, partial=True
+            )
+        else:
+            required_fields = [
+                "workout_frequency",
+                "workout_duration",
+                "workout_intensity",
+                "workout_type",
+                "workout_goal",
+                "health_goal",
+            ]
+            for field in required_fields:
+                if field not in fitness_profile_data:
+                    if field in [
+                        "workout_frequency",
+                        "workout_duration",
+                        "workout_intensity",
+                    ]:
+                        fitness_profile_data[field] = 0
+                    else:
+                        fitness_profile_data[field] = ""
+
+            serializer = FitnessProfileSerializer(data=fitness_profile_data)
+
+        if serializer.is_valid():
+            if isinstance(serializer.instance, FitnessProfile):
+                serializer.save()
+            else:
+                serializer.save(user=user)
+        else:
+            print(f"Fitness profile serializer errors: {serializer.errors}")
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Failed to update fitness profile",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    if dietary_profile_data:
+        profile = context.dietary_profile
+        if profile is not None:
+            serializer = DietaryProfileSerializer(
+                profile, data=dietary_profile_data, partial=True
+            )
+        else:
+            # Make sure all required fields have default values
+            required_fields = ["diet_preference", "diet_allergies", "diet_restrictions", "diet_preferences", "diet_goal"]
+            for field in required_fields:
+                if field not in dietary_profile_data:
+                    dietary_profile_data[field] = ""
+
+            serializer = DietaryProfileSerializer(data=dietary_profile_data)
+
+        if serializer.is_valid():
+            if isinstance(serializer.instance, DietaryProfile):
+                serializer.save()
+            else:
+                serializer.save(user=user)
+        else:
+            print(f"Dietary profile serializer errors: {serializer.errors}")
+            return Response(
+                {
+                    "status": "error",
+                    "message": "Failed to update dietary profile",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    return Response(
+        {
+            "status": "success",
+            "message": "Profiles updated successfully",
+        }
+    )
 
 
 @api_view(["GET", "POST"])
@@ -323,6 +481,7 @@ def user_detail_view(request):
 @authentication_classes([CookieJWTAuthentication])
 def profile_setup_view(request):
     user = request.user
+    context = UserContext.for_user(user)
 
     if request.method == "GET":
         data = {
@@ -338,8 +497,8 @@ def profile_setup_view(request):
             "dietary_profile": {},
         }
 
-        if hasattr(user, "physical_profile"):
-            profile = user.physical_profile
+        profile = context.physical_profile
+        if profile is not None:
             data["physical_profile"] = {
                 "height": profile.height,
                 "weight": profile.weight,
@@ -358,8 +517,8 @@ def profile_setup_view(request):
                 "health_condition": "",
             }
 
-        if hasattr(user, "fitness_profile"):
-            profile = user.fitness_profile
+        profile = context.fitness_profile
+        if profile is not None:
             data["fitness_profile"] = {
                 "fitness_level": profile.fitness_level,
                 "workout_frequency": profile.workout_frequency,
@@ -384,8 +543,8 @@ def profile_setup_view(request):
                 "health_goal": "",
             }
 
-        if hasattr(user, "dietary_profile"):
-            profile = user.dietary_profile
+        profile = context.dietary_profile
+        if profile is not None:
             data["dietary_profile"] = {
                 "diet_preference": profile.diet_preference,
                 "diet_allergies": profile.diet_allergies,
@@ -405,152 +564,9 @@ def profile_setup_view(request):
         return Response(data)
 
     elif request.method == "POST":
-        data = request.data
-        user_profile_data = data.get("user_profile", {})
-        physical_profile_data = data.get("physical_profile", {})
-        fitness_profile_data = data.get("fitness_profile", {})
-        dietary_profile_data = data.get("dietary_profile", {})
-        
-        # Debug logging
-        print("===== PROFILE SETUP DEBUG =====")
-        print(f"User profile data: {user_profile_data}")
-        print(f"Physical profile data: {physical_profile_data}")
-        print(f"Fitness profile data: {fitness_profile_data}")
-        print(f"Dietary profile data: {dietary_profile_data}")
-
-        if user_profile_data:
-            serializer = ProfileSerializer(user, data=user_profile_data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-            else:
-                print(f"User profile serializer errors: {serializer.errors}")
-                return Response(
-                    {
-                        "status": "error",
-                        "message": "Failed to update user profile",
-                        "errors": serializer.errors,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        if physical_profile_data:
-            try:
-                profile = PhysicalProfile.objects.get(user=user)
-                serializer = PhysicalProfileSerializer(
-                    profile, data=physical_profile_data, partial=True
-                )
-            except PhysicalProfile.DoesNotExist:
-                if (
-                    "height" not in physical_profile_data
-                    or "weight" not in physical_profile_data
-                    or "gender" not in physical_profile_data
-                ):
-                    physical_profile_data.update(
-                        {
-                            "height": physical_profile_data.get("height", 0),
-                            "weight": physical_profile_data.get("weight", 0),
-                            "gender": physical_profile_data.get("gender", ""),
-                        }
-                    )
-                serializer = PhysicalProfileSerializer(data=physical_profile_data)
-
-            if serializer.is_valid():
-                if isinstance(serializer.instance, PhysicalProfile):
-                    serializer.save()
-                else:
-                    serializer.save(user=user)
-            else:
-                print(f"Physical profile serializer errors: {serializer.errors}")
-                return Response(
-                    {
-                        "status": "error",
-                        "message": "Failed to update physical profile",
-                        "errors": serializer.errors,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        if fitness_profile_data:
-            try:
-                profile = FitnessProfile.objects.get(user=user)
-                serializer = FitnessProfileSerializer(
-                    profile, data=fitness_profile_data, partial=True
-                )
-            except FitnessProfile.DoesNotExist:
-                required_fields = [
-                    "workout_frequency",
-                    "workout_duration",
-                    "workout_intensity",
-                    "workout_type",
-                    "workout_goal",
-                    "health_goal",
-                ]
-                for field in required_fields:
-                    if field not in fitness_profile_data:
-                        if field in [
-                            "workout_frequency",
-                            "workout_duration",
-                            "workout_intensity",
-                        ]:
-                            fitness_profile_data[field] = 0
-                        else:
-                            fitness_profile_data[field] = ""
-
-                serializer = FitnessProfileSerializer(data=fitness_profile_data)
-
-            if serializer.is_valid():
-                if isinstance(serializer.instance, FitnessProfile):
-                    serializer.save()
-                else:
-                    serializer.save(user=user)
-            else:
-                print(f"Fitness profile serializer errors: {serializer.errors}")
-                return Response(
-                    {
-                        "status": "error",
-                        "message": "Failed to update fitness profile",
-                        "errors": serializer.errors,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        if dietary_profile_data:
-            try:
-                profile = DietaryProfile.objects.get(user=user)
-                serializer = DietaryProfileSerializer(
-                    profile, data=dietary_profile_data, partial=True
-                )
-            except DietaryProfile.DoesNotExist:
-                # Make sure all required fields have default values
-                required_fields = ["diet_preference", "diet_allergies", "diet_restrictions", "diet_preferences", "diet_goal"]
-                for field in required_fields:
-                    if field not in dietary_profile_data:
-                        dietary_profile_data[field] = ""
-                        
-                serializer = DietaryProfileSerializer(data=dietary_profile_data)
-
-            if serializer.is_valid():
-                if isinstance(serializer.instance, DietaryProfile):
-                    serializer.save()
-                else:
-                    serializer.save(user=user)
-            else:
-                print(f"Dietary profile serializer errors: {serializer.errors}")
-                return Response(
-                    {
-                        "status": "error",
-                        "message": "Failed to update dietary profile",
-                        "errors": serializer.errors,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-        return Response(
-            {
-                "status": "success",
-                "message": "Profiles updated successfully",
-            }
-        )
+        # Write to fresh rows, not the possibly cached request.user
+        with transaction.atomic():
+            return _save_profile_setup(request, UserContext.for_update(user.pk))
 
 
 @api_view(["GET", "POST", "PUT", "DELETE"])
@@ -561,22 +577,25 @@ def fitness_content_admin_view(request, pk=None):
         if pk:
             try:
                 content = FitnessContent.objects.get(pk=pk)
-                serializer = FitnessContentSerializer(content)
-                return Response(serializer.data)
+                return Response(fitness_content_reader.one(content))
             except FitnessContent.DoesNotExist:
                 return Response(
                     {"message": "Fitness content not found"},
                     status=status.HTTP_404_NOT_FOUND,
                 )
         else:
-            contents = FitnessContent.objects.all().order_by("-created_at")
-            serializer = FitnessContentSerializer(contents, many=True)
-            return Response(serializer.data)
+            return Response(
+                cursor_paginate(
+                    request, FitnessContent.objects.all(), fitness_content_reader
+                )
+            )
 
     elif request.method == "POST":
         serializer = FitnessContentSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                content = serializer.save()
+                enqueue_upsert(content.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -587,7 +606,9 @@ def fitness_content_admin_view(request, pk=None):
                 content, data=request.data, partial=True
             )
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    serializer.save()
+                    enqueue_upsert(content.id)
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except FitnessContent.DoesNotExist:
@@ -599,7 +620,10 @@ def fitness_content_admin_view(request, pk=None):
     elif request.method == "DELETE":
         try:
             content = FitnessContent.objects.get(pk=pk)
-            content.delete()
+            # The vector goes with the row; the index worker deletes it
+            with transaction.atomic():
+                enqueue_delete(content.id, content.embedding_id)
+                content.delete()
             return Response(
                 {"message": "Fitness content deleted successfully"},
                 status=status.HTTP_204_NO_CONTENT,
@@ -619,6 +643,24 @@ def fitness_content_search_view(request):
     difficulty_level = request.query_params.get("difficulty_level", None)
     search_term = request.query_params.get("search", None)
 
+    if search_term and fulltext.is_supported():
+        limit = request.query_params.get("limit", "50")
+        limit = min(int(limit), 200) if limit.isdigit() else 50
+
+        hits = fulltext.search(search_term, content_type, difficulty_level, limit)
+        contents = FitnessContent.objects.in_bulk([hit["id"] for hit in hits])
+        return Response(
+            [
+                {
+                    **fitness_content_reader.one(contents[hit["id"]]),
+                    "search_rank": hit["rank"],
+                    "highlight": hit["highlight"],
+                }
+                for hit in hits
+                if hit["id"] in contents
+            ]
+        )
+
     queryset = FitnessContent.objects.all()
 
     if content_type:
@@ -633,8 +675,7 @@ def fitness_content_search_view(request):
         )
 
     queryset = queryset.order_by("-created_at")
-    serializer = FitnessContentSerializer(queryset, many=True)
-    return Response(serializer.data)
+    return Response(fitness_content_reader.values(queryset))
 
 
 @api_view(["POST"])
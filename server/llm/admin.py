@@ -1,3 +1,5 @@
 from django.contrib import admin
+from .models import IndexJob, TokenUsage
 
-
+admin.site.register(IndexJob)
+admin.site.register(TokenUsage)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class LlmConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'llm'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .rag import start_background_warm_up
+
+        start_background_warm_up()
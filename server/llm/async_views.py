@@ -0,0 +1,416 @@
+"""Async views for the LLM endpoints.
+
+These are plain Django async views rather than DRF views: DRF's request
+cycle is synchronous, so a DRF view holds a worker thread for the whole model
+call. Under an ASGI server (see the Dockerfile) each request here is a
+coroutine on the worker's event loop, and all requests share the pooled
+AsyncAnthropic client from llm.clients.get_async_client.
+
+Blocking work is pushed off the loop explicitly: cookie JWT authentication
+and ORM access go through sync_to_async, and the CPU-bound embedding search
+runs in a thread pool.
+"""
+
+import asyncio
+import functools
+import logging
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CookieJWTAuthentication
+from api.renderers import dumps
+
+from .chat import build_chat_request, personalize
+from .clients import get_async_client
+from .json_stream import JSONSectionParser
+from .limits import RateLimited, check_limits, record_usage
+from .rag import search_fitness_content
+from .recommendations import (
+    RECOMMENDATION_MODEL,
+    RecommendationError,
+    agenerate_recommendations,
+    astream_recommendation_text,
+    build_user_profile,
+    get_cached_recommendations,
+    parse_recommendations,
+    profile_fingerprint,
+    store_recommendations,
+)
+from .search import attach_content_ids
+from .singleflight import flight_key, recommendation_flights
+
+logger = logging.getLogger(__name__)
+
+
+def async_authenticated(view):
+    """Authenticate an async view with CookieJWTAuthentication.
+
+    Mirrors @authentication_classes([CookieJWTAuthentication]) plus
+    @permission_classes([IsAuthenticated]): the user lookup runs in the sync
+    thread, and failures return the same 401 body DRF would.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await sync_to_async(CookieJWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            return _json_response(
+                e.detail if isinstance(e.detail, dict) else {"detail": e.detail},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        if result is None:
+            return _json_response(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+
+    # Cookie JWTs are exempt from CSRF checks, as they are under DRF
+    return csrf_exempt(wrapper)
+
+
+def _json_body(request):
+    """Parse a JSON object body; raises ValueError if it is not one"""
+    if not request.body:
+        return {}
+    data = orjson.loads(request.body)
+    if not isinstance(data, dict):
+        raise ValueError("JSON body must be an object")
+    return data
+
+
+def _invalid_json_response():
+    return _json_response(
+        {"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+def _json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        dumps(data), status=status, headers=headers, content_type="application/json"
+    )
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+def _event_stream_response(events):
+    # An async iterator, so the ASGI handler sends each event as it is yielded
+    response = StreamingHttpResponse(
+        streaming_content=events, content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _rate_limited_response(e):
+    return _json_response(
+        {"error": str(e), "retry_after": e.retry_after},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _recommendation_usage_recorder(user):
+    async def on_usage(usage):
+        await sync_to_async(record_usage)(
+            user.pk, "recommendations", RECOMMENDATION_MODEL, usage
+        )
+
+    return on_usage
+
+
+def _recommendation_sections(recommendations):
+    for key, value in recommendations.items():
+        if key == "detailedWeeklySchedule" and isinstance(value, dict):
+            for day, schedule in value.items():
+                yield [key, day], schedule
+        else:
+            yield [key], value
+
+
+async def _generate_recommendations(user, user_profile, fingerprint):
+    recommendations = await agenerate_recommendations(
+        user_profile, on_usage=_recommendation_usage_recorder(user)
+    )
+    await sync_to_async(store_recommendations)(user, fingerprint, recommendations)
+    return recommendations
+
+
+@require_POST
+@async_authenticated
+async def recommendations_view(request):
+    try:
+        data = _json_body(request)
+    except ValueError:
+        return _invalid_json_response()
+
+    try:
+        current_user = request.user
+        user_profile = await sync_to_async(build_user_profile)(current_user)
+        fingerprint = profile_fingerprint(user_profile)
+
+        if not data.get("refresh"):
+            recommendations = await sync_to_async(get_cached_recommendations)(
+                current_user, fingerprint
+            )
+            if recommendations is not None:
+                return _json_response(recommendations, headers={"X-Cache": "HIT"})
+
+        # A duplicate request (e.g. a double click) joins the generation that
+        # is already running, in this or another worker, instead of paying
+        # for another one
+        # (the fingerprint covers the profile and PROMPT_VERSION)
+        key = flight_key(current_user.pk, fingerprint)
+        cache_status = "COALESCED"
+        if not recommendation_flights.in_flight(key):
+            cache_status = "MISS"
+            try:
+                await sync_to_async(check_limits)("recommendations", current_user.pk)
+            except RateLimited as e:
+                return _rate_limited_response(e)
+
+        try:
+            recommendations = await recommendation_flights.do(
+                key,
+                lambda: _generate_recommendations(current_user, user_profile, fingerprint),
+            )
+        except RecommendationError as e:
+            return _json_response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return _json_response(recommendations, headers={"X-Cache": cache_status})
+
+    except Exception as e:
+        logger.error(f"Error generating AI recommendations: {str(e)}")
+        return _json_response(
+            {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+async def _stream_recommendations(user, user_profile, fingerprint, sections):
+    """Generate recommendations, putting each section on the queue as it is written"""
+    parser = JSONSectionParser(split_keys={"detailedWeeklySchedule"})
+    async for text in astream_recommendation_text(
+        user_profile, on_usage=_recommendation_usage_recorder(user)
+    ):
+        for section in parser.feed(text):
+            sections.put_nowait(section)
+
+    recommendations = parse_recommendations(parser.text)
+    await sync_to_async(store_recommendations)(user, fingerprint, recommendations)
+    return recommendations
+
+
+@require_POST
+@async_authenticated
+async def recommendations_stream_view(request):
+    """Server-sent events variant of recommendations_view.
+
+    Emits a ``section`` event ({"path": [...], "value": ...}) for each
+    top-level section and for each day of detailedWeeklySchedule as soon as
+    Claude finishes writing it, then ``done`` (or ``error``). A request that
+    joins a generation already in flight for the same user and profile gets
+    all its sections when it finishes, and ``done`` has ``coalesced`` set.
+    """
+    try:
+        refresh = _json_body(request).get("refresh")
+    except ValueError:
+        return _invalid_json_response()
+
+    current_user = request.user
+    user_profile = await sync_to_async(build_user_profile)(current_user)
+    fingerprint = profile_fingerprint(user_profile)
+
+    cached = None
+    if not refresh:
+        cached = await sync_to_async(get_cached_recommendations)(
+            current_user, fingerprint
+        )
+
+    # Shared with recommendations_view, so either endpoint joins the other's
+    # generation; only a request that starts one is rate limited
+    key = flight_key(current_user.pk, fingerprint)
+    if cached is None and not recommendation_flights.in_flight(key):
+        try:
+            await sync_to_async(check_limits)("recommendations", current_user.pk)
+        except RateLimited as e:
+            return _rate_limited_response(e)
+
+    if cached is None:
+        # Started here rather than in the generator, so requests arriving
+        # from now on see it in flight. Only the leader's factory runs and
+        # fills the queue; followers, here or in another worker, receive the
+        # finished result
+        sections = asyncio.Queue()
+        flight = asyncio.ensure_future(
+            recommendation_flights.do(
+                key,
+                lambda: _stream_recommendations(
+                    current_user, user_profile, fingerprint, sections
+                ),
+            )
+        )
+
+    async def event_stream():
+        if cached is not None:
+            for path, value in _recommendation_sections(cached):
+                yield _sse("section", {"path": path, "value": value})
+            yield _sse("done", {"cached": True})
+            return
+
+        streamed = False
+        try:
+            while True:
+                next_section = asyncio.ensure_future(sections.get())
+                await asyncio.wait(
+                    {next_section, flight}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not next_section.done():
+                    next_section.cancel()
+                    break
+                path, value = next_section.result()
+                streamed = True
+                yield _sse("section", {"path": path, "value": value})
+
+            while not sections.empty():
+                path, value = sections.get_nowait()
+                streamed = True
+                yield _sse("section", {"path": path, "value": value})
+
+            recommendations = flight.result()
+            if not streamed:
+                for path, value in _recommendation_sections(recommendations):
+                    yield _sse("section", {"path": path, "value": value})
+            yield _sse("done", {"cached": False, "coalesced": not streamed})
+        except Exception as e:
+            logger.error(f"Error streaming AI recommendations: {str(e)}")
+            yield _sse("error", {"error": str(e)})
+
+    return _event_stream_response(event_stream())
+
+
+def _search_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = 5
+    return max(1, min(limit, getattr(settings, "VECTOR_SEARCH_MAX_LIMIT", 50)))
+
+
+@require_POST
+@async_authenticated
+async def search_content_view(request):
+    try:
+        data = _json_body(request)
+    except ValueError:
+        return _invalid_json_response()
+
+    try:
+        query = data.get("query", "")
+
+        if not query:
+            return _json_response(
+                {"error": "Query parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Embedding the query is CPU-bound and never touches the ORM, so it
+        # runs in the default executor instead of the single sync thread
+        results = await sync_to_async(search_fitness_content, thread_sensitive=False)(
+            query_text=query,
+            content_type=data.get("content_type", None),
+            difficulty_level=data.get("difficulty_level", None),
+            filter_dict=data.get("filters", {}),
+            top_k=_search_limit(data.get("limit", 5)),
+            equipment=data.get("equipment", None),
+            target_muscle=data.get("target_muscle", None),
+        )
+
+        return _json_response(results)
+
+    except Exception as e:
+        logger.error(f"Error searching content: {str(e)}")
+        return _json_response(
+            {"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+async def _retrieve(query):
+    """Top-k FitnessContent matches for query, or [] if the index is unavailable"""
+    try:
+        matches = await sync_to_async(search_fitness_content, thread_sensitive=False)(
+            query_text=query,
+            top_k=getattr(settings, "CHAT_RETRIEVAL_TOP_K", 8),
+        )
+        return await sync_to_async(attach_content_ids)(matches)
+    except Exception as e:
+        logger.error(f"Error retrieving chat context: {str(e)}")
+        return []
+
+
+@require_POST
+@async_authenticated
+async def ai_chat(request):
+    """Answer a fitness question grounded in the FitnessContent index.
+
+    Streams server-sent events: ``delta`` ({"text": ...}) for each chunk of
+    the answer, then ``citations`` ({"citations": [...]}) listing the
+    references the answer was grounded in, then ``done`` (or ``error``).
+    """
+    try:
+        query = _json_body(request).get("query")
+    except ValueError:
+        return _invalid_json_response()
+
+    if not query:
+        return _json_response(
+            {"error": "Query parameter is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        await sync_to_async(check_limits)("chat", request.user.pk)
+    except RateLimited as e:
+        return _rate_limited_response(e)
+
+    user_profile, matches = await asyncio.gather(
+        sync_to_async(build_user_profile)(request.user), _retrieve(query)
+    )
+    params, citations = build_chat_request(
+        query, user_profile, personalize(matches, user_profile)
+    )
+
+    async def event_stream():
+        try:
+            async with get_async_client().messages.stream(**params) as stream:
+                async for text in stream.text_stream:
+                    yield _sse("delta", {"text": text})
+                message = await stream.get_final_message()
+
+            await sync_to_async(record_usage)(
+                request.user.pk, "chat", params["model"], message.usage
+            )
+
+            yield _sse("citations", {"citations": citations})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(f"Error streaming AI chat: {str(e)}")
+            yield _sse("error", {"error": str(e)})
+
+    return _event_stream_response(event_stream())
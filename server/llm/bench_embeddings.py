@@ -0,0 +1,119 @@
+"""Benchmark the embedding backends on the FitnessContent table.
+
+Encodes every content item (build_embedding_text) and one query per item
+(its title) with each backend, then reports single-query encode latency,
+batch throughput, the memory the backend added to the process and, against
+the fp32 torch baseline, recall@k of query -> content retrieval and the mean
+cosine similarity of the content vectors.
+
+Usage:
+    cd server
+    python llm/bench_embeddings.py [--backends torch onnx onnx-int8] [--limit 2000]
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.models import FitnessContent  # noqa: E402
+from llm.embedding_backends import load_backend  # noqa: E402
+from llm.rag import MODEL_NAME, build_embedding_text  # noqa: E402
+
+BACKENDS = {
+    "torch": ("torch", None),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(
+        f"  {label:<14} median {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p95 {p95 * 1000:.1f} ms"
+    )
+
+
+def top_k(queries, documents, k):
+    return np.argsort(-(queries @ documents.T), axis=1)[:, :k]
+
+
+def run(label, texts, queries, batch_size):
+    gc.collect()
+    before = rss_mb()
+    backend_name, quantized = BACKENDS[label]
+    backend = load_backend(MODEL_NAME, backend=backend_name, quantized=quantized)
+    print(f"{label} (max_seq_length {backend.max_seq_length})")
+    print(f"  {'memory':<14} +{rss_mb() - before:.0f} MB")
+
+    backend.encode(queries[0])
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(backend.encode(query))
+        latencies.append(time.perf_counter() - start)
+    report("query encode", latencies)
+
+    start = time.perf_counter()
+    documents = np.asarray(backend.encode(texts, batch_size=batch_size), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    print(f"  {'throughput':<14} {len(texts) / elapsed:.1f} items/s")
+
+    del backend
+    return np.asarray(query_vectors, dtype=np.float32), documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS)
+    )
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    contents = list(FitnessContent.objects.order_by("id")[: args.limit])
+    if len(contents) <= args.top_k:
+        sys.exit(f"Need more than {args.top_k} FitnessContent rows, found {len(contents)}")
+    texts = [build_embedding_text(content) for content in contents]
+    queries = [content.title for content in contents]
+    print(f"{len(texts)} content items, {len(queries)} queries\n")
+
+    baseline = run("torch", texts, queries, args.batch_size)
+    expected = top_k(*baseline, args.top_k)
+
+    for label in args.backends:
+        if label == "torch":
+            continue
+        query_vectors, documents = run(label, texts, queries, args.batch_size)
+        found = top_k(query_vectors, documents, args.top_k)
+        recall = statistics.mean(
+            len(set(a) & set(b)) / args.top_k for a, b in zip(expected, found)
+        )
+        similarity = float(np.mean(np.sum(documents * baseline[1], axis=1)))
+        print(f"  {f'recall@{args.top_k}':<14} {recall:.3f}")
+        print(f"  {'cosine vs fp32':<14} {similarity:.4f}")
+
+
+if __name__ == "__main__":
+    main()
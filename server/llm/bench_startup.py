@@ -0,0 +1,102 @@
+"""Measure cold-start import time of the Django application.
+
+Each run happens in a fresh interpreter so nothing is cached between runs.
+The script imports server.wsgi, loads the URLconf (which pulls in every view
+module) and reports the timings along with any heavy ML/SDK modules that got
+imported along the way. It exits with status 1 when the median exceeds
+STARTUP_IMPORT_BUDGET_SECONDS.
+
+Usage:
+    cd server
+    python llm/bench_startup.py [--runs 5] [--budget 1.0]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "onnxruntime",
+    "tokenizers",
+    "pinecone",
+    "anthropic",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import server.wsgi
+wsgi_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+print(json.dumps({
+    "wsgi": wsgi_done - start,
+    "total": urls_done - start,
+    "heavy": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def run_once():
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+    env["RAG_WARMUP_ON_STARTUP"] = "False"
+    output = subprocess.check_output(
+        [sys.executable, "-c", PROBE % (HEAVY_MODULES,)],
+        cwd=SERVER_DIR,
+        env=env,
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    sys.path.insert(0, SERVER_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.settings")
+    from django.conf import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="Budget in seconds (defaults to STARTUP_IMPORT_BUDGET_SECONDS)",
+    )
+    args = parser.parse_args()
+    budget = (
+        args.budget
+        if args.budget is not None
+        else settings.STARTUP_IMPORT_BUDGET_SECONDS
+    )
+
+    runs = [run_once() for _ in range(args.runs)]
+    wsgi_times = [r["wsgi"] for r in runs]
+    total_times = [r["total"] for r in runs]
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+
+    median_total = statistics.median(total_times)
+    print(f"runs:                 {args.runs}")
+    print(f"import server.wsgi:   median {statistics.median(wsgi_times):.3f}s, min {min(wsgi_times):.3f}s")
+    print(f"wsgi + URLconf:       median {median_total:.3f}s, min {min(total_times):.3f}s")
+    print(f"heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    print(f"budget:               {budget:.3f}s")
+
+    if median_total > budget:
+        print("FAIL: startup exceeds budget")
+        return 1
+
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
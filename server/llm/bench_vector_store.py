@@ -0,0 +1,146 @@
+"""Benchmark the local vector store offline with synthetic vectors.
+
+Builds a LocalVectorStore in a temporary directory, then reports query
+latency for the exact scan and (above the HNSW threshold) the graph search,
+plus the graph's recall@k against the exact results. --dtype and --binary
+add a scan over vectors stored as float16/int8 and/or with the sign-bit
+prefilter, with its recall@k against the float32 exact scan.
+
+Usage:
+    cd server
+    python llm/bench_vector_store.py [--size 5000] [--dimension 1024] [--queries 200]
+    python llm/bench_vector_store.py --size 100000 --clusters 200 --dtype int8 --binary
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.vector_store import STORAGE_DTYPES, LocalVectorStore  # noqa: E402
+
+CONTENT_TYPES = ["exercise", "workout", "article", "tutorial", "diet"]
+
+
+def timed_queries(store, queries, top_k):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([m["id"] for m in store.query(query, top_k=top_k)])
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<12} median {statistics.median(latencies) * 1000:.3f} ms, "
+        f"p95 {p95 * 1000:.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--hnsw", action="store_true", help="Also benchmark HNSW")
+    parser.add_argument(
+        "--clusters",
+        type=int,
+        default=0,
+        help="Draw vectors around this many centers instead of uniformly",
+    )
+    parser.add_argument("--dtype", choices=STORAGE_DTYPES, default="float32")
+    parser.add_argument(
+        "--binary", action="store_true", help="Also benchmark the sign-bit prefilter"
+    )
+    parser.add_argument("--rerank-factor", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    if args.clusters:
+        # Closer to real embeddings than isotropic noise: tight topical groups,
+        # queried near existing items
+        centers = rng.normal(size=(args.clusters, args.dimension))
+        vectors = centers[rng.integers(args.clusters, size=args.size)]
+        vectors = (vectors + rng.normal(scale=0.5, size=vectors.shape)).astype(np.float32)
+        queries = vectors[rng.integers(args.size, size=args.queries)]
+        queries = queries + rng.normal(scale=0.5, size=queries.shape).astype(np.float32)
+    else:
+        vectors = rng.normal(size=(args.size, args.dimension)).astype(np.float32)
+        queries = rng.normal(size=(args.queries, args.dimension)).astype(np.float32)
+
+    items = [
+        (
+            f"fitness-{i}",
+            vectors[i],
+            {"content_type": CONTENT_TYPES[i % 5], "difficulty_level": i % 5 + 1},
+        )
+        for i in range(args.size)
+    ]
+    no_binary = args.size + 1
+
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(
+            path,
+            args.dimension,
+            hnsw_threshold=args.size if args.hnsw else args.size + 1,
+            binary_threshold=no_binary,
+        )
+        start = time.perf_counter()
+        store.upsert(items)
+        print(f"build        {time.perf_counter() - start:.2f} s for {args.size} vectors")
+
+        exact_store = LocalVectorStore(
+            path, args.dimension, hnsw_threshold=args.size + 1, binary_threshold=no_binary
+        )
+        exact_store._refresh()
+        exact_store._graph = None
+        exact_latencies, exact_results = timed_queries(exact_store, queries, args.top_k)
+        report("exact", exact_latencies)
+
+        if args.hnsw:
+            hnsw_latencies, hnsw_results = timed_queries(store, queries, args.top_k)
+            report("hnsw", hnsw_latencies)
+            recall = statistics.mean(
+                len(set(a) & set(b)) / args.top_k
+                for a, b in zip(exact_results, hnsw_results)
+            )
+            print(f"recall@{args.top_k:<5} {recall:.3f}")
+
+    if args.dtype == "float32" and not args.binary:
+        return
+
+    label = f"{args.dtype}{'+binary' if args.binary else ''}"
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(
+            path,
+            args.dimension,
+            hnsw_threshold=args.size + 1,
+            dtype=args.dtype,
+            binary_threshold=0 if args.binary else no_binary,
+            rerank_factor=args.rerank_factor,
+        )
+        store.upsert(items)
+        size = os.path.getsize(os.path.join(path, "vectors.npy"))
+        print(f"{label:<12} {size / args.size:.0f} bytes/vector stored")
+        latencies, results = timed_queries(store, queries, args.top_k)
+        report(label, latencies)
+        recall = statistics.mean(
+            len(set(a) & set(b)) / args.top_k for a, b in zip(exact_results, results)
+        )
+        print(f"recall@{args.top_k:<5} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Retrieval-augmented chat.
+
+A chat question is embedded (through the query embedding cache) and matched
+against the FitnessContent index. The matches are re-ranked for the asking
+user's profile, then packed into the prompt under a token budget with
+numbered references. Claude answers from that context, so the system prompt
+and max_tokens can stay small. The references actually sent are returned as
+citations.
+"""
+
+from django.conf import settings
+
+SYSTEM_PROMPT = (
+    "You are an expert fitness advisor. Answer the user's question for their "
+    "profile, grounding your answer in the numbered reference content when it "
+    "is relevant and citing it inline as [n]. Do not invent references. "
+    "Format with markdown: bold exercise names, tables for workout plans, "
+    "bullet points for steps or benefits. Be concise."
+)
+
+FITNESS_LEVELS = {
+    "beginner": 1,
+    "intermediate": 2,
+    "advanced": 3,
+    "expert": 4,
+    "professional": 5,
+}
+
+# Equipment values that a user without any listed equipment can still use
+NO_EQUIPMENT = {"", "none", "bodyweight", "body weight", "no equipment"}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) for budgeting prompts"""
+    return len(text) // 4 + 1
+
+
+def profile_summary(user_profile):
+    """One-paragraph summary of the profile fields that matter for chat"""
+    fitness = user_profile["fitnessProfile"]
+    personal = user_profile["personalInfo"]
+    nutrition = user_profile["nutrition"]
+    return (
+        f"Age {personal['age']}, gender {personal['gender']}, "
+        f"{fitness['fitnessLevel']} fitness level. "
+        f"Goal: {fitness['workoutGoal']}; health goal: {fitness['healthGoal']}. "
+        f"Trains {fitness['workoutFrequency']}x/week for {fitness['workoutDuration']} min, "
+        f"prefers {fitness['workoutType']}. "
+        f"Equipment: {fitness['workoutEquipment'] or 'none listed'}. "
+        f"Health condition: {user_profile['additionalInfo']['healthCondition']}. "
+        f"Diet: {nutrition['dietPreference']}; allergies: {nutrition['dietAllergies']}; "
+        f"restrictions: {nutrition['dietRestrictions']}."
+    )
+
+
+def personalize(matches, user_profile):
+    """Re-rank vector matches for the user.
+
+    Similarity is penalized by the distance between the content's difficulty
+    and the user's fitness level, and content that needs equipment is pushed
+    down for users who list none.
+    """
+    fitness = user_profile["fitnessProfile"]
+    level = FITNESS_LEVELS.get(fitness["fitnessLevel"], 2)
+    has_equipment = (fitness["workoutEquipment"] or "").strip().lower() not in NO_EQUIPMENT
+    difficulty_penalty = getattr(settings, "CHAT_DIFFICULTY_PENALTY", 0.03)
+    equipment_penalty = getattr(settings, "CHAT_EQUIPMENT_PENALTY", 0.05)
+
+    def adjusted(match):
+        metadata = match.get("metadata") or {}
+        score = match.get("score") or 0.0
+        try:
+            difficulty = int(metadata.get("difficulty_level", level))
+        except (TypeError, ValueError):
+            difficulty = level
+        score -= difficulty_penalty * abs(difficulty - level)
+
+        equipment = str(metadata.get("equipment_required", "")).strip().lower()
+        if not has_equipment and equipment not in NO_EQUIPMENT:
+            score -= equipment_penalty
+        return score
+
+    return sorted(matches, key=adjusted, reverse=True)
+
+
+def _format_reference(number, metadata, description):
+    return (
+        f"[{number}] {metadata.get('title', '')} "
+        f"({metadata.get('content_type', '')}, difficulty "
+        f"{metadata.get('difficulty_level', '?')}/5, "
+        f"{metadata.get('duration_minutes', 0)} min)\n"
+        f"Equipment: {metadata.get('equipment_required') or 'none'}; "
+        f"target muscles: {metadata.get('target_muscles') or 'n/a'}\n"
+        f"{description}"
+    )
+
+
+def pack_context(matches, budget):
+    """Format matches as numbered references until budget tokens are used.
+
+    A reference that does not fit has its description truncated when at
+    least a useful fraction of it fits; packing stops at the first reference
+    that cannot fit at all. Returns (context_text, packed_matches).
+    """
+    blocks = []
+    packed = []
+    remaining = budget
+
+    for match in matches:
+        metadata = match.get("metadata") or {}
+        description = metadata.get("description", "")
+        block = _format_reference(len(packed) + 1, metadata, description)
+        cost = estimate_tokens(block)
+
+        if cost > remaining:
+            header_cost = estimate_tokens(_format_reference(len(packed) + 1, metadata, ""))
+            room = remaining - header_cost
+            if room < 32:
+                break
+            block = _format_reference(
+                len(packed) + 1, metadata, description[: room * 4].rstrip() + "..."
+            )
+            cost = estimate_tokens(block)
+
+        blocks.append(block)
+        packed.append(match)
+        remaining -= cost
+
+    return "\n\n".join(blocks), packed
+
+
+def build_chat_request(query, user_profile, matches):
+    """Return (message_params, citations) for a grounded chat completion"""
+    summary = profile_summary(user_profile)
+    budget = getattr(settings, "CHAT_CONTEXT_TOKEN_BUDGET", 1200) - estimate_tokens(summary)
+    context, packed = pack_context(matches, budget)
+
+    parts = [f"My profile: {summary}"]
+    if context:
+        parts.append(f"Reference content:\n{context}")
+    parts.append(f"Question: {query}")
+
+    citations = []
+    for number, match in enumerate(packed, start=1):
+        metadata = match.get("metadata") or {}
+        citations.append(
+            {
+                "ref": number,
+                "id": match["content_id"],
+                "embedding_id": match["id"],
+                "title": metadata.get("title", ""),
+                "content_type": metadata.get("content_type", ""),
+                "url": metadata.get("url", ""),
+                "youtube_url": metadata.get("youtube_url", ""),
+            }
+        )
+
+    params = {
+        "model": "claude-3-7-sonnet-20250219",
+        "max_tokens": getattr(settings, "CHAT_MAX_TOKENS", 600),
+        "temperature": 1,
+        "system": SYSTEM_PROMPT,
+        "messages": [{"role": "user", "content": "\n\n".join(parts)}],
+    }
+    return params, citations
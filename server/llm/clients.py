@@ -0,0 +1,46 @@
+import asyncio
+import os
+import weakref
+
+from dotenv import load_dotenv
+
+load_dotenv()
+key = os.getenv("ANTHROPIC_API_KEY")
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Get or create the AsyncAnthropic client for the running event loop.
+
+    The SDK is imported on first use so that loading the URLconf does not pay
+    for it in every worker and management command.
+
+    Each client owns a pooled httpx connection pool, which is bound to the
+    loop it was created on. Under an ASGI server there is one loop per worker,
+    so every request in the process shares a single pool; the per-loop lookup
+    only matters when async views run under WSGI (runserver, tests), where each
+    request gets a fresh loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+
+    if client is None:
+        import httpx
+        from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+        from django.conf import settings
+
+        client = AsyncAnthropic(
+            api_key=key,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=getattr(settings, "ANTHROPIC_MAX_CONNECTIONS", 200),
+                    max_keepalive_connections=getattr(
+                        settings, "ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS", 50
+                    ),
+                )
+            ),
+        )
+        _async_clients[loop] = client
+
+    return client
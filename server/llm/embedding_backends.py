@@ -0,0 +1,170 @@
+"""Embedding model backends for BGE-M3.
+
+EMBEDDING_BACKEND selects how text is encoded:
+
+- "torch": the sentence-transformers model in full precision (the default).
+- "onnx": the model exported to ONNX (manage.py export_embedding_model) and
+  run with ONNX Runtime, optionally with int8 dynamically quantized weights
+  (EMBEDDING_ONNX_QUANTIZED). It needs only onnxruntime and tokenizers at
+  runtime, not torch.
+
+Both produce CLS-pooled, L2-normalized vectors, so they are interchangeable
+against the same index. Inputs are truncated to EMBEDDING_MAX_SEQ_LENGTH
+tokens. Backends expose the subset of SentenceTransformer.encode() that
+llm.rag uses, plus token_lengths() for length-sorted batching.
+"""
+
+import logging
+import os
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+
+class EmbeddingBackend:
+    name = "base"
+
+    def __init__(self, model_name, max_seq_length):
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False):
+        """Encode a string to a vector, or a list of strings to a 2-D array"""
+        raise NotImplementedError
+
+    def token_lengths(self, texts):
+        raise NotImplementedError
+
+
+class TorchEmbeddingBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name, max_seq_length, num_threads=None):
+        super().__init__(model_name, max_seq_length)
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+
+        self.model = SentenceTransformer(model_name)
+        self.model.max_seq_length = max_seq_length
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False):
+        return self.model.encode(
+            sentences, batch_size=batch_size, show_progress_bar=show_progress_bar
+        )
+
+    def token_lengths(self, texts):
+        encoded = self.model.tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    name = "onnx"
+
+    def __init__(
+        self, model_name, max_seq_length, path, quantized=True, num_threads=None
+    ):
+        super().__init__(model_name, max_seq_length)
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.quantized = quantized
+        model_file = os.path.join(
+            path, ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        )
+        if not os.path.exists(model_file):
+            raise FileNotFoundError(
+                f"{model_file} not found, run manage.py export_embedding_model"
+            )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            model_file, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding(
+            pad_id=self.tokenizer.token_to_id("<pad>") or 0, pad_token="<pad>"
+        )
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+        }
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+
+        hidden = self.session.run(None, inputs)[0]
+        # BGE-M3 dense vectors are the normalized [CLS] hidden state
+        cls = hidden[:, 0]
+        return cls / np.linalg.norm(cls, axis=1, keepdims=True)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False):
+        if isinstance(sentences, str):
+            return self._encode_batch([sentences])[0]
+        if not sentences:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        return np.vstack(
+            [
+                self._encode_batch(sentences[start : start + batch_size])
+                for start in range(0, len(sentences), batch_size)
+            ]
+        )
+
+    def token_lengths(self, texts):
+        encoded = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        # Padding is enabled on the tokenizer, so count unmasked tokens
+        return [sum(e.attention_mask) for e in encoded]
+
+
+def backend_id(model_name):
+    """Identify the configured backend without loading it, e.g. for cache keys"""
+    backend = getattr(settings, "EMBEDDING_BACKEND", "torch")
+    if backend == "onnx" and getattr(settings, "EMBEDDING_ONNX_QUANTIZED", True):
+        backend = "onnx-int8"
+    max_seq_length = getattr(settings, "EMBEDDING_MAX_SEQ_LENGTH", 512)
+    return f"{model_name}:{backend}:{max_seq_length}"
+
+
+def load_backend(model_name, backend=None, quantized=None):
+    """Load the backend named by EMBEDDING_BACKEND (or ``backend``)"""
+    backend = backend or getattr(settings, "EMBEDDING_BACKEND", "torch")
+    max_seq_length = getattr(settings, "EMBEDDING_MAX_SEQ_LENGTH", 512)
+    num_threads = getattr(settings, "EMBEDDING_THREADS", None)
+
+    logger.info(f"Loading embedding model: {model_name} ({backend})")
+    if backend == "torch":
+        return TorchEmbeddingBackend(model_name, max_seq_length, num_threads)
+    if backend == "onnx":
+        return OnnxEmbeddingBackend(
+            model_name,
+            max_seq_length,
+            getattr(settings, "EMBEDDING_ONNX_PATH"),
+            quantized=(
+                getattr(settings, "EMBEDDING_ONNX_QUANTIZED", True)
+                if quantized is None
+                else quantized
+            ),
+            num_threads=num_threads,
+        )
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Normalize a query so trivially different spellings share a cache entry"""
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """Two-tier cache for query embeddings.
+
+    The first tier is a per-process LRU bounded by entry count and by the
+    total size of the stored float32 vectors. The optional second tier is a
+    Django cache backend (e.g. file-based or Redis) that all workers share, so
+    a query encoded by one worker is a hit for the others. Keys combine the
+    model name with the normalized text, so switching models never returns a
+    stale vector. Shared entries expire after ``shared_timeout`` seconds, by
+    default the TIMEOUT of the shared cache.
+    """
+
+    def __init__(
+        self,
+        model_name,
+        max_entries=2048,
+        max_bytes=32 * 1024 * 1024,
+        shared_cache=None,
+        shared_timeout=DEFAULT_TIMEOUT,
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared_cache = shared_cache
+        self.shared_timeout = shared_timeout
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text):
+        digest = hashlib.sha256(
+            f"{self.model_name}\0{normalize_text(text)}".encode()
+        ).hexdigest()
+        return f"embedding:{digest}"
+
+    def _store_local(self, key, vector):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = vector
+            self._bytes += vector.nbytes
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def get(self, text):
+        """Return the cached vector for text as a float32 array, or None"""
+        key = self.key(text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        if self.shared_cache is not None:
+            try:
+                raw = self.shared_cache.get(key)
+            except Exception as e:
+                logger.warning(f"Shared embedding cache read failed: {str(e)}")
+                raw = None
+            if raw is not None:
+                vector = np.frombuffer(raw, dtype=np.float32)
+                self._store_local(key, vector)
+                with self._lock:
+                    self.shared_hits += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, text, vector):
+        key = self.key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        # Cached vectors are handed to every caller, so none may modify them
+        vector.setflags(write=False)
+        self._store_local(key, vector)
+
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.set(key, vector.tobytes(), self.shared_timeout)
+            except Exception as e:
+                logger.warning(f"Shared embedding cache write failed: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (
+                    (self.hits + self.shared_hits) / lookups if lookups else 0.0
+                ),
+            }
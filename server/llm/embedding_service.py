@@ -0,0 +1,294 @@
+"""Out-of-process embedding server and its client.
+
+manage.py run_embedding_server loads the embedding backend once and serves
+it over localhost HTTP or a Unix socket. Web and index workers that have
+EMBEDDING_SERVICE_URL set use EmbeddingClient in place of a local model (see
+llm.rag.get_embedding_model), so memory grows with the number of servers
+rather than the number of workers.
+
+The server micro-batches: texts from concurrent requests that arrive within
+EMBEDDING_SERVICE_MAX_WAIT_MS of each other are encoded together in one call,
+up to EMBEDDING_SERVICE_MAX_BATCH_SIZE texts.
+
+Endpoints (JSON in and out):
+    POST /embed          {"texts": [...]} -> {"model", "embeddings"}
+    POST /token-lengths  {"texts": [...]} -> {"lengths"}
+    GET  /health         -> {"model", "batches", "texts", "mean_batch_size", ...}
+
+With "Accept: application/octet-stream", /embed instead returns the raw
+row-major array, as float32 or (X-Embedding-Dtype: float16) half the size,
+described by the X-Embedding-Dtype and X-Embedding-Shape response headers.
+The client always asks for this form.
+"""
+
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+UNIX_PREFIX = "unix://"
+BINARY_CONTENT_TYPE = "application/octet-stream"
+TRANSPORT_DTYPES = ("float32", "float16")
+
+
+class MicroBatcher:
+    """Collects texts submitted from many threads into batched encode() calls"""
+
+    def __init__(self, backend, max_batch_size=64, max_wait=0.005):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(
+            target=self._run, name="embedding-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def encode(self, texts, timeout=None):
+        """Encode texts, waiting for the batches they are placed in"""
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return np.vstack([future.result(timeout) for future in futures])
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Take whatever is already queued even once the wait is over
+                batch.append(
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.backend.encode(texts, batch_size=len(texts))
+            except Exception as e:
+                logger.error(f"Error encoding batch of {len(texts)}: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.texts += len(texts)
+                self.largest_batch = max(self.largest_batch, len(texts))
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "texts": self.texts,
+                "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+            }
+
+
+class EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, payload):
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_array(self, vectors):
+        dtype = self.headers.get("X-Embedding-Dtype", "float32")
+        if dtype not in TRANSPORT_DTYPES:
+            return self._send(400, {"error": f"Unsupported dtype: {dtype}"})
+
+        body = np.ascontiguousarray(vectors, dtype=dtype).tobytes()
+        self.send_response(200)
+        self.send_header("Content-Type", BINARY_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Embedding-Dtype", dtype)
+        self.send_header("X-Embedding-Shape", ",".join(map(str, vectors.shape)))
+        self.send_header("X-Embedding-Model", self.server.model_id)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_texts(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = orjson.loads(self.rfile.read(length))
+        texts = payload.get("texts") if isinstance(payload, dict) else None
+        if not isinstance(texts, list) or not all(
+            isinstance(text, str) and text for text in texts
+        ):
+            raise ValueError("texts must be a list of non-empty strings")
+        return texts
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send(404, {"error": "Not found"})
+        self._send(
+            200, {"model": self.server.model_id, **self.server.batcher.stats()}
+        )
+
+    def do_POST(self):
+        if self.path not in ("/embed", "/token-lengths"):
+            return self._send(404, {"error": "Not found"})
+        try:
+            texts = self._read_texts()
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+
+        try:
+            if self.path == "/token-lengths":
+                lengths = self.server.batcher.backend.token_lengths(texts)
+                return self._send(200, {"lengths": lengths})
+
+            vectors = (
+                self.server.batcher.encode(texts, self.server.encode_timeout)
+                if texts
+                else np.zeros((0, 0), dtype=np.float32)
+            )
+            if self.headers.get("Accept") == BINARY_CONTENT_TYPE:
+                return self._send_array(vectors)
+            self._send(200, {"model": self.server.model_id, "embeddings": vectors})
+        except Exception as e:
+            logger.error(f"Error handling {self.path}: {str(e)}")
+            self._send(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # client_address is empty on a Unix socket, so skip address_string()
+        logger.debug(format % args)
+
+
+class EmbeddingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class UnixEmbeddingHTTPServer(
+    socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+        os.chmod(self.server_address, 0o660)
+
+
+def make_server(bind, batcher, model_id, timeout=30):
+    """Serve batcher on ``bind``: "unix:///path.sock" or "host:port" """
+    if bind.startswith(UNIX_PREFIX):
+        server = UnixEmbeddingHTTPServer(
+            bind[len(UNIX_PREFIX) :], EmbeddingRequestHandler
+        )
+    else:
+        host, _, port = bind.rpartition(":")
+        server = EmbeddingHTTPServer(
+            (host or "127.0.0.1", int(port)), EmbeddingRequestHandler
+        )
+    server.batcher = batcher
+    server.model_id = model_id
+    server.encode_timeout = timeout
+    return server
+
+
+class EmbeddingServiceError(Exception):
+    pass
+
+
+class EmbeddingClient:
+    """Stands in for an embedding backend, encoding through the server.
+
+    One pooled httpx client is shared by every thread in the process.
+    Vectors travel as raw ``dtype`` arrays and come back as float32.
+    """
+
+    name = "remote"
+
+    def __init__(self, url, timeout=30, max_connections=20, dtype="float32"):
+        import httpx
+
+        if dtype not in TRANSPORT_DTYPES:
+            raise ValueError(f"Unsupported embedding transport dtype: {dtype}")
+        self.dtype = dtype
+
+        limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        )
+        if url.startswith(UNIX_PREFIX):
+            transport = httpx.HTTPTransport(
+                uds=url[len(UNIX_PREFIX) :], limits=limits
+            )
+            base_url = "http://embedding-server"
+        else:
+            transport = httpx.HTTPTransport(limits=limits)
+            base_url = url
+        self.url = url
+        self._client = httpx.Client(
+            base_url=base_url, transport=transport, timeout=timeout
+        )
+
+    def _post(self, path, texts, headers=None):
+        import httpx
+
+        try:
+            response = self._client.post(
+                path,
+                content=orjson.dumps({"texts": texts}),
+                headers={"Content-Type": "application/json", **(headers or {})},
+            )
+        except httpx.HTTPError as e:
+            raise EmbeddingServiceError(
+                f"Embedding server at {self.url} is unavailable: {str(e)}"
+            ) from e
+
+        if response.status_code != 200:
+            raise EmbeddingServiceError(
+                orjson.loads(response.content).get("error", response.reason_phrase)
+            )
+        return response
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        response = self._post(
+            "/embed",
+            texts,
+            {"Accept": BINARY_CONTENT_TYPE, "X-Embedding-Dtype": self.dtype},
+        )
+        headers = response.headers
+        shape = tuple(int(n) for n in headers["X-Embedding-Shape"].split(","))
+        vectors = (
+            np.frombuffer(response.content, dtype=headers["X-Embedding-Dtype"])
+            .reshape(shape)
+            .astype(np.float32)
+        )
+        return vectors[0] if single else vectors
+
+    def token_lengths(self, texts):
+        return orjson.loads(self._post("/token-lengths", texts).content)["lengths"]
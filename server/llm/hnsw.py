@@ -0,0 +1,144 @@
+import heapq
+import math
+import random
+
+import numpy as np
+
+
+class HNSWGraph:
+    """Hierarchical navigable small-world graph over unit-normalized vectors.
+
+    Similarity is the inner product, so vectors must be normalized by the
+    caller for it to equal cosine similarity. Neighbour lists are stored as a
+    dense int32 array of shape (levels, rows, 2 * M) padded with -1, which lets
+    the graph be saved with np.save and loaded back memory-mapped. Rows are
+    never removed; deleted rows stay in the graph as routing nodes and are
+    filtered out by the caller.
+    """
+
+    def __init__(self, m=16, ef_construction=100, seed=42):
+        self.m = m
+        self.max_m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.level_mult = 1 / math.log(m)
+        self.entry_point = -1
+        self.max_level = -1
+        self.neighbors = np.full((1, 0, self.max_m0), -1, dtype=np.int32)
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return self.neighbors.shape[1]
+
+    def to_config(self):
+        return {
+            "m": self.m,
+            "ef_construction": self.ef_construction,
+            "entry_point": int(self.entry_point),
+            "max_level": int(self.max_level),
+        }
+
+    @classmethod
+    def from_arrays(cls, config, neighbors):
+        graph = cls(m=config["m"], ef_construction=config["ef_construction"])
+        graph.entry_point = config["entry_point"]
+        graph.max_level = config["max_level"]
+        graph.neighbors = neighbors
+        return graph
+
+    def _grow(self, rows, levels):
+        current_levels, current_rows, width = self.neighbors.shape
+        if rows <= current_rows and levels <= current_levels:
+            return
+        grown = np.full(
+            (max(levels, current_levels), max(rows, current_rows), width),
+            -1,
+            dtype=np.int32,
+        )
+        grown[:current_levels, :current_rows] = self.neighbors
+        self.neighbors = grown
+
+    def _links(self, level, row):
+        links = self.neighbors[level, row]
+        return links[links >= 0]
+
+    def _search_level(self, vectors, query, entry_points, ef, level):
+        visited = set(entry_points)
+        scores = vectors[entry_points] @ query
+        candidates = [(-float(s), int(e)) for s, e in zip(scores, entry_points)]
+        results = [(float(s), int(e)) for s, e in zip(scores, entry_points)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+
+        while candidates:
+            neg_score, row = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_score < results[0][0]:
+                break
+
+            fresh = [int(n) for n in self._links(level, row) if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+
+            for n, score in zip(fresh, vectors[fresh] @ query):
+                score = float(score)
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, n))
+                    heapq.heappush(results, (score, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _set_links(self, vectors, level, row, candidates):
+        limit = self.max_m0 if level == 0 else self.m
+        if len(candidates) > limit:
+            candidate_scores = vectors[candidates] @ vectors[row]
+            order = np.argsort(-candidate_scores)[:limit]
+            candidates = [candidates[i] for i in order]
+        self.neighbors[level, row, :] = -1
+        self.neighbors[level, row, : len(candidates)] = candidates
+
+    def add(self, vectors, row):
+        """Insert vectors[row] into the graph"""
+        level = int(-math.log(1.0 - self._rng.random()) * self.level_mult)
+        self._grow(row + 1, level + 1)
+        query = vectors[row]
+
+        if self.entry_point < 0:
+            self.entry_point = row
+            self.max_level = level
+            return
+
+        entry = [self.entry_point]
+        for current in range(self.max_level, level, -1):
+            entry = [self._search_level(vectors, query, entry, 1, current)[0][1]]
+
+        for current in range(min(level, self.max_level), -1, -1):
+            found = self._search_level(
+                vectors, query, entry, self.ef_construction, current
+            )
+            selected = [n for _, n in found if n != row][: self.m]
+            self._set_links(vectors, current, row, selected)
+
+            for n in selected:
+                links = list(self._links(current, n))
+                if row not in links:
+                    self._set_links(vectors, current, n, links + [row])
+
+            entry = [n for _, n in found]
+
+        if level > self.max_level:
+            self.max_level = level
+            self.entry_point = row
+
+    def search(self, vectors, query, k, ef=None):
+        """Return up to max(k, ef) (score, row) pairs, best first"""
+        if self.entry_point < 0:
+            return []
+
+        ef = max(ef or 0, k)
+        entry = [self.entry_point]
+        for current in range(self.max_level, 0, -1):
+            entry = [self._search_level(vectors, query, entry, 1, current)[0][1]]
+
+        return self._search_level(vectors, query, entry, ef, 0)
@@ -0,0 +1,199 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import FitnessContent
+
+from .models import IndexJob
+from .rag import (
+    bulk_delete_embeddings,
+    content_hash,
+    new_embedding_id,
+    upsert_fitness_contents,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_upsert(content_id):
+    """Queue (re)indexing of a FitnessContent row.
+
+    Call inside the transaction that writes the row so the job commits with
+    it. A pending job for the same row absorbs the request.
+    """
+    pending = IndexJob.objects.filter(
+        content_id=content_id, status=IndexJob.Status.PENDING
+    )
+    if not pending.update(action=IndexJob.Action.UPSERT, next_attempt_at=timezone.now()):
+        IndexJob.objects.create(content_id=content_id, action=IndexJob.Action.UPSERT)
+
+
+def enqueue_upserts(content_ids):
+    """Queue indexing for many newly created rows in a single insert"""
+    IndexJob.objects.bulk_create(
+        [
+            IndexJob(content_id=content_id, action=IndexJob.Action.UPSERT)
+            for content_id in content_ids
+        ]
+    )
+
+
+def enqueue_delete(content_id, embedding_id):
+    """Queue removal of a row's vector; replaces any pending upsert for it"""
+    IndexJob.objects.filter(
+        content_id=content_id, status=IndexJob.Status.PENDING
+    ).delete()
+    if embedding_id:
+        IndexJob.objects.create(
+            content_id=content_id,
+            embedding_id=embedding_id,
+            action=IndexJob.Action.DELETE,
+        )
+
+
+def assign_embedding_ids(fitness_contents):
+    """Give rows without an embedding_id one, saved before their vector exists.
+
+    Every vector is then referenced by its row by the time it is written, so
+    a concurrent sync (llm.sync) never takes it for an orphan.
+    """
+    missing = [c for c in fitness_contents if not c.embedding_id]
+    for fitness_content in missing:
+        fitness_content.embedding_id = new_embedding_id()
+    if missing:
+        FitnessContent.objects.bulk_update(missing, ["embedding_id"])
+
+
+def record_indexed(fitness_contents, embedding_ids):
+    """Persist the embedding ids and content hashes of rows just upserted"""
+    changed = []
+    for fitness_content, embedding_id in zip(fitness_contents, embedding_ids):
+        digest = content_hash(fitness_content)
+        if (
+            fitness_content.embedding_id != embedding_id
+            or fitness_content.content_hash != digest
+        ):
+            fitness_content.embedding_id = embedding_id
+            fitness_content.content_hash = digest
+            changed.append(fitness_content)
+    if changed:
+        # bulk_update() rather than save() so updated_at is untouched
+        FitnessContent.objects.bulk_update(changed, ["embedding_id", "content_hash"])
+
+
+def _backoff(attempts):
+    base = getattr(settings, "INDEX_JOB_BACKOFF_SECONDS", 5)
+    cap = getattr(settings, "INDEX_JOB_BACKOFF_MAX_SECONDS", 15 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_jobs(batch_size, stale_after=None):
+    """Mark up to batch_size due jobs as processing and return them.
+
+    Jobs left in processing for longer than stale_after seconds (e.g. by a
+    worker that crashed) are claimed again.
+    """
+    now = timezone.now()
+    stale_after = stale_after or getattr(settings, "INDEX_JOB_STALE_SECONDS", 600)
+
+    with transaction.atomic():
+        IndexJob.objects.filter(
+            status=IndexJob.Status.PROCESSING,
+            updated_at__lt=now - timedelta(seconds=stale_after),
+        ).update(status=IndexJob.Status.PENDING)
+
+        ids = list(
+            IndexJob.objects.select_for_update(skip_locked=True)
+            .filter(status=IndexJob.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        IndexJob.objects.filter(id__in=ids).update(
+            status=IndexJob.Status.PROCESSING, updated_at=now
+        )
+
+    return list(IndexJob.objects.filter(id__in=ids).order_by("id"))
+
+
+def _fail(jobs, error):
+    max_attempts = getattr(settings, "INDEX_JOB_MAX_ATTEMPTS", 8)
+    now = timezone.now()
+    for job in jobs:
+        job.attempts += 1
+        job.last_error = str(error)
+        if job.attempts >= max_attempts:
+            job.status = IndexJob.Status.FAILED
+        else:
+            job.status = IndexJob.Status.PENDING
+            job.next_attempt_at = now + _backoff(job.attempts)
+        job.updated_at = now
+    IndexJob.objects.bulk_update(
+        jobs, ["attempts", "last_error", "status", "next_attempt_at", "updated_at"]
+    )
+
+
+def _finish(jobs):
+    IndexJob.objects.filter(
+        id__in=[job.id for job in jobs], status=IndexJob.Status.PROCESSING
+    ).update(status=IndexJob.Status.DONE, last_error="")
+
+
+def process_jobs(jobs):
+    """Apply claimed jobs to the vector store. Returns (done, failed) counts."""
+    deletes = [job for job in jobs if job.action == IndexJob.Action.DELETE]
+    upserts = {}
+    duplicates = []
+    for job in jobs:
+        if job.action != IndexJob.Action.UPSERT:
+            continue
+        if job.content_id in upserts:
+            duplicates.append(job)
+        upserts[job.content_id] = job
+
+    done, failed = 0, 0
+
+    if deletes:
+        try:
+            bulk_delete_embeddings([job.embedding_id for job in deletes])
+            _finish(deletes)
+            done += len(deletes)
+        except Exception as e:
+            logger.error(f"Error deleting embeddings: {str(e)}")
+            _fail(deletes, e)
+            failed += len(deletes)
+
+    if upserts:
+        contents = {
+            c.id: c for c in FitnessContent.objects.filter(id__in=list(upserts))
+        }
+        # Rows deleted after the job was queued have nothing left to index
+        gone = [job for cid, job in upserts.items() if cid not in contents]
+        live = [job for cid, job in upserts.items() if cid in contents]
+        _finish(gone + duplicates)
+        done += len(gone) + len(duplicates)
+
+        if live:
+            batch = [contents[job.content_id] for job in live]
+            try:
+                assign_embedding_ids(batch)
+                record_indexed(batch, upsert_fitness_contents(batch))
+                _finish(live)
+                done += len(live)
+            except Exception as e:
+                logger.error(f"Error indexing fitness content: {str(e)}")
+                _fail(live, e)
+                failed += len(live)
+
+    return done, failed
+
+
+def run_once(batch_size=None):
+    """Claim and process one batch of due jobs. Returns (done, failed) counts."""
+    batch_size = batch_size or getattr(settings, "INDEX_JOB_BATCH_SIZE", 64)
+    jobs = claim_jobs(batch_size)
+    if not jobs:
+        return 0, 0
+    return process_jobs(jobs)
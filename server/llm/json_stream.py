@@ -0,0 +1,125 @@
+import orjson
+
+
+class JSONSectionParser:
+    """Incrementally scan a streamed JSON object and emit completed members.
+
+    Text is fed in arbitrary chunks with feed(), which returns the
+    ``(path, value)`` pairs completed by that chunk. Every member of the
+    top-level object is emitted as soon as its value closes. Members listed in
+    ``split_keys`` are not emitted whole; their own members are emitted one at
+    a time instead (e.g. each day of ``detailedWeeklySchedule``). Any text
+    before the first ``{`` -- such as a sentence of preamble -- is skipped.
+    """
+
+    def __init__(self, split_keys=()):
+        self.split_keys = set(split_keys)
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._frames = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self.done = False
+
+    def _new_frame(self, kind, path):
+        return {
+            "kind": kind,
+            "path": path,
+            "key": None,
+            "expect_key": kind == "{",
+            "value_start": None,
+            "value_closed": False,
+        }
+
+    def _wants(self, path):
+        if len(path) == 1:
+            return path[0] not in self.split_keys
+        return len(path) == 2 and path[0] in self.split_keys
+
+    def _complete(self, frame, end, events):
+        start = frame["value_start"]
+        if start is None or frame["value_closed"]:
+            return
+        path = frame["path"] + [frame["key"]]
+        if frame["kind"] == "{" and self._wants(path):
+            events.append((path, orjson.loads(self._text[start:end])))
+        frame["value_closed"] = True
+
+    def _reset_member(self, frame):
+        frame["value_start"] = None
+        frame["value_closed"] = False
+        if frame["kind"] == "{":
+            frame["key"] = None
+            frame["expect_key"] = True
+
+    def _mark_value_start(self, i):
+        if not self._frames:
+            return
+        frame = self._frames[-1]
+        if frame["value_start"] is None and not frame["expect_key"]:
+            frame["value_start"] = i
+
+    def feed(self, chunk):
+        self._text += chunk
+        events = []
+        text = self._text
+
+        while self._pos < len(text) and not self.done:
+            i = self._pos
+            c = text[i]
+            self._pos += 1
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._frames.append(self._new_frame("{", []))
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    frame = self._frames[-1]
+                    if frame["kind"] == "{" and frame["expect_key"]:
+                        frame["key"] = orjson.loads(text[self._string_start : i + 1])
+                continue
+
+            if c in " \t\r\n":
+                continue
+
+            frame = self._frames[-1]
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._mark_value_start(i)
+            elif c in "{[":
+                self._mark_value_start(i)
+                path = frame["path"] + ([frame["key"]] if frame["kind"] == "{" else [])
+                self._frames.append(self._new_frame(c, path))
+            elif c == ":":
+                frame["expect_key"] = False
+            elif c == ",":
+                self._complete(frame, i, events)
+                self._reset_member(frame)
+            elif c in "}]":
+                self._complete(frame, i, events)
+                self._frames.pop()
+                if not self._frames:
+                    self.done = True
+                    break
+                parent = self._frames[-1]
+                self._complete(parent, i + 1, events)
+            else:
+                self._mark_value_start(i)
+
+        return events
+
+    @property
+    def text(self):
+        return self._text
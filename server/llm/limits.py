@@ -0,0 +1,226 @@
+"""Per-user limits for the endpoints that call Claude.
+
+Two independent checks run before every upstream call:
+
+- A token bucket per user and endpoint (LLM_RATE_LIMITS) allows a short
+  burst of requests, then a sustained rate. Buckets live in the worker
+  process, so each worker enforces the limit on its own.
+- A daily token quota per user (LLM_DAILY_TOKEN_QUOTA) is checked against
+  the TokenUsage rows that record_usage() writes from each response's
+  ``usage``.
+
+record_usage() also stores the prompt-cache read and creation tokens, which
+usage_summary() aggregates for GET /api/vector/stats/.
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+# Retry-After for a bucket that never refills (per_minute of 0): the burst is
+# all a user gets until the worker restarts, so there is no exact wait to report
+NO_REFILL_RETRY_AFTER = 24 * 60 * 60
+
+
+class RateLimited(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second, now=None):
+        if capacity < 1:
+            raise ValueError(
+                f"Token bucket capacity must be at least 1, got {capacity}"
+            )
+        if refill_per_second < 0:
+            raise ValueError(
+                "Token bucket refill rate must not be negative, "
+                f"got {refill_per_second}"
+            )
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.refill_per_second
+        )
+        self.updated = now
+
+    def take(self, now):
+        """Take one token; return 0 on success, else seconds until one is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        if not self.refill_per_second:
+            return NO_REFILL_RETRY_AFTER
+        return (1 - self.tokens) / self.refill_per_second
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """Token buckets keyed by (endpoint, user id)"""
+
+    def __init__(self, limits, max_buckets=10000):
+        # Build one bucket per endpoint up front so a bad setting fails here,
+        # not as a 500 on some user's first request
+        for limit in limits.values():
+            if limit:
+                TokenBucket(limit["burst"], limit["per_minute"] / 60)
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def _prune(self, now):
+        # Full buckets behave exactly like new ones, so they can be dropped
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+    def check(self, endpoint, user_id):
+        """Consume one request for user_id on endpoint or raise RateLimited"""
+        limit = self.limits.get(endpoint)
+        if not limit:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((endpoint, user_id))
+            if bucket is None:
+                if len(self._buckets) >= self.max_buckets:
+                    self._prune(now)
+                bucket = TokenBucket(limit["burst"], limit["per_minute"] / 60, now)
+                self._buckets[(endpoint, user_id)] = bucket
+
+            wait = bucket.take(now)
+            if wait:
+                self.limited += 1
+            else:
+                self.allowed += 1
+
+        if wait:
+            raise RateLimited(
+                "Too many requests, please try again later", math.ceil(wait)
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "allowed": self.allowed,
+                "limited": self.limited,
+            }
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(getattr(settings, "LLM_RATE_LIMITS", {}))
+    return _rate_limiter
+
+
+def tokens_used_today(user_id):
+    start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return TokenUsage.objects.filter(user_id=user_id, created_at__gte=start).aggregate(
+        total=Coalesce(Sum("input_tokens"), 0) + Coalesce(Sum("output_tokens"), 0)
+    )["total"]
+
+
+def check_token_quota(user_id):
+    """Raise RateLimited once user_id has used up today's token quota"""
+    quota = getattr(settings, "LLM_DAILY_TOKEN_QUOTA", 0)
+    if not quota or tokens_used_today(user_id) < quota:
+        return
+
+    midnight = timezone.localtime().replace(
+        hour=0, minute=0, second=0, microsecond=0
+    ) + timedelta(days=1)
+    raise RateLimited(
+        "Daily AI usage limit reached",
+        math.ceil((midnight - timezone.localtime()).total_seconds()),
+    )
+
+
+def check_limits(endpoint, user_id):
+    """Apply the rate limit and the daily token quota, raising RateLimited"""
+    get_rate_limiter().check(endpoint, user_id)
+    check_token_quota(user_id)
+
+
+def _usage_count(usage, name):
+    # Absent (or None) when the request had no cache_control breakpoint
+    return getattr(usage, name, None) or 0
+
+
+def record_usage(user_id, endpoint, model, usage):
+    """Store the ``usage`` of an Anthropic response for user_id"""
+    if usage is None:
+        return
+    try:
+        TokenUsage.objects.create(
+            user_id=user_id,
+            endpoint=endpoint,
+            model=model,
+            input_tokens=usage.input_tokens or 0,
+            output_tokens=usage.output_tokens or 0,
+            cache_creation_input_tokens=_usage_count(usage, "cache_creation_input_tokens"),
+            cache_read_input_tokens=_usage_count(usage, "cache_read_input_tokens"),
+        )
+    except Exception as e:
+        logger.error(f"Error recording token usage: {str(e)}")
+
+
+def usage_summary(hours=24):
+    """Token totals per endpoint over the last ``hours``, with the prompt cache hit rate"""
+    since = timezone.now() - timedelta(hours=hours)
+    rows = (
+        TokenUsage.objects.filter(created_at__gte=since)
+        .values("endpoint")
+        .annotate(
+            calls=Count("id"),
+            input_tokens=Sum("input_tokens"),
+            output_tokens=Sum("output_tokens"),
+            cache_creation_input_tokens=Sum("cache_creation_input_tokens"),
+            cache_read_input_tokens=Sum("cache_read_input_tokens"),
+        )
+        .order_by("endpoint")
+    )
+    summary = {}
+    for row in rows:
+        endpoint = row.pop("endpoint")
+        prompt_tokens = (
+            row["input_tokens"]
+            + row["cache_creation_input_tokens"]
+            + row["cache_read_input_tokens"]
+        )
+        row["cache_hit_rate"] = (
+            row["cache_read_input_tokens"] / prompt_tokens if prompt_tokens else 0.0
+        )
+        summary[endpoint] = row
+    return summary
@@ -0,0 +1,65 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from llm.embedding_backends import ONNX_MODEL_FILE, ONNX_QUANTIZED_MODEL_FILE
+from llm.rag import MODEL_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the embedding model to ONNX for EMBEDDING_BACKEND=onnx, along with "
+        "its tokenizer, and write an int8 dynamically quantized copy next to it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.EMBEDDING_ONNX_PATH,
+            help="Directory to export to (default: EMBEDDING_ONNX_PATH).",
+        )
+        parser.add_argument(
+            "--skip-export",
+            action="store_true",
+            help=f"Only quantize an existing {ONNX_MODEL_FILE} in --output.",
+        )
+        parser.add_argument(
+            "--no-quantize",
+            action="store_true",
+            help="Only export the fp32 model.",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        model_file = os.path.join(output, ONNX_MODEL_FILE)
+
+        if not options["skip_export"]:
+            try:
+                from optimum.exporters.onnx import main_export
+            except ImportError:
+                raise CommandError("Exporting requires the optimum package")
+
+            start = time.perf_counter()
+            self.stdout.write(f"Exporting {MODEL_NAME} to {output}...")
+            main_export(MODEL_NAME, output=output, task="feature-extraction")
+            self.stdout.write(f"Exported in {time.perf_counter() - start:.1f}s")
+        elif not os.path.exists(model_file):
+            raise CommandError(f"{model_file} not found")
+
+        if options["no_quantize"]:
+            return
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        start = time.perf_counter()
+        quantized_file = os.path.join(output, ONNX_QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_file, quantized_file, weight_type=QuantType.QInt8)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {quantized_file} "
+                f"({os.path.getsize(quantized_file) / 2**20:.0f} MiB) "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+        )
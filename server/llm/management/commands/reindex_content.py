@@ -0,0 +1,190 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api.models import FitnessContent
+from llm.indexing import assign_embedding_ids, record_indexed
+from llm.rag import upsert_fitness_contents
+
+
+def parse_since(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid --since value: {value}")
+        parsed = datetime.combine(day, dt_time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild vector embeddings for FitnessContent rows. Rows are read in pages in "
+        "id order, embedded by a worker pool and upserted in batches; progress is "
+        "checkpointed so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only-missing",
+            action="store_true",
+            help=(
+                "Only index rows that have not been indexed yet (no embedding_id "
+                "or no content_hash)."
+            ),
+        )
+        parser.add_argument(
+            "--since",
+            help="Only index rows updated at or after this date/datetime (ISO 8601).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=256,
+            help="Rows handed to a worker at a time (default: 256).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Embedding batch size (default: EMBEDDING_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Number of embedding workers (default: 2).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(settings.BASE_DIR, ".reindex_checkpoint.json"),
+            help="Checkpoint file used to resume an interrupted run.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore any existing checkpoint and start from the beginning.",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        chunk_size = options["chunk_size"]
+        workers = max(1, options["workers"])
+        checkpoint_path = options["checkpoint"]
+        run_key = {
+            "only_missing": options["only_missing"],
+            "since": options["since"],
+        }
+
+        queryset = FitnessContent.objects.order_by("id")
+        if options["only_missing"]:
+            # A run that stopped part-way can leave rows with an embedding_id
+            # but no vector; only record_indexed() sets content_hash
+            queryset = queryset.filter(
+                Q(embedding_id__isnull=True)
+                | Q(embedding_id="")
+                | Q(content_hash__isnull=True)
+            )
+        if options["since"]:
+            queryset = queryset.filter(updated_at__gte=parse_since(options["since"]))
+
+        checkpoint = None if options["restart"] else self.load_checkpoint(checkpoint_path)
+        if checkpoint and checkpoint.get("run") == run_key:
+            queryset = queryset.filter(id__gt=checkpoint["last_id"])
+            processed = checkpoint["processed"]
+            self.stdout.write(
+                f"Resuming after id {checkpoint['last_id']} ({processed} already indexed)"
+            )
+        else:
+            processed = 0
+
+        total = queryset.count()
+        self.stdout.write(f"Indexing {total} fitness content items")
+
+        start = time.perf_counter()
+        indexed = 0
+        pending = deque()
+
+        def embed(chunk):
+            return chunk, upsert_fitness_contents(
+                chunk, batch_size=options["batch_size"], num_threads=1
+            )
+
+        def finish_oldest():
+            chunk, embedding_ids = pending.popleft().result()
+            record_indexed(chunk, embedding_ids)
+            self.save_checkpoint(
+                checkpoint_path,
+                {
+                    "run": run_key,
+                    "last_id": chunk[-1].id,
+                    "processed": processed + indexed + len(chunk),
+                },
+            )
+            return len(chunk)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            last_id = 0
+            while True:
+                # Each page is read in full before its rows are written to, so
+                # no cursor is left open on the table being updated
+                chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+
+                assign_embedding_ids(chunk)
+                pending.append(executor.submit(embed, chunk))
+                # Checkpoints must advance in id order, so results are applied
+                # in submission order with at most two chunks queued per worker
+                while len(pending) >= workers * 2:
+                    indexed += finish_oldest()
+                    self.report_progress(indexed, total, start)
+
+            while pending:
+                indexed += finish_oldest()
+                self.report_progress(indexed, total, start)
+
+        elapsed = time.perf_counter() - start
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        rate = indexed / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {indexed} items in {elapsed:.1f}s ({rate:.1f} items/s)"
+            )
+        )
+
+    def report_progress(self, indexed, total, start):
+        if self.verbosity < 2:
+            return
+        elapsed = time.perf_counter() - start
+        rate = indexed / elapsed if elapsed else 0.0
+        self.stdout.write(f"  {indexed}/{total} ({rate:.1f} items/s)")
+
+    @staticmethod
+    def load_checkpoint(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def save_checkpoint(path, data):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
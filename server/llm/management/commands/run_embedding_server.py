@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from llm.embedding_backends import backend_id, load_backend
+from llm.embedding_service import UNIX_PREFIX, MicroBatcher, make_server
+from llm.rag import MODEL_NAME
+
+
+def default_bind():
+    url = getattr(settings, "EMBEDDING_SERVICE_URL", "")
+    if url.startswith(UNIX_PREFIX):
+        return url
+    if url:
+        return url.split("://", 1)[-1].rstrip("/")
+    return "127.0.0.1:8001"
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the embedding model to web and index workers that set "
+        "EMBEDDING_SERVICE_URL, batching concurrent requests into shared "
+        "encode calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=None,
+            help=(
+                "host:port or unix:///path.sock to listen on "
+                "(default: taken from EMBEDDING_SERVICE_URL)."
+            ),
+        )
+        parser.add_argument(
+            "--max-batch-size",
+            type=int,
+            default=None,
+            help="Most texts per encode call (default: EMBEDDING_SERVICE_MAX_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--max-wait-ms",
+            type=float,
+            default=None,
+            help=(
+                "How long a batch waits for more texts "
+                "(default: EMBEDDING_SERVICE_MAX_WAIT_MS)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        bind = options["bind"] or default_bind()
+        max_batch_size = options["max_batch_size"] or getattr(
+            settings, "EMBEDDING_SERVICE_MAX_BATCH_SIZE", 64
+        )
+        max_wait_ms = options["max_wait_ms"]
+        if max_wait_ms is None:
+            max_wait_ms = getattr(settings, "EMBEDDING_SERVICE_MAX_WAIT_MS", 5)
+
+        try:
+            backend = load_backend(MODEL_NAME)
+        except Exception as e:
+            raise CommandError(f"Could not load the embedding model: {str(e)}")
+
+        batcher = MicroBatcher(backend, max_batch_size, max_wait_ms / 1000)
+        server = make_server(
+            bind,
+            batcher,
+            backend_id(MODEL_NAME),
+            timeout=getattr(settings, "EMBEDDING_SERVICE_TIMEOUT", 30),
+        )
+        self.stdout.write(f"Embedding server ({backend.name}) listening on {bind}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from llm.indexing import run_once
+from llm.sync import sync_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued FitnessContent index jobs (the IndexJob outbox), "
+        "embedding and upserting them in batches and retrying failures with "
+        "exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Jobs claimed per batch (default: INDEX_JOB_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty (default: 2).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the currently due jobs and exit.",
+        )
+        parser.add_argument(
+            "--sync-interval",
+            type=float,
+            default=None,
+            help=(
+                "Seconds between delta syncs of the index with the table, the "
+                "first on startup; 0 disables (default: INDEX_SYNC_INTERVAL_SECONDS)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Index worker started")
+        sync_interval = options["sync_interval"]
+        if sync_interval is None:
+            sync_interval = getattr(settings, "INDEX_SYNC_INTERVAL_SECONDS", 0)
+        next_sync = time.monotonic() if sync_interval and not options["once"] else None
+
+        while True:
+            if next_sync is not None and time.monotonic() >= next_sync:
+                self.sync()
+                next_sync = time.monotonic() + sync_interval
+
+            done, failed = run_once(options["batch_size"])
+
+            if done or failed:
+                self.stdout.write(f"Processed {done} jobs, {failed} failed")
+                continue
+
+            if options["once"]:
+                return
+
+            time.sleep(options["poll_interval"])
+
+    def sync(self):
+        try:
+            _, result = sync_index()
+        except Exception as e:
+            self.stderr.write(f"Index sync failed: {str(e)}")
+            return
+        self.stdout.write(
+            f"Synced index: {result['upserted']} upserted, "
+            f"{result['deleted']} deleted, {result['failed']} failed"
+        )
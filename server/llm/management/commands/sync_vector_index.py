@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from llm.sync import apply_sync, plan_sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the vector index in line with the FitnessContent table: embed rows "
+        "that are new or changed since they were indexed and delete vectors no "
+        "row refers to. Up-to-date rows are not re-embedded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be upserted and deleted.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help=(
+                "Rows embedded and upserted per batch "
+                "(default: INDEX_SYNC_BATCH_SIZE)."
+            ),
+        )
+        parser.add_argument(
+            "--adopt",
+            action="store_true",
+            help=(
+                "Trust vectors of rows indexed before content hashes were stored "
+                "and only record their hash, instead of re-embedding them."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        plan = plan_sync()
+        self.stdout.write(
+            f"{len(plan['new'])} new, {len(plan['changed'])} changed, "
+            f"{len(plan['unhashed'])} unhashed, {len(plan['orphaned'])} orphaned "
+            f"(planned in {time.perf_counter() - start:.1f}s)"
+        )
+        if options["dry_run"]:
+            return
+
+        result = apply_sync(plan, options["batch_size"], adopt=options["adopt"])
+        message = (
+            f"Upserted {result['upserted']}, adopted {result['adopted']}, "
+            f"deleted {result['deleted']} in {time.perf_counter() - start:.1f}s"
+        )
+        if result["failed"]:
+            self.stdout.write(self.style.ERROR(f"{message}; {result['failed']} failed"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('llm', '0003_tokenusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tokenusage',
+            name='cache_creation_input_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tokenusage',
+            name='cache_read_input_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
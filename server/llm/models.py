@@ -1,3 +1,95 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
+class IndexJob(models.Model):
+    """Outbox entry asking the index worker to sync one FitnessContent row.
+
+    Rows are written in the same transaction as the content change and
+    processed by ``manage.py run_index_worker``. While a job is pending,
+    later edits to the same content are folded into it instead of queueing
+    another one.
+    """
+
+    class Action(models.TextChoices):
+        UPSERT = "upsert", "Upsert"
+        DELETE = "delete", "Delete"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    content_id = models.BigIntegerField(null=True, blank=True)
+    embedding_id = models.CharField(max_length=255, blank=True, null=True)
+    action = models.CharField(max_length=20, choices=Action.choices)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.action} content {self.content_id} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["content_id", "status"]),
+        ]
+
+
+class RecommendationCache(models.Model):
+    """Last generated recommendations for a user.
+
+    ``fingerprint`` hashes the normalized profile data and prompt version the
+    recommendations were generated from; a lookup only hits when it matches
+    the user's current profile and the entry has not expired.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="recommendation_cache",
+    )
+    fingerprint = models.CharField(max_length=64)
+    prompt_version = models.CharField(max_length=20)
+    recommendations = models.JSONField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Recommendations for user {self.user_id}"
+
+
+class TokenUsage(models.Model):
+    """Tokens consumed by one Claude call made on behalf of a user"""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="token_usage",
+    )
+    endpoint = models.CharField(max_length=50)
+    model = models.CharField(max_length=100)
+    input_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    # Prompt-cache tokens, billed apart from input_tokens
+    cache_creation_input_tokens = models.PositiveIntegerField(default=0)
+    cache_read_input_tokens = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return (
+            f"{self.endpoint} for user {self.user_id}: "
+            f"{self.input_tokens} in / {self.output_tokens} out"
+        )
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at"])]
@@ -0,0 +1,514 @@
+import hashlib
+import os
+import logging
+import threading
+import uuid
+
+import numpy as np
+import orjson
+from django.conf import settings
+
+from .singleflight import embedding_flights, flight_key, search_flights
+
+logger = logging.getLogger(__name__)
+
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "fitfusion-rag")
+EMBEDDING_DIMENSION = 1024
+MODEL_NAME = "BAAI/bge-m3"
+
+# The vector store backends, the Pinecone SDK and the embedding backend
+# (torch/transformers or onnxruntime) are imported inside the functions below
+# so that importing this module -- and therefore server.urls / server.wsgi --
+# stays cheap. Nothing touches the network or
+# loads the model until the first search/upsert or an explicit warm_up().
+_pinecone_client = None
+_pinecone_index = None
+_embedding_model = None
+_vector_store = None
+_embedding_cache = None
+_init_lock = threading.Lock()
+# Separate from _init_lock, so opening the store never waits for a model load
+_vector_store_lock = threading.Lock()
+
+
+def init_pinecone():
+    """Initialize the Pinecone client and index"""
+    global _pinecone_client, _pinecone_index
+
+    if not PINECONE_API_KEY:
+        raise ValueError("PINECONE_API_KEY environment variable is not set")
+
+    with _init_lock:
+        if _pinecone_index is not None:
+            return
+
+        from pinecone import Pinecone, ServerlessSpec
+
+        if _pinecone_client is None:
+            _pinecone_client = Pinecone(api_key=PINECONE_API_KEY)
+
+        try:
+            existing_indexes = _pinecone_client.list_indexes().names()
+            if PINECONE_INDEX_NAME not in existing_indexes:
+                logger.info(f"Creating Pinecone index: {PINECONE_INDEX_NAME}")
+                _pinecone_client.create_index(
+                    name=PINECONE_INDEX_NAME,
+                    dimension=EMBEDDING_DIMENSION,
+                    metric="cosine",
+                    spec=ServerlessSpec(
+                        cloud="aws",
+                        region="us-east-1",
+                    ),
+                )
+                logger.info(f"Pinecone index {PINECONE_INDEX_NAME} created")
+            else:
+                logger.info(f"Using existing Pinecone index: {PINECONE_INDEX_NAME}")
+
+            _pinecone_index = _pinecone_client.Index(PINECONE_INDEX_NAME)
+        except Exception as e:
+            logger.error(f"Error initializing Pinecone: {str(e)}")
+            raise
+
+
+def get_pinecone_index():
+    """Get the Pinecone index, initializing it on first use"""
+    if _pinecone_index is None:
+        init_pinecone()
+
+    return _pinecone_index
+
+
+def _create_vector_store():
+    backend = getattr(settings, "VECTOR_STORE_BACKEND", "pinecone")
+
+    if backend == "local":
+        from .vector_store import LocalVectorStore
+
+        store = LocalVectorStore(
+            path=settings.LOCAL_VECTOR_STORE_PATH,
+            dimension=EMBEDDING_DIMENSION,
+            hnsw_threshold=getattr(
+                settings, "LOCAL_VECTOR_STORE_HNSW_THRESHOLD", 20000
+            ),
+            dtype=getattr(settings, "LOCAL_VECTOR_STORE_DTYPE", "float32"),
+            binary_threshold=getattr(
+                settings, "LOCAL_VECTOR_STORE_BINARY_THRESHOLD", 10000
+            ),
+            rerank_factor=getattr(settings, "LOCAL_VECTOR_STORE_RERANK_FACTOR", 20),
+        )
+    elif backend == "pinecone":
+        from .vector_store import PineconeVectorStore
+
+        store = PineconeVectorStore(get_pinecone_index())
+    else:
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
+
+    logger.info(f"Using {store.name} vector store")
+    return store
+
+
+def get_vector_store():
+    """Get the configured vector store backend, creating it on first use"""
+    global _vector_store
+
+    # The warm-up thread, hybrid-search threads and requests all get here;
+    # two LocalVectorStores on one directory would each load their own copy
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = _create_vector_store()
+
+    return _vector_store
+
+
+def get_embedding_model():
+    """Get or initialize the embedding model (see llm.embedding_backends).
+
+    With EMBEDDING_SERVICE_URL set this is a client for the shared embedding
+    server (manage.py run_embedding_server) instead of a model in this process.
+    """
+    global _embedding_model
+
+    if _embedding_model is None:
+        with _init_lock:
+            if _embedding_model is None:
+                url = getattr(settings, "EMBEDDING_SERVICE_URL", "")
+                if url:
+                    from .embedding_service import EmbeddingClient
+
+                    _embedding_model = EmbeddingClient(
+                        url,
+                        timeout=getattr(settings, "EMBEDDING_SERVICE_TIMEOUT", 30),
+                        max_connections=getattr(
+                            settings, "EMBEDDING_SERVICE_MAX_CONNECTIONS", 20
+                        ),
+                        dtype=getattr(settings, "EMBEDDING_SERVICE_DTYPE", "float32"),
+                    )
+                else:
+                    from .embedding_backends import load_backend
+
+                    _embedding_model = load_backend(MODEL_NAME)
+
+    return _embedding_model
+
+
+def warm_up():
+    """Eagerly load the embedding model and connect to the vector index.
+
+    Called from LlmConfig.ready() when RAG_WARMUP_ON_STARTUP is set, so a
+    worker can pay the initialization cost before it takes traffic instead of
+    on its first search request.
+    """
+    try:
+        get_embedding_model()
+        get_vector_store()
+        logger.info("RAG warm-up complete")
+    except Exception as e:
+        logger.error(f"RAG warm-up failed: {str(e)}")
+
+
+def start_background_warm_up():
+    """Run warm_up() in a daemon thread so startup is not blocked"""
+    if not getattr(settings, "RAG_WARMUP_ON_STARTUP", False):
+        return None
+
+    thread = threading.Thread(target=warm_up, name="rag-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_embedding(text):
+    """Get embedding for text using the model, as a float32 array"""
+    if not text:
+        raise ValueError("Text cannot be empty")
+
+    model = get_embedding_model()
+    return np.asarray(model.encode(text), dtype=np.float32)
+
+
+def get_embedding_cache():
+    """Get the query embedding cache, configured from settings"""
+    global _embedding_cache
+
+    if _embedding_cache is None:
+        from django.core.cache import caches
+
+        from .embedding_backends import backend_id
+        from .embedding_cache import EmbeddingCache
+
+        alias = getattr(settings, "EMBEDDING_CACHE_ALIAS", None)
+        # Backends differ slightly in their vectors, so each gets its own keys
+        _embedding_cache = EmbeddingCache(
+            model_name=backend_id(MODEL_NAME),
+            max_entries=getattr(settings, "EMBEDDING_CACHE_MAX_ENTRIES", 2048),
+            max_bytes=getattr(settings, "EMBEDDING_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+            shared_cache=caches[alias] if alias else None,
+        )
+
+    return _embedding_cache
+
+
+def get_query_embedding(text):
+    """Get embedding for a search query, going through the embedding cache.
+
+    The float32 array returned is shared with the cache and read-only.
+    """
+    if not text:
+        raise ValueError("Text cannot be empty")
+
+    cache = get_embedding_cache()
+    vector = cache.get(text)
+    if vector is None:
+        vector = embedding_flights.do(cache.key(text), lambda: _encode_query(cache, text))
+
+    return vector
+
+
+def _encode_query(cache, text):
+    # Another caller may have stored it while this one waited to lead
+    vector = cache.get(text)
+    if vector is None:
+        vector = get_embedding_model().encode(text)
+        cache.set(text, vector)
+    return vector
+
+
+def build_embedding_text(fitness_content):
+    """Build the text that represents a FitnessContent item in the index"""
+    text_to_embed = f"Title: {fitness_content.title}\nDescription: {fitness_content.description or ''}\n"
+    text_to_embed += f"Type: {fitness_content.content_type}\n"
+
+    if (
+        hasattr(fitness_content, "equipment_required")
+        and fitness_content.equipment_required
+    ):
+        text_to_embed += f"Equipment: {fitness_content.equipment_required}\n"
+
+    if hasattr(fitness_content, "target_muscles") and fitness_content.target_muscles:
+        text_to_embed += f"Target Muscles: {fitness_content.target_muscles}\n"
+
+    return text_to_embed
+
+
+def content_tags(value):
+    """Split a comma-separated equipment/muscle field into normalized tags.
+
+    Lists (e.g. filter values from a request) are normalized element-wise.
+    """
+    if not value:
+        return []
+    parts = value if isinstance(value, (list, tuple)) else value.split(",")
+    tags = (" ".join(str(part).split()).casefold() for part in parts)
+    return sorted({tag for tag in tags if tag})
+
+
+def build_filter(
+    content_type=None,
+    difficulty_level=None,
+    equipment=None,
+    target_muscle=None,
+    filter_dict=None,
+):
+    """Combine the search arguments into one metadata filter (or None)"""
+    conditions = dict(filter_dict or {})
+    if content_type:
+        conditions["content_type"] = content_type
+    if difficulty_level is not None:
+        conditions["difficulty_level"] = difficulty_level
+    # Tag fields hold lists; $in matches items carrying any of the tags
+    if content_tags(equipment):
+        conditions["equipment_tags"] = {"$in": content_tags(equipment)}
+    if content_tags(target_muscle):
+        conditions["muscle_tags"] = {"$in": content_tags(target_muscle)}
+    return conditions or None
+
+
+def build_metadata(fitness_content):
+    """Build the metadata stored alongside a FitnessContent vector"""
+    return {
+        "title": fitness_content.title,
+        "description": fitness_content.description or "",
+        "content_type": fitness_content.content_type,
+        "difficulty_level": getattr(fitness_content, "difficulty_level", 2),
+        "url": getattr(fitness_content, "url", "") or "",
+        "youtube_url": getattr(fitness_content, "youtube_url", "") or "",
+        "equipment_required": getattr(fitness_content, "equipment_required", "") or "",
+        "duration_minutes": getattr(fitness_content, "duration_minutes", 0) or 0,
+        "calories_burned": getattr(fitness_content, "calories_burned", 0) or 0,
+        "target_muscles": getattr(fitness_content, "target_muscles", "") or "",
+        "equipment_tags": content_tags(
+            getattr(fitness_content, "equipment_required", "")
+        ),
+        "muscle_tags": content_tags(getattr(fitness_content, "target_muscles", "")),
+    }
+
+
+def content_hash(fitness_content):
+    """Fingerprint everything the index stores for a FitnessContent item.
+
+    Compared with FitnessContent.content_hash to find rows whose vector or
+    metadata is out of date, including after the embedding text, metadata
+    layout, model or embedding backend (EMBEDDING_BACKEND and its variant)
+    changes.
+    """
+    from .embedding_backends import backend_id
+
+    payload = orjson.dumps(
+        [
+            backend_id(MODEL_NAME),
+            build_embedding_text(fitness_content),
+            build_metadata(fitness_content),
+        ],
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+
+def get_embeddings(texts, batch_size=None):
+    """Embed many texts into a float32 array with one row per text, in order.
+
+    Texts are tokenized once to measure their length and encoded in batches of
+    similar length, so each batch is padded only to its own longest member
+    instead of the longest text overall.
+    """
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIMENSION), dtype=np.float32)
+    if not all(texts):
+        raise ValueError("Text cannot be empty")
+
+    batch_size = batch_size or getattr(settings, "EMBEDDING_BATCH_SIZE", 32)
+    model = get_embedding_model()
+
+    lengths = model.token_lengths(texts)
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+    embeddings = None
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        vectors = model.encode(
+            [texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        embeddings[batch] = vectors
+
+    return embeddings
+
+
+def new_embedding_id():
+    return f"fitness-{uuid.uuid4()}"
+
+
+def upsert_fitness_contents(
+    fitness_contents, batch_size=None, upsert_batch_size=None, num_threads=None
+):
+    """Embed and upsert many FitnessContent items.
+
+    Embeddings are computed in length-sorted batches of ``batch_size`` and
+    written to the vector store in chunks of ``upsert_batch_size`` spread over
+    ``num_threads`` threads. Returns the embedding ids in input order; items
+    without an embedding_id get a new one, which the caller should persist.
+    """
+    fitness_contents = list(fitness_contents)
+    if not fitness_contents:
+        return []
+
+    for fitness_content in fitness_contents:
+        if (
+            not fitness_content
+            or not hasattr(fitness_content, "title")
+            or not fitness_content.title
+        ):
+            raise ValueError("Invalid fitness content")
+
+    upsert_batch_size = upsert_batch_size or getattr(
+        settings, "VECTOR_UPSERT_BATCH_SIZE", 100
+    )
+    num_threads = num_threads or getattr(settings, "VECTOR_UPSERT_THREADS", 4)
+
+    store = get_vector_store()
+
+    embedding_ids = [
+        fitness_content.embedding_id or new_embedding_id()
+        for fitness_content in fitness_contents
+    ]
+    embeddings = get_embeddings(
+        [build_embedding_text(c) for c in fitness_contents], batch_size=batch_size
+    )
+    vectors = [
+        (embedding_id, embedding, build_metadata(fitness_content))
+        for embedding_id, embedding, fitness_content in zip(
+            embedding_ids, embeddings, fitness_contents
+        )
+    ]
+    chunks = [
+        vectors[i : i + upsert_batch_size]
+        for i in range(0, len(vectors), upsert_batch_size)
+    ]
+
+    try:
+        if len(chunks) == 1 or num_threads <= 1:
+            for chunk in chunks:
+                store.upsert(chunk)
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                list(executor.map(store.upsert, chunks))
+    except Exception as e:
+        logger.error(f"Error upserting to {store.name}: {str(e)}")
+        raise
+
+    logger.info(f"Upserted {len(vectors)} content items to {store.name}")
+    return embedding_ids
+
+
+def upsert_fitness_content(fitness_content):
+    """Upsert fitness content embedding to the vector store"""
+    return upsert_fitness_contents([fitness_content])[0]
+
+
+def search_fitness_content(
+    query_text,
+    content_type=None,
+    difficulty_level=None,
+    filter_dict=None,
+    top_k=5,
+    equipment=None,
+    target_muscle=None,
+):
+    """Search fitness content in the vector store.
+
+    equipment and target_muscle take a tag or a list of tags (see
+    content_tags) and keep items carrying any of them. filter_dict is a
+    metadata filter in the Pinecone syntax; it is not modified.
+
+    Identical concurrent searches (same normalized query, filters and top_k)
+    are run once and share the result, see llm.singleflight.
+    """
+    if not query_text:
+        raise ValueError("Query text cannot be empty")
+
+    from .embedding_cache import normalize_text
+
+    filter_conditions = build_filter(
+        content_type, difficulty_level, equipment, target_muscle, filter_dict
+    )
+    key = flight_key(
+        normalize_text(query_text),
+        filter_conditions or {},
+        top_k,
+        getattr(settings, "VECTOR_STORE_BACKEND", "pinecone"),
+    )
+    return search_flights.do(
+        key, lambda: _search_fitness_content(query_text, filter_conditions, top_k)
+    )
+
+
+def _search_fitness_content(query_text, filter_conditions, top_k):
+    store = get_vector_store()
+
+    query_embedding = get_query_embedding(query_text)
+
+    try:
+        formatted_results = store.query(
+            query_embedding, top_k=min(top_k, 100), filter=filter_conditions
+        )
+
+        logger.info(f"Search '{query_text}' returned {len(formatted_results)} results")
+        return formatted_results
+    except Exception as e:
+        logger.error(f"Error searching {store.name}: {str(e)}")
+        raise
+
+
+def delete_embedding(embedding_id):
+    if not embedding_id:
+        raise ValueError("Embedding ID cannot be empty")
+
+    store = get_vector_store()
+
+    try:
+        store.delete([embedding_id])
+        logger.info(f"Deleted embedding from {store.name} (ID: {embedding_id})")
+    except Exception as e:
+        logger.error(f"Error deleting from {store.name}: {str(e)}")
+        raise
+
+
+def bulk_delete_embeddings(embedding_ids):
+    if not embedding_ids:
+        return
+
+    store = get_vector_store()
+
+    batch_size = 100
+    for i in range(0, len(embedding_ids), batch_size):
+        batch = embedding_ids[i : i + batch_size]
+        try:
+            store.delete(batch)
+            logger.info(f"Deleted batch of {len(batch)} embeddings from {store.name}")
+        except Exception as e:
+            logger.error(f"Error deleting batch from {store.name}: {str(e)}")
+            raise
@@ -0,0 +1,618 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+import orjson
+from django.conf import settings
+from django.utils import timezone
+
+from api.context import UserContext
+
+from .clients import get_async_client
+from .models import RecommendationCache
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompts below change so cached results are regenerated
+PROMPT_VERSION = "2"
+
+RECOMMENDATION_MODEL = "claude-3-7-sonnet-20250219"
+
+
+class RecommendationError(Exception):
+    pass
+
+
+def build_user_profile(user):
+    """Collect the user's profile data used to personalize recommendations"""
+    context = UserContext.for_user(user)
+    age = user.age or "unspecified"
+    occupation = user.occupation or "unspecified"
+    about_me = user.about_me or ""
+
+    physical_profile = context.physical_profile
+    height_cm = (
+        getattr(physical_profile, "height", "unspecified")
+        if physical_profile
+        else "unspecified"
+    )
+    weight_kg = (
+        getattr(physical_profile, "weight", "unspecified")
+        if physical_profile
+        else "unspecified"
+    )
+    gender = (
+        getattr(physical_profile, "gender", "unspecified")
+        if physical_profile
+        else "unspecified"
+    )
+    body_fat = (
+        getattr(physical_profile, "body_fat", "unspecified")
+        if physical_profile
+        else "unspecified"
+    )
+    body_mass = (
+        getattr(physical_profile, "body_mass", "unspecified")
+        if physical_profile
+        else "unspecified"
+    )
+    health_condition = (
+        getattr(physical_profile, "health_condition", "none")
+        if physical_profile
+        else "none"
+    )
+
+    fitness_profile = context.fitness_profile
+    fitness_level_obj = (
+        getattr(fitness_profile, "fitness_level", 2) if fitness_profile else 2
+    )
+    fitness_level_map = {
+        1: "beginner",
+        2: "intermediate",
+        3: "advanced",
+        4: "expert",
+        5: "professional",
+    }
+    fitness_level = fitness_level_map.get(fitness_level_obj, "intermediate")
+    workout_frequency = (
+        getattr(fitness_profile, "workout_frequency", 3) if fitness_profile else 3
+    )
+    workout_duration = (
+        getattr(fitness_profile, "workout_duration", 30) if fitness_profile else 30
+    )
+    workout_intensity = (
+        getattr(fitness_profile, "workout_intensity", 5) if fitness_profile else 5
+    )
+    workout_type = (
+        getattr(fitness_profile, "workout_type", "general exercise")
+        if fitness_profile
+        else "general exercise"
+    )
+    workout_equipment = (
+        getattr(fitness_profile, "workout_equipment", "") if fitness_profile else ""
+    )
+    workout_style = (
+        getattr(fitness_profile, "workout_style", "") if fitness_profile else ""
+    )
+    workout_goal = (
+        getattr(fitness_profile, "workout_goal", "general fitness")
+        if fitness_profile
+        else "general fitness"
+    )
+    health_goal = (
+        getattr(fitness_profile, "health_goal", "general health")
+        if fitness_profile
+        else "general health"
+    )
+
+    dietary_profile = context.dietary_profile
+    diet_preference = (
+        getattr(dietary_profile, "diet_preference", "balanced nutrition")
+        if dietary_profile
+        else "balanced nutrition"
+    )
+    diet_allergies = (
+        getattr(dietary_profile, "diet_allergies", "none")
+        if dietary_profile
+        else "none"
+    )
+    diet_restrictions = (
+        getattr(dietary_profile, "diet_restrictions", "none")
+        if dietary_profile
+        else "none"
+    )
+    diet_preferences = (
+        getattr(dietary_profile, "diet_preferences", "none")
+        if dietary_profile
+        else "none"
+    )
+    diet_goal = (
+        getattr(dietary_profile, "diet_goal", "balanced nutrition")
+        if dietary_profile
+        else "balanced nutrition"
+    )
+
+    user_profile = {
+        "personalInfo": {
+            "age": age,
+            "occupation": occupation,
+            "gender": gender,
+            "aboutMe": about_me,
+        },
+        "physicalAttributes": {
+            "height": height_cm,
+            "weight": weight_kg,
+            "bodyFatPercentage": body_fat,
+            "bodyMass": body_mass,
+        },
+        "fitnessProfile": {
+            "fitnessLevel": fitness_level,
+            "workoutFrequency": workout_frequency,
+            "workoutDuration": workout_duration,
+            "workoutIntensity": workout_intensity,
+            "workoutType": workout_type,
+            "workoutEquipment": workout_equipment,
+            "workoutStyle": workout_style,
+            "workoutGoal": workout_goal,
+            "healthGoal": health_goal,
+        },
+        "nutrition": {
+            "dietPreference": diet_preference,
+            "dietAllergies": diet_allergies,
+            "dietRestrictions": diet_restrictions,
+            "dietPreferences": diet_preferences,
+            "dietGoal": diet_goal,
+        },
+        "additionalInfo": {"healthCondition": health_condition},
+    }
+
+    return user_profile
+
+
+# The prompt is split so that everything before the user's profile is the
+# same for every request: SYSTEM_PROMPT and RESPONSE_FORMAT_PROMPT never
+# interpolate user values, and a cache_control breakpoint after them lets
+# Anthropic reuse that prefix across users (see _message_params). Only the
+# profile suffix from build_profile_prompt() is processed per request.
+
+SYSTEM_PROMPT = """You are a fitness expert assistant creating HIGHLY PERSONALIZED recommendations that are SPECIFICALLY TAILORED to ONE INDIVIDUAL USER ONLY.
+
+The user's profile is given as JSON at the end of their message. Wherever these instructions refer to "their" weight, goal, equipment and so on, use the EXACT value from that profile.
+
+YOUR TOP PRIORITY is to create recommendations that are COMPLETELY UNIQUE to this specific user with ZERO generic advice:
+- EVERY recommendation MUST directly incorporate MULTIPLE specific data points from this user's profile
+- NEVER provide generic fitness advice that could apply to anyone
+- ALWAYS reference their exact metrics in your recommendations
+
+You MUST incorporate these EXACT user-specific values throughout ALL recommendations:
+- Their exact weight (physicalAttributes.weight, kg) - use this specific number, not a range or approximation
+- Their specific body fat percentage (physicalAttributes.bodyFatPercentage) - reference this exact percentage
+- Their body mass (physicalAttributes.bodyMass, kg) - use this specific measurement
+- Their gender (personalInfo.gender) - tailor exercises appropriately for their gender
+- Their exact age (personalInfo.age) - adjust recommendations for their specific age group
+- Their specific health condition (additionalInfo.healthCondition) - modify exercises to accommodate this condition
+
+Their precise fitness goals and preferences:
+- Workout goal (fitnessProfile.workoutGoal) - structure ALL recommendations to achieve THIS specific goal
+- Health goal (fitnessProfile.healthGoal) - ensure recommendations support THIS specific health outcome
+- Workout type preference (fitnessProfile.workoutType) - prioritize these types of exercises
+- Workout equipment (fitnessProfile.workoutEquipment) - ONLY suggest exercises using this equipment
+- Workout style (fitnessProfile.workoutStyle) - match the workout structure to this preference
+- Workout frequency (fitnessProfile.workoutFrequency, days/week) - design schedule for exactly this frequency
+- Workout duration (fitnessProfile.workoutDuration, minutes) - keep sessions within this timeframe
+- Intensity preference (fitnessProfile.workoutIntensity, out of 10) - match intensity to this exact level
+
+Their specific dietary needs:
+- Diet preference (nutrition.dietPreference) - all nutrition advice must respect this preference
+- Diet allergies (nutrition.dietAllergies) - never recommend foods that conflict with these
+- Diet restrictions (nutrition.dietRestrictions) - all recommendations must accommodate these
+- Diet preferences (nutrition.dietPreferences) - prioritize these food preferences
+- Diet goal (nutrition.dietGoal) - align all nutrition advice with this specific goal
+
+CRITICAL FORMATTING REQUIREMENT:
+- The "frequency" and "duration" fields MUST be EXTREMELY SHORT (max 15 characters)
+- Use abbreviated formats like "3x/week" instead of "3 times per week"
+- Use "45-60 min" instead of "45-60 minutes"
+- Put detailed explanations in the description field instead
+
+YOUR DETAILED WEEKLY SCHEDULE MUST BE HYPER-PERSONALIZED:
+- Create a realistic 7-day schedule SPECIFICALLY designed for this person's unique profile
+- Adapt the exercise focus days based on THEIR preferred workout type
+- Include exact exercise names that are appropriate for THEIR fitness level
+- Provide specific sets, reps, and intensity guidance tailored to THEIR capabilities
+- Include ONLY exercises possible with THEIR available equipment
+- Ensure exercises align with THEIR specific workout goal
+- Include appropriate rest days based on THEIR specific health condition
+- Set intensity levels appropriate for THEIR intensity preference
+- Duration of workouts should align with THEIR preferred workout duration
+- Consider THEIR age when selecting exercise difficulty and recovery needs
+- Account for THEIR weight and body fat when choosing exercises
+
+NEVER use placeholders, generic terms, or one-size-fits-all advice.
+EVERY single recommendation must be crafted EXCLUSIVELY for this specific individual.
+IMPORTANT:Your response must be ONLY valid JSON that follows the requested structure.
+"""
+
+RESPONSE_FORMAT_PROMPT = """Create highly personalized fitness recommendations that demonstrate you have considered the SPECIFIC user's unique data given in the profile at the end of this message.
+
+DO NOT use generic phrases like "based on your profile" or "according to your data."
+INSTEAD, directly insert the actual values, like "With your weight of 82kg and body fat of 18%..."
+
+You MUST mention at least 3-4 specific profile values in EACH recommendation category.
+
+IMPORTANT FORMATTING REQUIREMENTS:
+- "frequency" and "duration" fields MUST be EXTREMELY short (max 15 characters)
+- Example frequency: "3x/week" (not "3 times per week")
+- Example duration: "45-60 min" (not "45-60 minutes")
+- Keep these values brief and compact
+- Move detailed explanations to the "description" field instead
+
+Return your recommendations as a valid JSON object following this structure, where each value describes what to write:
+{
+  "workoutRecommendations": [
+    {
+      "category": "Strength Training",
+      "frequency": "KEEP VERY SHORT (e.g., their workout frequency as '4x/week')",
+      "duration": "KEEP VERY SHORT (e.g., their workout duration as '45 min')",
+      "description": "Explicitly mention their weight in kg and their workout goal",
+      "focus": "Focus areas that directly reference their preferred workout type"
+    },
+    {
+      "category": "Cardio",
+      "frequency": "KEEP VERY SHORT (e.g., '2-3x/week')",
+      "duration": "KEEP VERY SHORT (e.g., '20-30 min')",
+      "description": "Cardio recommendation that mentions their specific age, gender, and body fat percentage",
+      "intensity": "Intensity level appropriate for their fitness level and intensity preference out of 10"
+    },
+    {
+      "category": "Recovery",
+      "frequency": "KEEP VERY SHORT (e.g., 'Daily')",
+      "duration": "KEEP VERY SHORT (e.g., '10-15 min')",
+      "description": "Recovery approach that mentions their specific health goal and health condition"
+    }
+  ],
+  "nutritionRecommendations": [
+    {
+      "category": "Protein Intake",
+      "recommendation": "Specific protein recommendation that mentions their weight in kg and body fat percentage, considering their diet preference",
+      "reasoning": "Reasoning that ties to their specific workout goal"
+    },
+    {
+      "category": "Meal Timing",
+      "recommendation": "Meal timing advice that references their days/week workout schedule and session length in minutes",
+      "reasoning": "Explain why this timing works for someone with their specific fitness level and diet goal"
+    },
+    {
+      "category": "Hydration",
+      "recommendation": "Specific hydration advice for someone of their weight in kg and body fat percentage",
+      "reasoning": "Connect hydration to their specific health goal"
+    }
+  ],
+  "lifestyleRecommendations": [
+    {
+      "category": "Sleep",
+      "recommendation": "Sleep recommendation that mentions their age and occupation",
+      "reasoning": "Connect sleep to their specific workout goal"
+    },
+    {
+      "category": "Stress Management",
+      "recommendation": "Stress management advice that references their occupation and their health condition",
+      "reasoning": "Explain how stress management helps with their specific health goal"
+    }
+  ],
+  "detailedWeeklySchedule": {
+    "monday": {
+      "focus": "FOCUS AREA (e.g., 'Chest & Triceps')",
+      "description": "Short description referencing their weight in kg and workout goal",
+      "exercises": [
+        {
+          "name": "Specific exercise name",
+          "sets": "3-4",
+          "reps": "8-12",
+          "intensity": "Moderate",
+          "notes": "Brief note mentioning their fitness level"
+        },
+        {
+          "name": "Another specific exercise",
+          "sets": "2-3",
+          "reps": "10-15",
+          "intensity": "Light-Moderate",
+          "notes": "Note referencing their equipment"
+        },
+        {
+          "name": "Third specific exercise",
+          "sets": "3",
+          "reps": "Until failure",
+          "intensity": "High",
+          "notes": "Note mentioning their intensity preference out of 10"
+        }
+      ],
+      "cardio": {
+        "type": "Specific cardio activity",
+        "duration": "KEEP VERY SHORT (e.g., '15-20 min')",
+        "intensity": "Moderate",
+        "notes": "Brief cardio note referencing their age"
+      }
+    },
+    "tuesday": {
+      "focus": "FOCUS AREA (e.g., 'Recovery or Light Activity')",
+      "description": "Recovery day description mentioning their health condition",
+      "exercises": [
+        {
+          "name": "Gentle recovery exercise",
+          "sets": "1-2",
+          "reps": "10-15",
+          "intensity": "Light",
+          "notes": "Brief note about recovery importance for their specific stats"
+        },
+        {
+          "name": "Mobility work",
+          "sets": "2",
+          "reps": "10 per side",
+          "intensity": "Very Light",
+          "notes": "Note about flexibility for someone of their age"
+        }
+      ],
+      "cardio": {
+        "type": "Light recovery cardio",
+        "duration": "KEEP VERY SHORT (e.g., '10-15 min')",
+        "intensity": "Light",
+        "notes": "Brief note about active recovery for their fitness level"
+      }
+    },
+    "wednesday": {
+      "focus": "FOCUS AREA (e.g., 'Back & Biceps')",
+      "description": "Back workout description referencing their workout goal",
+      "exercises": [
+        {
+          "name": "Specific back exercise",
+          "sets": "3-4",
+          "reps": "8-12",
+          "intensity": "Moderate-High",
+          "notes": "Brief note referencing their weight in kg"
+        },
+        {
+          "name": "Another back exercise",
+          "sets": "3",
+          "reps": "10-12",
+          "intensity": "Moderate",
+          "notes": "Note referencing their fitness level"
+        },
+        {
+          "name": "Bicep exercise",
+          "sets": "3",
+          "reps": "12-15",
+          "intensity": "Moderate",
+          "notes": "Note mentioning their workout style"
+        }
+      ],
+      "cardio": {
+        "type": "Specific cardio activity",
+        "duration": "KEEP VERY SHORT (e.g., '20 min')",
+        "intensity": "Moderate",
+        "notes": "Brief cardio note referencing their body fat percentage"
+      }
+    },
+    "thursday": {
+      "focus": "FOCUS AREA (e.g., 'Recovery or Flexibility')",
+      "description": "Recovery description mentioning their health goal",
+      "exercises": [
+        {
+          "name": "Stretching routine",
+          "sets": "1",
+          "reps": "Hold 30s each",
+          "intensity": "Light",
+          "notes": "Brief note about flexibility benefits for their body type"
+        },
+        {
+          "name": "Mobility exercise",
+          "sets": "2",
+          "reps": "10 per side",
+          "intensity": "Light",
+          "notes": "Note about joint health for their age"
+        }
+      ],
+      "cardio": {
+        "type": "Very light cardio",
+        "duration": "KEEP VERY SHORT (e.g., '10 min')",
+        "intensity": "Very Light",
+        "notes": "Brief note about active recovery importance"
+      }
+    },
+    "friday": {
+      "focus": "FOCUS AREA (e.g., 'Legs & Shoulders')",
+      "description": "Leg day description mentioning their weight and body mass in kg",
+      "exercises": [
+        {
+          "name": "Compound leg exercise",
+          "sets": "4",
+          "reps": "8-10",
+          "intensity": "High",
+          "notes": "Brief note referencing their weight and fitness level"
+        },
+        {
+          "name": "Isolation leg exercise",
+          "sets": "3",
+          "reps": "12-15",
+          "intensity": "Moderate",
+          "notes": "Note about leg development for their goals"
+        },
+        {
+          "name": "Shoulder exercise",
+          "sets": "3",
+          "reps": "10-12",
+          "intensity": "Moderate",
+          "notes": "Note mentioning their workout equipment"
+        }
+      ],
+      "cardio": {
+        "type": "Brief cardio finisher",
+        "duration": "KEEP VERY SHORT (e.g., '10 min')",
+        "intensity": "High",
+        "notes": "Brief note about HIIT benefits for their body fat percentage"
+      }
+    },
+    "saturday": {
+      "focus": "FOCUS AREA (e.g., 'Full Body or Weak Points')",
+      "description": "Full body session mentioning their days/week routine and session length in minutes",
+      "exercises": [
+        {
+          "name": "Full body exercise 1",
+          "sets": "3",
+          "reps": "10-12",
+          "intensity": "Moderate-High",
+          "notes": "Brief note about compound movements for their goals"
+        },
+        {
+          "name": "Targeted weakness exercise",
+          "sets": "3",
+          "reps": "12-15",
+          "intensity": "Moderate",
+          "notes": "Note about addressing specific needs based on their profile"
+        },
+        {
+          "name": "Core-focused exercise",
+          "sets": "3",
+          "reps": "15-20",
+          "intensity": "Moderate",
+          "notes": "Note about core strength for their body fat percentage"
+        }
+      ],
+      "cardio": {
+        "type": "Enjoyable cardio activity",
+        "duration": "KEEP VERY SHORT (e.g., '20-30 min')",
+        "intensity": "Moderate",
+        "notes": "Brief note about cardiovascular health for their age"
+      }
+    },
+    "sunday": {
+      "focus": "Rest & Recovery",
+      "description": "Complete rest day approach for someone with their fitness level and health condition",
+      "exercises": [
+        {
+          "name": "Light walking",
+          "sets": "1",
+          "reps": "N/A",
+          "intensity": "Very Light",
+          "notes": "Brief note about importance of complete recovery"
+        },
+        {
+          "name": "Gentle stretching",
+          "sets": "1",
+          "reps": "Hold 30s each",
+          "intensity": "Very Light",
+          "notes": "Note about preparing body for next week's training"
+        }
+      ],
+      "cardio": {
+        "type": "None required",
+        "duration": "0 min",
+        "intensity": "Rest",
+        "notes": "Brief note about recovery being essential to progress"
+      }
+    }
+  }
+}"""
+
+
+def build_profile_prompt(user_profile):
+    """The per-user end of the prompt: the profile the static prompts refer to"""
+    return f"""Here is the specific user profile:
+{json.dumps(user_profile, indent=2)}
+
+Use these EXACT values throughout your recommendations."""
+
+
+def parse_recommendations(response_text):
+    """Extract the JSON object from the model's response text"""
+    json_start = response_text.find("{")
+    json_end = response_text.rfind("}") + 1
+
+    if json_start >= 0 and json_end > json_start:
+        json_str = response_text[json_start:json_end]
+        try:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
+            logger.error(f"Failed to parse AI response as JSON: {response_text}")
+            raise RecommendationError("Failed to parse AI recommendations")
+    else:
+        logger.error(f"No JSON found in AI response: {response_text}")
+        raise RecommendationError("Invalid AI response format")
+
+
+def _message_params(user_profile):
+    # One breakpoint after the static blocks caches system + format prompt
+    # together; the profile block after it is the only uncached input
+    return {
+        "model": RECOMMENDATION_MODEL,
+        "max_tokens": 10000,
+        "temperature": 0.7,
+        "system": [{"type": "text", "text": SYSTEM_PROMPT}],
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": RESPONSE_FORMAT_PROMPT,
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {"type": "text", "text": build_profile_prompt(user_profile)},
+                ],
+            }
+        ],
+    }
+
+
+async def agenerate_recommendations(user_profile, on_usage=None):
+    """Ask Claude for recommendations for user_profile and return the parsed JSON.
+
+    on_usage, if given, is awaited with the response's ``usage``.
+    """
+    message = await get_async_client().messages.create(**_message_params(user_profile))
+    if on_usage:
+        await on_usage(message.usage)
+    return parse_recommendations(message.content[0].text)
+
+
+async def astream_recommendation_text(user_profile, on_usage=None):
+    """Stream Claude's raw response text for user_profile as it is generated"""
+    params = _message_params(user_profile)
+    async with get_async_client().messages.stream(**params) as stream:
+        async for text in stream.text_stream:
+            yield text
+        if on_usage:
+            await on_usage((await stream.get_final_message()).usage)
+
+
+def profile_fingerprint(user_profile):
+    """Hash of the normalized profile plus the prompt version"""
+    normalized = json.dumps(
+        user_profile, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(f"{PROMPT_VERSION}:{normalized}".encode()).hexdigest()
+
+
+def get_cached_recommendations(user, fingerprint):
+    entry = RecommendationCache.objects.filter(
+        user=user, fingerprint=fingerprint, expires_at__gt=timezone.now()
+    ).first()
+    return entry.recommendations if entry else None
+
+
+def store_recommendations(user, fingerprint, recommendations):
+    ttl = getattr(settings, "RECOMMENDATION_CACHE_TTL", 24 * 60 * 60)
+    RecommendationCache.objects.update_or_create(
+        user=user,
+        defaults={
+            "fingerprint": fingerprint,
+            "prompt_version": PROMPT_VERSION,
+            "recommendations": recommendations,
+            "expires_at": timezone.now() + timedelta(seconds=ttl),
+        },
+    )
+
+
+def invalidate_recommendations(user_id):
+    RecommendationCache.objects.filter(user_id=user_id).delete()
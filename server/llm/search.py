@@ -0,0 +1,151 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from api import fulltext
+from api.models import FitnessContent
+
+from .rag import build_metadata, content_tags, search_fitness_content
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "HYBRID_SEARCH_THREADS", 8),
+                    thread_name_prefix="hybrid-search",
+                )
+
+    return _executor
+
+
+def attach_content_ids(matches):
+    """Resolve each vector match's FitnessContent id from its embedding id.
+
+    Matches whose row no longer exists (deleted but not yet removed from the
+    index) are dropped.
+    """
+    ids = dict(
+        FitnessContent.objects.filter(
+            embedding_id__in=[match["id"] for match in matches]
+        ).values_list("embedding_id", "id")
+    )
+    return [
+        {**match, "content_id": ids[match["id"]]} for match in matches if match["id"] in ids
+    ]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked lists of ids into [(id, score)], best first.
+
+    Each id scores sum(1 / (k + rank)) over the lists it appears in, so
+    agreement between retrievers outweighs a high rank in just one of them.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(
+    query_text,
+    content_type=None,
+    difficulty_level=None,
+    top_k=10,
+    equipment=None,
+    target_muscle=None,
+):
+    """Search FitnessContent with full-text and the vector index, fused with RRF.
+
+    The lexical leg is the database full-text index (api.fulltext) ranking
+    rows that match any query word. Both retrievals apply the
+    content_type/difficulty_level and equipment/target_muscle tag filters
+    before ranking and run concurrently: the vector search (embedding plus
+    store query) in a worker thread, the full-text query in the calling
+    thread. If the vector store fails, lexical results are still returned;
+    on databases without full-text support only vector results are.
+
+    Results use the vector search format plus ``content_id`` and
+    ``sources`` (the retrievers that found the item).
+    """
+    if not query_text:
+        raise ValueError("Query text cannot be empty")
+
+    candidates = max(top_k, getattr(settings, "HYBRID_CANDIDATES", 50))
+    vector_future = _get_executor().submit(
+        search_fitness_content,
+        query_text=query_text,
+        content_type=content_type,
+        difficulty_level=difficulty_level,
+        top_k=candidates,
+        equipment=equipment,
+        target_muscle=target_muscle,
+    )
+
+    lexical_ids = []
+    if fulltext.is_supported():
+        lexical_ids = [
+            hit["id"]
+            for hit in fulltext.search(
+                query_text,
+                content_type=content_type,
+                difficulty_level=difficulty_level,
+                limit=candidates,
+                equipment_tags=content_tags(equipment),
+                muscle_tags=content_tags(target_muscle),
+                match_any=True,
+            )
+        ]
+
+    try:
+        vector_matches = attach_content_ids(vector_future.result())
+    except Exception as e:
+        logger.error(f"Vector retrieval failed, using lexical results only: {str(e)}")
+        vector_matches = []
+    vector_ids = [match["content_id"] for match in vector_matches]
+
+    fused = reciprocal_rank_fusion(
+        [vector_ids, lexical_ids], k=getattr(settings, "HYBRID_RRF_K", 60)
+    )[:top_k]
+
+    contents = FitnessContent.objects.in_bulk([content_id for content_id, _ in fused])
+    vector_set, lexical_set = set(vector_ids), set(lexical_ids)
+
+    results = []
+    for content_id, score in fused:
+        fitness_content = contents.get(content_id)
+        if fitness_content is None:
+            continue
+        results.append(
+            {
+                "id": fitness_content.embedding_id,
+                "content_id": content_id,
+                "score": score,
+                "metadata": build_metadata(fitness_content),
+                "sources": [
+                    source
+                    for source, found in (
+                        ("vector", content_id in vector_set),
+                        ("lexical", content_id in lexical_set),
+                    )
+                    if found
+                ],
+            }
+        )
+
+    logger.info(
+        f"Hybrid search '{query_text}': {len(vector_ids)} vector, "
+        f"{len(lexical_ids)} lexical, {len(results)} fused results"
+    )
+    return results
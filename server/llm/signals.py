@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.models import DietaryProfile, FitnessProfile, PhysicalProfile
+
+from .recommendations import invalidate_recommendations
+
+
+@receiver(post_save, sender=PhysicalProfile)
+@receiver(post_save, sender=FitnessProfile)
+@receiver(post_save, sender=DietaryProfile)
+@receiver(post_delete, sender=PhysicalProfile)
+@receiver(post_delete, sender=FitnessProfile)
+@receiver(post_delete, sender=DietaryProfile)
+def invalidate_recommendations_on_profile_change(sender, instance, **kwargs):
+    invalidate_recommendations(instance.user_id)
@@ -0,0 +1,303 @@
+"""Coalescing of identical concurrent calls.
+
+While a call for a key is running, later callers with the same key wait for
+it and receive its result instead of starting their own. Within a process,
+callers wait on the running call directly. Across processes, the first
+caller takes a lock in a Django cache (SINGLEFLIGHT_CACHE_ALIAS) and
+publishes its result there; callers in other processes that find the lock
+taken poll for that result. This only spans processes when the alias is a
+shared backend such as Redis or Memcached, whose add() is atomic.
+
+If the lock holder fails or takes longer than its lock timeout, waiting
+processes run the call themselves rather than fail. Callers each receive
+their own copy of the result, so mutating it cannot affect the others.
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import weakref
+
+import orjson
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 0.01
+MAX_POLL_INTERVAL = 0.5
+
+
+def flight_key(*parts):
+    """Stable hash of JSON-serializable parts, e.g. a query and its filters"""
+    raw = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.sha256(raw).hexdigest()
+
+
+class SharedLock:
+    """The cross-process half of a flight: a lock plus a published result"""
+
+    def __init__(self, name, lock_timeout):
+        self.name = name
+        self.lock_timeout = lock_timeout
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, "SINGLEFLIGHT_CACHE_ALIAS", "default")]
+
+    def lock_key(self, key):
+        return f"singleflight:{self.name}:{key}:lock"
+
+    def result_key(self, token):
+        return f"singleflight:{self.name}:result:{token}"
+
+    @property
+    def result_timeout(self):
+        return getattr(settings, "SINGLEFLIGHT_RESULT_TTL", 30)
+
+    def acquire(self, key):
+        """Return (True, token) if this caller now holds the lock, else (False, holder's token)"""
+        token = uuid.uuid4().hex
+        if self.cache.add(self.lock_key(key), token, self.lock_timeout):
+            return True, token
+        return False, self.cache.get(self.lock_key(key))
+
+    def release(self, key, token, result=None, published=False):
+        # Publish before unlocking, so a waiter that sees the lock gone finds the result
+        if published:
+            self.cache.set(self.result_key(token), (result,), self.result_timeout)
+        if self.cache.get(self.lock_key(key)) == token:
+            self.cache.delete(self.lock_key(key))
+
+    def wait(self, key, token):
+        """Poll for the holder's result; returns (found, result)"""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = POLL_INTERVAL
+        while token is not None and time.monotonic() < deadline:
+            published = self.cache.get(self.result_key(token))
+            if published is not None:
+                return True, published[0]
+            if self.cache.get(self.lock_key(key)) != token:
+                published = self.cache.get(self.result_key(token))
+                return (True, published[0]) if published is not None else (False, None)
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_INTERVAL)
+        return False, None
+
+    async def aacquire(self, key):
+        token = uuid.uuid4().hex
+        if await self.cache.aadd(self.lock_key(key), token, self.lock_timeout):
+            return True, token
+        return False, await self.cache.aget(self.lock_key(key))
+
+    async def arelease(self, key, token, result=None, published=False):
+        if published:
+            await self.cache.aset(self.result_key(token), (result,), self.result_timeout)
+        if await self.cache.aget(self.lock_key(key)) == token:
+            await self.cache.adelete(self.lock_key(key))
+
+    async def await_result(self, key, token):
+        deadline = time.monotonic() + self.lock_timeout
+        delay = POLL_INTERVAL
+        while token is not None and time.monotonic() < deadline:
+            published = await self.cache.aget(self.result_key(token))
+            if published is not None:
+                return True, published[0]
+            if await self.cache.aget(self.lock_key(key)) != token:
+                published = await self.cache.aget(self.result_key(token))
+                return (True, published[0]) if published is not None else (False, None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_INTERVAL)
+        return False, None
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Single-flight for blocking calls made from any thread.
+
+    Pass shared_lock_timeout to also coalesce across processes; it should
+    exceed the longest the call normally takes.
+    """
+
+    def __init__(self, name, shared_lock_timeout=None):
+        self.name = name
+        self.shared = (
+            SharedLock(name, shared_lock_timeout) if shared_lock_timeout else None
+        )
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.joined = 0
+        self.shared_joined = 0
+        self.shared_fallbacks = 0
+
+    def do(self, key, fn):
+        """Return fn(), sharing a call for key that is already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.joined += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = self._run_shared(key, fn)
+            call.result = copy.deepcopy(result)
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _run_shared(self, key, fn):
+        if self.shared is None:
+            return fn()
+
+        try:
+            acquired, token = self.shared.acquire(key)
+        except Exception as e:
+            logger.warning(f"Single-flight lock for {self.name} failed: {str(e)}")
+            return fn()
+
+        if acquired:
+            result, published = None, False
+            try:
+                result = fn()
+                published = True
+                return result
+            finally:
+                try:
+                    self.shared.release(key, token, result, published)
+                except Exception as e:
+                    logger.warning(f"Single-flight release for {self.name} failed: {str(e)}")
+
+        found, result = self.shared.wait(key, token)
+        with self._lock:
+            if found:
+                self.shared_joined += 1
+            else:
+                self.shared_fallbacks += 1
+        return result if found else fn()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "joined": self.joined,
+                "shared_joined": self.shared_joined,
+                "shared_fallbacks": self.shared_fallbacks,
+            }
+
+
+class AsyncSingleFlight:
+    """Single-flight for coroutines, per event loop.
+
+    Pass shared_lock_timeout to also coalesce across processes.
+    """
+
+    def __init__(self, name, shared_lock_timeout=None):
+        self.name = name
+        self.shared = (
+            SharedLock(name, shared_lock_timeout) if shared_lock_timeout else None
+        )
+        self._calls = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.joined = 0
+        self.shared_joined = 0
+        self.shared_fallbacks = 0
+
+    def _loop_calls(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._calls.setdefault(loop, {})
+
+    def in_flight(self, key):
+        return key in self._loop_calls()
+
+    async def do(self, key, factory):
+        """Await factory() for key, sharing a call that is already in flight"""
+        calls = self._loop_calls()
+        task = calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(self._run_shared(key, factory))
+            calls[key] = task
+
+            def forget(done):
+                if calls.get(key) is done:
+                    del calls[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.joined += 1
+
+        # A caller that goes away must not cancel the call for the others
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _run_shared(self, key, factory):
+        if self.shared is None:
+            return await factory()
+
+        try:
+            acquired, token = await self.shared.aacquire(key)
+        except Exception as e:
+            logger.warning(f"Single-flight lock for {self.name} failed: {str(e)}")
+            return await factory()
+
+        if acquired:
+            result, published = None, False
+            try:
+                result = await factory()
+                published = True
+                return result
+            finally:
+                try:
+                    await self.shared.arelease(key, token, result, published)
+                except Exception as e:
+                    logger.warning(f"Single-flight release for {self.name} failed: {str(e)}")
+
+        found, result = await self.shared.await_result(key, token)
+        if found:
+            self.shared_joined += 1
+            return result
+        self.shared_fallbacks += 1
+        return await factory()
+
+    def stats(self):
+        return {
+            "leaders": self.leaders,
+            "joined": self.joined,
+            "shared_joined": self.shared_joined,
+            "shared_fallbacks": self.shared_fallbacks,
+        }
+
+
+# Identical vector searches, across processes
+search_flights = SingleFlight("search", shared_lock_timeout=10)
+# Query embeddings, in-process; the embedding cache shares them across processes
+embedding_flights = SingleFlight("embedding")
+# Recommendation generation for one user and profile fingerprint
+recommendation_flights = AsyncSingleFlight("recommendations", shared_lock_timeout=180)
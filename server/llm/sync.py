@@ -0,0 +1,167 @@
+"""Reconcile the vector index with the FitnessContent table.
+
+Every row stores the content_hash (llm.rag.content_hash) of what was last
+written to the index for it. A sync lists the ids in the index once, streams
+the table and sorts out:
+
+- new: rows without an embedding_id, or whose vector is missing from the index
+- changed: rows whose content_hash no longer matches the row
+- unhashed: indexed rows that have never been hashed (indexed before hashes
+  were stored); re-embedded like changed rows unless adopted
+- orphaned: vectors that no row refers to
+
+and then embeds and upserts only the new and changed rows, in batches, and
+deletes the orphans with bulk_delete_embeddings(). Rows that are up to date
+cost a hash and no embedding, so a nightly sync is O(changes) rather than a
+full reindex. Rows with an upsert job still queued are left to the index
+worker. Indexing saves a row's embedding_id before writing its vector
+(llm.indexing.assign_embedding_ids), so the orphans are re-checked against
+the table just before they are deleted and a vector written in the meantime
+survives.
+
+Run it with manage.py sync_vector_index, or let run_index_worker do it every
+INDEX_SYNC_INTERVAL_SECONDS.
+"""
+
+import logging
+
+from django.conf import settings
+
+from api.models import FitnessContent
+
+from .indexing import assign_embedding_ids, record_indexed
+from .models import IndexJob
+from .rag import (
+    bulk_delete_embeddings,
+    content_hash,
+    get_vector_store,
+    upsert_fitness_contents,
+)
+
+logger = logging.getLogger(__name__)
+
+SCAN_CHUNK_SIZE = 2000
+# Stay well below SQLite's limit on query parameters
+LOOKUP_CHUNK_SIZE = 500
+
+
+def _queued_content_ids():
+    return set(
+        IndexJob.objects.filter(
+            action=IndexJob.Action.UPSERT,
+            status__in=[IndexJob.Status.PENDING, IndexJob.Status.PROCESSING],
+        ).values_list("content_id", flat=True)
+    )
+
+
+def plan_sync():
+    """Diff the table against the index without changing either.
+
+    Returns a dict of lists: content ids under "new", "changed" and
+    "unhashed", embedding ids under "orphaned".
+    """
+    # List the index before reading the table, so a vector upserted for a new
+    # row while the table is being read is never taken for an orphan
+    indexed = set(get_vector_store().ids())
+    queued = _queued_content_ids()
+
+    plan = {"new": [], "changed": [], "unhashed": [], "orphaned": []}
+    referenced = set()
+    rows = FitnessContent.objects.order_by("id").iterator(chunk_size=SCAN_CHUNK_SIZE)
+    for fitness_content in rows:
+        embedding_id = fitness_content.embedding_id
+        if embedding_id:
+            referenced.add(embedding_id)
+        if fitness_content.id in queued:
+            continue
+
+        if not embedding_id or embedding_id not in indexed:
+            plan["new"].append(fitness_content.id)
+        elif not fitness_content.content_hash:
+            plan["unhashed"].append(fitness_content.id)
+        elif fitness_content.content_hash != content_hash(fitness_content):
+            plan["changed"].append(fitness_content.id)
+
+    plan["orphaned"] = sorted(indexed - referenced)
+    return plan
+
+
+def _adopt(content_ids):
+    """Record the current hash of indexed rows without re-embedding them"""
+    for start in range(0, len(content_ids), SCAN_CHUNK_SIZE):
+        batch = list(
+            FitnessContent.objects.filter(
+                id__in=content_ids[start : start + SCAN_CHUNK_SIZE]
+            )
+        )
+        for fitness_content in batch:
+            fitness_content.content_hash = content_hash(fitness_content)
+        FitnessContent.objects.bulk_update(batch, ["content_hash"])
+
+
+def _unreferenced(embedding_ids):
+    """Drop ids that a row has started to refer to since the plan was made"""
+    referenced = set()
+    for start in range(0, len(embedding_ids), LOOKUP_CHUNK_SIZE):
+        referenced.update(
+            FitnessContent.objects.filter(
+                embedding_id__in=embedding_ids[start : start + LOOKUP_CHUNK_SIZE]
+            ).values_list("embedding_id", flat=True)
+        )
+    return [id_ for id_ in embedding_ids if id_ not in referenced]
+
+
+def apply_sync(plan, batch_size=None, adopt=False):
+    """Upsert the stale rows and delete the orphans in a plan.
+
+    With ``adopt``, unhashed rows are trusted to be current and only have
+    their hash recorded. Returns counts of what was done.
+    """
+    batch_size = batch_size or getattr(settings, "INDEX_SYNC_BATCH_SIZE", 256)
+    result = {"upserted": 0, "adopted": 0, "deleted": 0, "failed": 0}
+
+    stale = plan["new"] + plan["changed"]
+    if adopt:
+        _adopt(plan["unhashed"])
+        result["adopted"] = len(plan["unhashed"])
+    else:
+        stale += plan["unhashed"]
+
+    for start in range(0, len(stale), batch_size):
+        # Rows deleted since the plan was made simply drop out here
+        batch = list(
+            FitnessContent.objects.filter(id__in=stale[start : start + batch_size])
+        )
+        if not batch:
+            continue
+        try:
+            assign_embedding_ids(batch)
+            record_indexed(batch, upsert_fitness_contents(batch))
+            result["upserted"] += len(batch)
+        except Exception as e:
+            logger.error(f"Error syncing fitness content: {str(e)}")
+            result["failed"] += len(batch)
+
+    orphaned = _unreferenced(plan["orphaned"])
+    if orphaned:
+        try:
+            bulk_delete_embeddings(orphaned)
+            result["deleted"] = len(orphaned)
+        except Exception as e:
+            logger.error(f"Error deleting orphaned embeddings: {str(e)}")
+            result["failed"] += len(orphaned)
+
+    return result
+
+
+def sync_index(batch_size=None, adopt=False):
+    """Plan and apply one sync. Returns (plan, result)."""
+    plan = plan_sync()
+    result = apply_sync(plan, batch_size=batch_size, adopt=adopt)
+    logger.info(
+        f"Index sync: {len(plan['new'])} new, {len(plan['changed'])} changed, "
+        f"{len(plan['unhashed'])} unhashed, {len(plan['orphaned'])} orphaned; "
+        f"{result['upserted']} upserted, {result['deleted']} deleted, "
+        f"{result['failed']} failed"
+    )
+    return plan, result
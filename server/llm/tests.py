@@ -1,3 +1,1027 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
+import numpy as np
+import orjson
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.auth_cache import get_user_cache
+from api.models import FitnessContent, FitnessProfile, User
+
+from . import rag
+from .chat import build_chat_request, estimate_tokens, pack_context, personalize
+from .embedding_backends import EmbeddingBackend
+from .embedding_cache import EmbeddingCache
+from .embedding_service import MicroBatcher
+from .indexing import enqueue_delete, enqueue_upsert, enqueue_upserts, run_once
+from .json_stream import JSONSectionParser
+from .limits import (
+    NO_REFILL_RETRY_AFTER,
+    RateLimited,
+    RateLimiter,
+    check_limits,
+    record_usage,
+)
+from .models import IndexJob, RecommendationCache, TokenUsage
+from .search import hybrid_search, reciprocal_rank_fusion
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .sync import apply_sync, plan_sync
+from .vector_store import LocalVectorStore
+
+
+def random_vectors(count, dimension, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(count, dimension)).astype(np.float32)
+
+
+def exact_top_k(vectors, query, k, rows=None):
+    """Ids of the k rows (of ``rows``) most cosine-similar to query"""
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    normalized = vectors[rows] / np.linalg.norm(vectors[rows], axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [f"v{rows[i]}" for i in np.argsort(-scores)[:k]]
+
+
+class LocalVectorStoreTests(SimpleTestCase):
+    dimension = 16
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vectors = random_vectors(400, self.dimension)
+        self.queries = random_vectors(20, self.dimension, seed=1)
+
+    def make_store(self, **kwargs):
+        return LocalVectorStore(self.tmp.name, self.dimension, **kwargs)
+
+    def fill(self, store, count=None):
+        count = count or len(self.vectors)
+        store.upsert(
+            (
+                f"v{i}",
+                self.vectors[i],
+                {
+                    "content_type": "exercise" if i % 2 else "video",
+                    "difficulty_level": i % 3 + 1,
+                    "equipment_tags": ["barbell"] if i % 5 == 0 else [],
+                },
+            )
+            for i in range(count)
+        )
+
+    def ids(self, store, query, top_k=10, filter=None):
+        return [match["id"] for match in store.query(query, top_k, filter)]
+
+    def test_scan_is_exact(self):
+        store = self.make_store(hnsw_threshold=10**6)
+        self.fill(store)
+        for query in self.queries:
+            self.assertEqual(
+                self.ids(store, query), exact_top_k(self.vectors, query, 10)
+            )
+
+    def test_hnsw_recall(self):
+        store = self.make_store(hnsw_threshold=100)
+        self.fill(store)
+        self.assertIsNotNone(store._graph)
+
+        found = sum(
+            len(set(self.ids(store, query)) & set(exact_top_k(self.vectors, query, 10)))
+            for query in self.queries
+        )
+        self.assertGreaterEqual(found / (10 * len(self.queries)), 0.9)
+
+    def test_filters_only_return_matching_items(self):
+        store = self.make_store(hnsw_threshold=100)
+        self.fill(store)
+        filter = {
+            "content_type": "exercise",
+            "equipment_tags": {"$in": ["barbell"]},
+            "difficulty_level": {"$ne": 1},
+        }
+        expected = [
+            i for i in range(len(self.vectors)) if i % 2 and i % 5 == 0 and i % 3
+        ]
+
+        for query in self.queries[:5]:
+            matches = store.query(query, 10, filter)
+            self.assertEqual(len(matches), 10)
+            for match in matches:
+                self.assertEqual(match["metadata"]["content_type"], "exercise")
+                self.assertIn("barbell", match["metadata"]["equipment_tags"])
+                self.assertNotEqual(match["metadata"]["difficulty_level"], 1)
+            self.assertEqual(
+                [match["id"] for match in matches],
+                exact_top_k(self.vectors, query, 10, expected),
+            )
+
+    def test_deleted_items_are_never_returned(self):
+        store = self.make_store(hnsw_threshold=100, compact_ratio=0.9)
+        self.fill(store)
+        query = self.queries[0]
+        # The nearest neighbours and most of the rest, so the graph is mostly
+        # tombstones and a plain search of top_k would come up short
+        deleted = set(exact_top_k(self.vectors, query, 300))
+        store.delete(list(deleted))
+        self.assertEqual(len(store._ids), len(self.vectors))
+
+        matches = self.ids(store, query)
+        self.assertEqual(len(matches), 10)
+        self.assertFalse(deleted & set(matches))
+
+    def test_updates_replace_the_old_vector(self):
+        store = self.make_store()
+        self.fill(store, 50)
+        store.upsert([("v0", self.vectors[1], {"content_type": "updated"})])
+
+        self.assertEqual(store.live_count, 50)
+        matches = store.query(self.vectors[1], 2)
+        self.assertEqual({match["id"] for match in matches}, {"v0", "v1"})
+        self.assertEqual(
+            store.query(self.vectors[0], 50, {"content_type": "updated"})[0]["id"], "v0"
+        )
+
+    def test_compaction_drops_tombstones_and_persists(self):
+        store = self.make_store(hnsw_threshold=100, compact_ratio=0.2)
+        self.fill(store)
+        store.delete([f"v{i}" for i in range(0, 400, 2)])
+
+        self.assertEqual(len(store._ids), 200)
+        self.assertEqual(store.live_count, 200)
+
+        reopened = self.make_store(hnsw_threshold=100, compact_ratio=0.2)
+        self.assertEqual(sorted(reopened.ids()), sorted(store.ids()))
+        query = self.queries[0]
+        self.assertEqual(self.ids(reopened, query), self.ids(store, query))
+        self.assertTrue(all(int(id_[1:]) % 2 for id_ in self.ids(reopened, query)))
+
+    def test_results_do_not_share_stored_metadata(self):
+        store = self.make_store()
+        self.fill(store, 10)
+        match = store.query(self.vectors[0], 1)[0]
+        match["metadata"]["equipment_tags"].append("kettlebell")
+        match["metadata"]["content_type"] = "changed"
+
+        again = store.query(self.vectors[0], 1)[0]
+        self.assertEqual(again["metadata"]["equipment_tags"], ["barbell"])
+        self.assertEqual(again["metadata"]["content_type"], "video")
+
+
+class GetVectorStoreTests(SimpleTestCase):
+    def test_concurrent_first_calls_create_one_store(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        created = []
+
+        class SlowStore(LocalVectorStore):
+            def __init__(self, *args, **kwargs):
+                created.append(self)
+                time.sleep(0.05)
+                super().__init__(*args, **kwargs)
+
+        with override_settings(
+            VECTOR_STORE_BACKEND="local", LOCAL_VECTOR_STORE_PATH=tmp.name
+        ), mock.patch.object(rag, "_vector_store", None), mock.patch(
+            "llm.vector_store.LocalVectorStore", SlowStore
+        ):
+            stores = []
+            threads = [
+                threading.Thread(target=lambda: stores.append(rag.get_vector_store()))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len(stores), 8)
+        self.assertTrue(all(store is created[0] for store in stores))
+
+class JSONSectionParserTests(SimpleTestCase):
+    document = {
+        "summary": 'Lift "heavy", rest {a lot} [really]: \\ done',
+        "calories": 2450,
+        "ratio": -1.5e-3,
+        "flags": [True, False, None, [], {}],
+        "detailedWeeklySchedule": {
+            "monday": {"workout": ["squat", "bench"], "note": "}]{[,:"},
+            "tuesday": {},
+            "wednesday": "rest day \u00e9\U0001f600",
+            "thursday": [1, [2, [3]]],
+        },
+        "tips": ["sleep", {"water": "3l"}],
+        "empty": "",
+    }
+
+    def expected(self):
+        events = []
+        for key, value in self.document.items():
+            if key == "detailedWeeklySchedule":
+                events.extend(([key, day], plan) for day, plan in value.items())
+            else:
+                events.append(([key], value))
+        return events
+
+    def parse(self, chunks):
+        parser = JSONSectionParser(split_keys=("detailedWeeklySchedule",))
+        events = []
+        for chunk in chunks:
+            events.extend(parser.feed(chunk))
+        return parser, events
+
+    def test_random_chunk_boundaries(self):
+        text = (
+            "Here is your plan:\n"
+            + orjson.dumps(self.document, option=orjson.OPT_INDENT_2).decode()
+            + "\nEnjoy!"
+        )
+        rng = random.Random(0)
+        for _ in range(200):
+            cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, 40)))
+            chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+            parser, events = self.parse(chunks)
+            self.assertEqual(events, self.expected())
+            self.assertTrue(parser.done)
+            self.assertEqual(parser.text, text)
+
+    def test_sections_are_emitted_as_soon_as_they_close(self):
+        text = orjson.dumps(self.document).decode()
+        parser = JSONSectionParser(split_keys=("detailedWeeklySchedule",))
+        emitted_at = []
+        for i, c in enumerate(text):
+            emitted_at.extend(i for _ in parser.feed(c))
+
+        # Objects and arrays are complete at their closing bracket; other
+        # values only at the "," or "}" that follows them
+        closed_at = []
+        for path, value in self.expected():
+            member = orjson.dumps({path[-1]: value}).decode()[1:-1]
+            end = text.index(member) + len(member)
+            closed_at.append(end - 1 if member[-1] in "}]" else end)
+        self.assertEqual(emitted_at, closed_at)
+
+    def test_incomplete_document_emits_only_closed_sections(self):
+        text = orjson.dumps(self.document).decode()
+        cut = text.index('"tuesday"')
+        parser, events = self.parse([text[:cut]])
+
+        self.assertFalse(parser.done)
+        self.assertEqual(events, self.expected()[:5])
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting")
+        time.sleep(0.001)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def slow(self, result=None, error=None):
+        def fn():
+            self.calls += 1
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+
+        return fn
+
+    def run_callers(self, flights, key, fn):
+        """Call flight.do(key, fn) in one thread per flight; returns the outcomes"""
+        outcomes = [None] * len(flights)
+
+        def call(i):
+            try:
+                outcomes[i] = ("result", flights[i].do(key, fn))
+            except Exception as e:
+                outcomes[i] = ("error", e)
+
+        threads = [
+            threading.Thread(target=call, args=(i,)) for i in range(len(flights))
+        ]
+        threads[0].start()
+        wait_until(lambda: self.calls == 1)
+        for thread in threads[1:]:
+            thread.start()
+        return threads, outcomes
+
+    def finish(self, threads):
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight("test")
+        threads, outcomes = self.run_callers(
+            [flight] * 5, "key", self.slow({"items": [1, 2]})
+        )
+        wait_until(lambda: flight.stats()["joined"] == 4)
+        self.finish(threads)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [("result", {"items": [1, 2]})] * 5)
+        # Every caller gets its own copy
+        outcomes[0][1]["items"].append(3)
+        self.assertEqual(outcomes[1][1], {"items": [1, 2]})
+
+    def test_failure_reaches_every_caller(self):
+        flight = SingleFlight("test")
+        error = RuntimeError("upstream failed")
+        threads, outcomes = self.run_callers(
+            [flight] * 3, "key", self.slow(error=error)
+        )
+        wait_until(lambda: flight.stats()["joined"] == 2)
+        self.finish(threads)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [("error", error)] * 3)
+        # The failed call is forgotten, so the next caller runs again
+        self.assertEqual(flight.do("key", lambda: "retried"), "retried")
+
+    def test_different_keys_do_not_coalesce(self):
+        flight = SingleFlight("test")
+        self.release.set()
+        flight.do("a", self.slow("a"))
+        flight.do("b", self.slow("b"))
+        self.assertEqual(self.calls, 2)
+
+    def test_shared_lock_coalesces_across_instances(self):
+        # Two instances stand in for two processes sharing the cache
+        first, second = SingleFlight("shared", 5), SingleFlight("shared", 5)
+        threads, outcomes = self.run_callers(
+            [first, second], "key", self.slow("result")
+        )
+        # Let the second instance find the lock taken and start polling
+        time.sleep(0.1)
+        self.finish(threads)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(outcomes, [("result", "result")] * 2)
+        self.assertEqual(second.stats()["shared_joined"], 1)
+
+    def test_shared_waiter_runs_the_call_when_the_holder_fails(self):
+        first, second = SingleFlight("shared", 5), SingleFlight("shared", 5)
+        error = RuntimeError("holder failed")
+        threads, outcomes = self.run_callers(
+            [first, second], "key", self.slow(error=error)
+        )
+        # Let the second instance find the lock taken and start polling
+        time.sleep(0.1)
+        self.finish(threads)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(outcomes, [("error", error)] * 2)
+        self.assertEqual(second.stats()["shared_fallbacks"], 1)
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = AsyncSingleFlight("test")
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"plan": ["squat"]}
+
+        async def main():
+            tasks = [asyncio.create_task(flight.do("key", generate)) for _ in range(5)]
+            await asyncio.sleep(0)
+            self.assertTrue(flight.in_flight("key"))
+            results = await asyncio.gather(*tasks)
+            self.assertFalse(flight.in_flight("key"))
+            return results
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"plan": ["squat"]}] * 5)
+        results[0]["plan"].append("bench")
+        self.assertEqual(results[1], {"plan": ["squat"]})
+
+    def test_failure_reaches_every_caller(self):
+        flight = AsyncSingleFlight("test")
+
+        async def generate():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.do("key", generate) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+        self.assertEqual([str(result) for result in results], ["upstream failed"] * 3)
+        self.assertEqual(flight.stats()["leaders"], 1)
+
+    def test_cancelled_caller_does_not_cancel_the_others(self):
+        flight = AsyncSingleFlight("test")
+
+        async def generate():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def main():
+            first = asyncio.create_task(flight.do("key", generate))
+            second = asyncio.create_task(flight.do("key", generate))
+            await asyncio.sleep(0.005)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), "done")
+
+
+class ChatContextTests(SimpleTestCase):
+    user_profile = {
+        "personalInfo": {"age": 30, "gender": "female"},
+        "fitnessProfile": {
+            "fitnessLevel": "intermediate",
+            "workoutGoal": "strength",
+            "healthGoal": "mobility",
+            "workoutFrequency": 3,
+            "workoutDuration": 45,
+            "workoutType": "weights",
+            "workoutEquipment": "",
+        },
+        "additionalInfo": {"healthCondition": "none"},
+        "nutrition": {
+            "dietPreference": "omnivore",
+            "dietAllergies": "none",
+            "dietRestrictions": "none",
+        },
+    }
+
+    def match(self, number, score, description_words=60, **metadata):
+        return {
+            "id": f"embedding-{number}",
+            "content_id": number,
+            "score": score,
+            "metadata": {
+                "title": f"Workout {number}",
+                "content_type": "workout",
+                "difficulty_level": 2,
+                "description": " ".join(["squat"] * description_words),
+                **metadata,
+            },
+        }
+
+    def test_packing_respects_the_budget_and_drops_the_lowest_ranked(self):
+        matches = [self.match(number, 1 - number / 10) for number in range(1, 7)]
+
+        for budget in (40, 100, 200, 400):
+            with self.subTest(budget=budget):
+                context, packed = pack_context(matches, budget)
+                blocks = context.split("\n\n") if context else []
+                self.assertLessEqual(sum(estimate_tokens(b) for b in blocks), budget)
+                # Whatever is left out comes off the bottom of the ranking
+                self.assertEqual(packed, matches[: len(packed)])
+                self.assertEqual(len(blocks), len(packed))
+                for match in matches[len(packed) :]:
+                    self.assertNotIn(match["metadata"]["title"], context)
+
+    def test_packing_follows_the_personalized_ranking(self):
+        # The best raw match needs equipment this user does not have
+        matches = [
+            self.match(1, 0.9, equipment_required="barbell"),
+            self.match(2, 0.88),
+            self.match(3, 0.5),
+        ]
+        ranked = personalize(matches, self.user_profile)
+        self.assertEqual([m["content_id"] for m in ranked], [2, 1, 3])
+
+        _, packed = pack_context(ranked, 220)
+        self.assertEqual([m["content_id"] for m in packed], [2, 1])
+
+    @override_settings(CHAT_CONTEXT_TOKEN_BUDGET=400)
+    def test_citations_map_to_the_references_sent(self):
+        matches = [self.match(number, 1 - number / 10) for number in range(1, 7)]
+        params, citations = build_chat_request(
+            "How do I squat?", self.user_profile, matches
+        )
+        prompt = params["messages"][0]["content"]
+
+        self.assertTrue(0 < len(citations) < len(matches))
+        for citation, match in zip(citations, matches):
+            self.assertEqual(citation["id"], match["content_id"])
+            self.assertEqual(citation["embedding_id"], match["id"])
+            self.assertIn(f"[{citation['ref']}] {citation['title']} (", prompt)
+        self.assertEqual(
+            [c["ref"] for c in citations], list(range(1, len(citations) + 1))
+        )
+        # No reference number in the prompt lacks a citation
+        self.assertNotIn(f"[{len(citations) + 1}] ", prompt)
+
+
+class RateLimiterTests(SimpleTestCase):
+    def test_burst_then_rejects_with_retry_after(self):
+        limiter = RateLimiter({"chat": {"burst": 2, "per_minute": 6}})
+        limiter.check("chat", 1)
+        limiter.check("chat", 1)
+
+        with self.assertRaises(RateLimited) as raised:
+            limiter.check("chat", 1)
+        self.assertEqual(raised.exception.retry_after, 10)
+        self.assertEqual(limiter.stats(), {"buckets": 1, "allowed": 2, "limited": 1})
+
+    def test_users_and_endpoints_have_separate_buckets(self):
+        limiter = RateLimiter({"chat": {"burst": 1, "per_minute": 1}})
+        limiter.check("chat", 1)
+        limiter.check("chat", 2)
+        # Endpoints without a configured limit are never limited
+        for _ in range(5):
+            limiter.check("search", 1)
+
+        with self.assertRaises(RateLimited):
+            limiter.check("chat", 1)
+
+    def test_zero_refill_rate_rejects_with_a_fixed_retry_after(self):
+        limiter = RateLimiter({"chat": {"burst": 1, "per_minute": 0}})
+        limiter.check("chat", 1)
+
+        with self.assertRaises(RateLimited) as raised:
+            limiter.check("chat", 1)
+        self.assertEqual(raised.exception.retry_after, NO_REFILL_RETRY_AFTER)
+
+    def test_invalid_limits_are_rejected_when_the_limiter_is_built(self):
+        for limit in ({"burst": 0, "per_minute": 6}, {"burst": 2, "per_minute": -1}):
+            with self.subTest(limit=limit), self.assertRaises(ValueError):
+                RateLimiter({"chat": limit})
+
+
+@override_settings(LLM_RATE_LIMITS={}, LLM_DAILY_TOKEN_QUOTA=1000)
+class TokenQuotaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="quota", email="quota@example.com", password="pw"
+        )
+        cls.other = User.objects.create_user(
+            username="other", email="other@example.com", password="pw"
+        )
+
+    def use(self, user, input_tokens, output_tokens):
+        record_usage(
+            user.pk,
+            "chat",
+            "claude",
+            SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens),
+        )
+
+    def test_rejects_once_the_daily_quota_is_used(self):
+        self.use(self.user, 400, 500)
+        check_limits("chat", self.user.pk)
+
+        self.use(self.user, 50, 50)
+        with self.assertRaises(RateLimited) as raised:
+            check_limits("chat", self.user.pk)
+        self.assertGreater(raised.exception.retry_after, 0)
+        self.assertLessEqual(raised.exception.retry_after, 24 * 60 * 60)
+
+        # The quota is per user
+        check_limits("chat", self.other.pk)
+
+    def test_usage_from_earlier_days_does_not_count(self):
+        self.use(self.user, 5000, 5000)
+        TokenUsage.objects.update(created_at=timezone.now() - timedelta(days=1))
+        check_limits("chat", self.user.pk)
+
+    @override_settings(LLM_DAILY_TOKEN_QUOTA=0)
+    def test_zero_quota_disables_the_check(self):
+        self.use(self.user, 5000, 5000)
+        check_limits("chat", self.user.pk)
+
+
+class HashEmbeddingBackend(EmbeddingBackend):
+    """Deterministic pseudo-random vectors, so indexing runs without the model"""
+
+    name = "hash"
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False):
+        if isinstance(sentences, str):
+            seed = int(hashlib.sha256(sentences.encode()).hexdigest()[:8], 16)
+            return random_vectors(1, rag.EMBEDDING_DIMENSION, seed)[0]
+        return np.vstack([self.encode(sentence) for sentence in sentences])
+
+    def token_lengths(self, texts):
+        return [len(text.split()) for text in texts]
+
+
+class BatchRecordingBackend(HashEmbeddingBackend):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.batches = []
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False):
+        if not isinstance(sentences, str):
+            self.batches.append(list(sentences))
+        return super().encode(sentences, batch_size, show_progress_bar)
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_encode_and_get_their_own_rows(self):
+        backend = BatchRecordingBackend(rag.MODEL_NAME, 512)
+        requests = [[f"caller {i} text {j}" for j in range(i + 1)] for i in range(4)]
+        total = sum(len(texts) for texts in requests)
+        # The batch closes as soon as it is full, well before the long wait
+        batcher = MicroBatcher(backend, max_batch_size=total, max_wait=5)
+        results = [None] * len(requests)
+        start = threading.Barrier(len(requests))
+
+        def call(i):
+            start.wait()
+            results[i] = batcher.encode(requests[i], timeout=5)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(backend.batches), 1)
+        self.assertCountEqual(
+            backend.batches[0], [text for texts in requests for text in texts]
+        )
+        expected = HashEmbeddingBackend(rag.MODEL_NAME, 512)
+        for texts, vectors in zip(requests, results):
+            np.testing.assert_array_equal(vectors, expected.encode(texts))
+        self.assertEqual(batcher.stats()["largest_batch"], total)
+
+
+class LocalIndexMixin:
+    """Index into a LocalVectorStore in a temporary directory"""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = LocalVectorStore(tmp.name, rag.EMBEDDING_DIMENSION)
+        # A process-local embedding cache, so fake query vectors never reach
+        # the shared one
+        for name, value in (
+            ("_vector_store", self.store),
+            ("_embedding_model", HashEmbeddingBackend(rag.MODEL_NAME, 512)),
+            ("_embedding_cache", EmbeddingCache("hash")),
+        ):
+            patcher = mock.patch.object(rag, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_content(self, title, **fields):
+        return FitnessContent.objects.create(
+            title=title,
+            description=f"How to do a {title.lower()}",
+            content_type="exercise",
+            **fields,
+        )
+
+
+class IndexOutboxTests(LocalIndexMixin, TestCase):
+    def test_pending_upserts_are_folded_into_one_job(self):
+        content = self.create_content("Deadlift")
+        enqueue_upsert(content.id)
+        enqueue_upsert(content.id)
+        self.assertEqual(IndexJob.objects.filter(content_id=content.id).count(), 1)
+
+    def test_delete_replaces_a_pending_upsert(self):
+        content = self.create_content("Deadlift")
+        enqueue_upsert(content.id)
+        enqueue_delete(content.id, "fitness-old")
+
+        job = IndexJob.objects.get(content_id=content.id)
+        self.assertEqual(job.action, IndexJob.Action.DELETE)
+        self.assertEqual(job.embedding_id, "fitness-old")
+
+    def test_worker_indexes_and_removes_content(self):
+        content = self.create_content("Deadlift", equipment_required="Barbell")
+        enqueue_upsert(content.id)
+        self.assertEqual(run_once(), (1, 0))
+
+        content.refresh_from_db()
+        self.assertTrue(content.embedding_id)
+        self.assertEqual(content.content_hash, rag.content_hash(content))
+        self.assertEqual(IndexJob.objects.get().status, IndexJob.Status.DONE)
+        self.assertEqual(self.store.ids(), [content.embedding_id])
+        vector = rag.get_embedding(rag.build_embedding_text(content))
+        match = self.store.query(vector, 1)[0]
+        self.assertEqual(match["id"], content.embedding_id)
+        self.assertEqual(match["metadata"]["equipment_tags"], ["barbell"])
+
+        embedding_id = content.embedding_id
+        content.delete()
+        enqueue_delete(content.id, embedding_id)
+        self.assertEqual(run_once(), (1, 0))
+        self.assertEqual(self.store.ids(), [])
+        self.assertEqual(run_once(), (0, 0))
+
+    def test_upsert_for_a_deleted_row_is_dropped(self):
+        content = self.create_content("Deadlift")
+        enqueue_upsert(content.id)
+        content.delete()
+
+        self.assertEqual(run_once(), (1, 0))
+        self.assertEqual(self.store.ids(), [])
+
+    @override_settings(INDEX_JOB_MAX_ATTEMPTS=2, INDEX_JOB_BACKOFF_SECONDS=60)
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        content = self.create_content("Deadlift")
+        enqueue_upsert(content.id)
+
+        with mock.patch.object(
+            self.store, "upsert", side_effect=RuntimeError("store down")
+        ), self.assertLogs("llm", "ERROR"):
+            self.assertEqual(run_once(), (0, 1))
+            job = IndexJob.objects.get()
+            self.assertEqual(job.status, IndexJob.Status.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertEqual(job.last_error, "store down")
+            self.assertGreater(job.next_attempt_at, timezone.now())
+            # Not due yet
+            self.assertEqual(run_once(), (0, 0))
+
+            IndexJob.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(run_once(), (0, 1))
+            self.assertEqual(IndexJob.objects.get().status, IndexJob.Status.FAILED)
+
+
+class VectorSyncTests(LocalIndexMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.current, self.changed, self.unhashed = [
+            self.create_content(title) for title in ("Squat", "Lunge", "Plank")
+        ]
+        enqueue_upserts([self.current.id, self.changed.id, self.unhashed.id])
+        run_once()
+
+        FitnessContent.objects.filter(pk=self.changed.pk).update(title="Walking Lunge")
+        FitnessContent.objects.filter(pk=self.unhashed.pk).update(content_hash=None)
+        self.new = self.create_content("Burpee")
+        self.store.upsert([("fitness-orphan", np.ones(rag.EMBEDDING_DIMENSION), {})])
+        # Left to the index worker
+        self.queued = self.create_content("Row")
+        enqueue_upsert(self.queued.id)
+
+    def embedding_ids(self):
+        return set(
+            FitnessContent.objects.exclude(pk=self.queued.pk).values_list(
+                "embedding_id", flat=True
+            )
+        )
+
+    def test_plan_and_apply_round_trip(self):
+        plan = plan_sync()
+        self.assertEqual(
+            plan,
+            {
+                "new": [self.new.id],
+                "changed": [self.changed.id],
+                "unhashed": [self.unhashed.id],
+                "orphaned": ["fitness-orphan"],
+            },
+        )
+
+        result = apply_sync(plan)
+        self.assertEqual(
+            result, {"upserted": 3, "adopted": 0, "deleted": 1, "failed": 0}
+        )
+        self.assertEqual(set(self.store.ids()), self.embedding_ids())
+        for content in FitnessContent.objects.exclude(pk=self.queued.pk):
+            self.assertEqual(content.content_hash, rag.content_hash(content))
+        matches = self.store.query(
+            np.ones(rag.EMBEDDING_DIMENSION), 10, {"title": "Walking Lunge"}
+        )
+        self.assertEqual(len(matches), 1)
+
+        self.assertEqual(
+            plan_sync(), {"new": [], "changed": [], "unhashed": [], "orphaned": []}
+        )
+
+    def test_adopt_records_hashes_without_reembedding(self):
+        plan = plan_sync()
+        with mock.patch(
+            "llm.sync.upsert_fitness_contents", wraps=rag.upsert_fitness_contents
+        ) as upsert:
+            result = apply_sync(plan, adopt=True)
+
+        self.assertEqual(result["adopted"], 1)
+        self.assertEqual(result["upserted"], 2)
+        upserted = {c.id for call in upsert.call_args_list for c in call.args[0]}
+        self.assertEqual(upserted, {self.new.id, self.changed.id})
+        self.unhashed.refresh_from_db()
+        self.assertEqual(self.unhashed.content_hash, rag.content_hash(self.unhashed))
+
+    def test_changing_the_embedding_backend_marks_rows_changed(self):
+        apply_sync(plan_sync())
+        with override_settings(EMBEDDING_BACKEND="onnx"):
+            plan = plan_sync()
+        self.assertEqual(
+            sorted(plan["changed"]),
+            sorted([self.current.id, self.changed.id, self.unhashed.id, self.new.id]),
+        )
+
+    def test_orphan_referenced_after_planning_is_kept(self):
+        plan = plan_sync()
+        FitnessContent.objects.filter(pk=self.new.pk).update(
+            embedding_id="fitness-orphan"
+        )
+
+        result = apply_sync(plan)
+        self.assertEqual(result["deleted"], 0)
+        self.assertIn("fitness-orphan", self.store.ids())
+
+    def test_rows_refer_to_their_vectors_before_they_are_written(self):
+        upsert = self.store.upsert
+        unreferenced = []
+
+        def checked_upsert(vectors):
+            ids = [vector[0] for vector in vectors]
+            referenced = set(
+                FitnessContent.objects.filter(embedding_id__in=ids).values_list(
+                    "embedding_id", flat=True
+                )
+            )
+            unreferenced.extend(set(ids) - referenced)
+            upsert(vectors)
+
+        with mock.patch.object(self.store, "upsert", side_effect=checked_upsert):
+            apply_sync(plan_sync())
+            run_once()
+
+        self.assertEqual(unreferenced, [])
+        self.queued.refresh_from_db()
+        self.assertIn(self.queued.embedding_id, self.store.ids())
+
+
+class HybridSearchTests(LocalIndexMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.squat = self.create_content(
+            "Barbell Back Squat", equipment_required="Barbell, Rack"
+        )
+        self.goblet = self.create_content(
+            "Goblet Squat", equipment_required="Dumbbell"
+        )
+        self.plank = self.create_content("Plank", target_muscles="Core")
+        enqueue_upserts([self.squat.id, self.goblet.id, self.plank.id])
+        run_once()
+        for content in (self.squat, self.goblet, self.plank):
+            content.refresh_from_db()
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+        self.assertEqual([item for item, _ in fused], ["b", "a", "d", "c"])
+        self.assertAlmostEqual(fused[0][1], 1 / 62 + 1 / 61)
+        self.assertAlmostEqual(fused[1][1], 1 / 61)
+
+    def test_fuses_lexical_and_vector_results(self):
+        # The exact embedding text of the plank finds it first by vector
+        results = hybrid_search(rag.build_embedding_text(self.plank), top_k=3)
+        by_id = {result["content_id"]: result for result in results}
+
+        self.assertEqual(results[0]["content_id"], self.plank.id)
+        self.assertEqual(by_id[self.plank.id]["sources"], ["vector", "lexical"])
+        self.assertEqual(by_id[self.plank.id]["id"], self.plank.embedding_id)
+        self.assertEqual(by_id[self.plank.id]["metadata"]["title"], "Plank")
+
+    def test_tag_filters_apply_to_both_retrievers(self):
+        results = hybrid_search("squat", top_k=10, equipment="rack")
+        self.assertEqual([result["content_id"] for result in results], [self.squat.id])
+
+    def test_lexical_results_survive_a_vector_store_failure(self):
+        with mock.patch.object(
+            self.store, "query", side_effect=RuntimeError("store down")
+        ), self.assertLogs("llm", "ERROR"):
+            results = hybrid_search("squat", top_k=10)
+
+        self.assertEqual(
+            {result["content_id"] for result in results},
+            {self.squat.id, self.goblet.id},
+        )
+        self.assertTrue(all(result["sources"] == ["lexical"] for result in results))
+
+
+class ReindexContentTests(LocalIndexMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.contents = [
+            self.create_content(title) for title in ("Squat", "Lunge", "Plank")
+        ]
+        self.checkpoint = os.path.join(self.store.path, "checkpoint.json")
+
+    def reindex(self, *args):
+        call_command(
+            "reindex_content",
+            *args,
+            "--chunk-size=2",
+            "--workers=1",
+            f"--checkpoint={self.checkpoint}",
+            stdout=io.StringIO(),
+        )
+
+    def test_indexes_every_row(self):
+        self.reindex()
+        ids = set(FitnessContent.objects.values_list("embedding_id", flat=True))
+        self.assertEqual(set(self.store.ids()), ids)
+        self.assertFalse(FitnessContent.objects.filter(content_hash=None).exists())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_only_missing_picks_up_rows_a_stopped_run_left_without_vectors(self):
+        with mock.patch.object(
+            self.store, "upsert", side_effect=RuntimeError("store down")
+        ), self.assertLogs("llm", "ERROR"), self.assertRaises(RuntimeError):
+            self.reindex()
+        # The ids were saved before the upsert failed
+        self.assertFalse(FitnessContent.objects.filter(embedding_id=None).exists())
+        self.assertEqual(self.store.ids(), [])
+
+        self.reindex("--only-missing", "--restart")
+        self.assertEqual(len(self.store.ids()), 3)
+
+        with mock.patch.object(self.store, "upsert") as upsert:
+            self.reindex("--only-missing")
+        upsert.assert_not_called()
+
+
+class RecommendationCacheTests(TestCase):
+    recommendations = {"summary": "Train three times a week"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="athlete", email="athlete@example.com", password="pw"
+        )
+        cls.profile = FitnessProfile.objects.create(
+            user=cls.user,
+            workout_frequency=3,
+            workout_duration=30,
+            workout_intensity=5,
+            workout_type="cardio",
+            workout_goal="endurance",
+            health_goal="heart",
+        )
+
+    def setUp(self):
+        # Rolled-back test transactions send no signals to invalidate the cache
+        get_user_cache().invalidate(self.user.pk)
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+        self.generate = self.patch(
+            "agenerate_recommendations",
+            mock.AsyncMock(return_value=self.recommendations),
+        )
+        self.patch("check_limits")
+
+    def patch(self, name, new=None):
+        patcher = mock.patch(f"llm.async_views.{name}", new or mock.DEFAULT)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def request(self):
+        response = self.client.post(
+            reverse("recommendations"), data="{}", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(orjson.loads(response.content), self.recommendations)
+        return response["X-Cache"]
+
+    def test_unchanged_profile_is_served_from_the_cache(self):
+        self.assertEqual(self.request(), "MISS")
+        self.assertEqual(self.request(), "HIT")
+        self.assertEqual(self.generate.await_count, 1)
+
+    def test_profile_edit_invalidates_the_cached_recommendations(self):
+        self.request()
+        fingerprint = RecommendationCache.objects.get(user=self.user).fingerprint
+
+        self.profile.workout_frequency = 5
+        self.profile.save()
+        self.assertFalse(RecommendationCache.objects.filter(user=self.user).exists())
+
+        self.assertEqual(self.request(), "MISS")
+        self.assertEqual(self.generate.await_count, 2)
+        self.assertNotEqual(
+            RecommendationCache.objects.get(user=self.user).fingerprint, fingerprint
+        )
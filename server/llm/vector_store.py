@@ -0,0 +1,674 @@
+import copy
+import fcntl
+import json
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+from .hnsw import HNSWGraph
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore:
+    """Interface shared by the vector index backends.
+
+    Vectors are passed as (id, values, metadata) tuples, the same shape the
+    Pinecone SDK accepts, with values a float32 array or a list of floats;
+    query results come back as a list of
+    {"id", "score", "metadata"} dicts ordered by descending score.
+    """
+
+    name = "base"
+
+    def upsert(self, vectors):
+        raise NotImplementedError
+
+    def query(self, vector, top_k=5, filter=None):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def ids(self):
+        """Iterate over the ids of every stored vector"""
+        raise NotImplementedError
+
+
+class PineconeVectorStore(VectorStore):
+    name = "pinecone"
+    delete_batch_size = 100
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors):
+        # The SDK serializes plain lists of floats, not NumPy arrays
+        self.index.upsert(
+            vectors=[
+                (id_, np.asarray(values, dtype=np.float32).tolist(), metadata)
+                for id_, values, metadata in vectors
+            ]
+        )
+
+    def query(self, vector, top_k=5, filter=None):
+        results = self.index.query(
+            vector=np.asarray(vector, dtype=np.float32).tolist(),
+            filter=filter or None,
+            top_k=top_k,
+            include_metadata=True,
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": match.metadata}
+            for match in results.matches
+        ]
+
+    def delete(self, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), self.delete_batch_size):
+            self.index.delete(ids=ids[i : i + self.delete_batch_size])
+
+    def ids(self):
+        # list() pages through the ids; it needs a serverless index
+        for page in self.index.list():
+            yield from page
+
+
+def _compare(value, condition):
+    if isinstance(value, list):
+        # As in Pinecone, a list field matches when any element does
+        return _compare_list(value, condition)
+    if not isinstance(condition, dict):
+        return value == condition
+
+    for op, expected in condition.items():
+        if op == "$eq" and not value == expected:
+            return False
+        if op == "$ne" and not value != expected:
+            return False
+        if op == "$in" and value not in expected:
+            return False
+        if op == "$nin" and value in expected:
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            if op == "$gt" and not value > expected:
+                return False
+            if op == "$gte" and not value >= expected:
+                return False
+            if op == "$lt" and not value < expected:
+                return False
+            if op == "$lte" and not value <= expected:
+                return False
+    return True
+
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+# Fewest rows the binary prefilter hands to the exact re-rank
+MIN_RERANK_CANDIDATES = 100
+# Rows of float16/int8 storage widened to float32 at a time when scoring
+DOT_BLOCK_ROWS = 1024
+# Metadata fields with a bitmap per value, for filters without a row scan
+INDEXED_FIELDS = ("content_type", "difficulty_level", "equipment_tags", "muscle_tags")
+
+
+def quantize(values, dtype):
+    """Encode normalized float32 rows for storage as (data, scales).
+
+    int8 rows are scaled by their largest component, kept in ``scales``;
+    the float dtypes need no scale.
+    """
+    if dtype == "int8":
+        scales = np.abs(values).max(axis=1) / 127
+        scales[scales == 0] = 1
+        data = np.round(values / scales[:, None]).astype(np.int8)
+        return data, scales.astype(np.float32)
+    return values.astype(dtype), None
+
+
+def sign_bits(values):
+    """Binary quantization: one bit per dimension, set where it is positive"""
+    return np.packbits(values > 0, axis=-1)
+
+
+class StoredVectors:
+    """Float32 view of stored rows, whatever their storage dtype"""
+
+    def __init__(self, data, scales=None):
+        self.data = data
+        self.scales = scales
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        rows = np.asarray(self.data[index], dtype=np.float32)
+        if self.scales is not None:
+            scales = self.scales[index]
+            rows *= scales[..., None] if np.ndim(scales) else scales
+        return rows
+
+    def dot(self, query, rows=None):
+        """Scores of ``rows`` (default: all) against a float32 query"""
+        data = self.data if rows is None else self.data[rows]
+        if data.dtype == np.float32:
+            return data @ query
+
+        # Widen a block at a time, so the float32 copy stays in cache
+        scores = np.empty(len(data), dtype=np.float32)
+        for start in range(0, len(data), DOT_BLOCK_ROWS):
+            block = data[start : start + DOT_BLOCK_ROWS]
+            scores[start : start + DOT_BLOCK_ROWS] = block.astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales if rows is None else self.scales[rows]
+        return scores
+
+
+def _compare_list(values, condition):
+    if not isinstance(condition, dict):
+        return condition in values
+
+    for op, expected in condition.items():
+        if op == "$eq" and expected not in values:
+            return False
+        if op == "$ne" and expected in values:
+            return False
+        if op == "$in" and not any(v in expected for v in values):
+            return False
+        if op == "$nin" and any(v in expected for v in values):
+            return False
+    return True
+
+
+def metadata_matches(metadata, filter):
+    """Evaluate a Pinecone-style metadata filter against a metadata dict"""
+    if not filter:
+        return True
+
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(metadata_matches(metadata, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(metadata_matches(metadata, f) for f in condition):
+                return False
+        elif not _compare(metadata.get(key), condition):
+            return False
+    return True
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector index persisted to a directory of memory-mapped files.
+
+    Vectors are L2-normalized on write so scores are cosine similarities, and
+    live in ``vectors.npy`` which every worker opens with ``mmap_mode="r"`` so
+    the OS page cache is shared between them. ``dtype`` stores them as
+    float32, float16 (half the memory) or int8 with a per-row scale in
+    ``scales.npy`` (a quarter). Ids and metadata are kept in ``records.json``.
+
+    Below ``hnsw_threshold`` live vectors, queries are an exact scan; above
+    it an HNSW graph (``hnsw.npy``) is maintained and searched instead.
+    Scans over at least ``binary_threshold`` rows (filtered queries
+    included) first rank rows by the Hamming distance between sign bits
+    (``bits.npy``, 1/32 of the float32 size), then re-rank the best
+    ``top_k * rerank_factor`` exactly.
+
+    Each value of the ``indexed_fields`` has a bitmap of the live rows that
+    carry it, so the equality/$in/$ne/$nin parts of a filter resolve to a
+    row set without reading metadata; only the rest is checked row by row.
+    A filter matching at least ``postfilter_selectivity`` of the rows is
+    applied to a widened HNSW search when there is a graph. Otherwise, or if
+    that leaves fewer than top_k hits, only the matching rows are scanned.
+
+    Updates append a new row and tombstone the old one; the files are
+    compacted and the graph rebuilt once tombstones pass ``compact_ratio``.
+    Writers hold an exclusive flock and readers reload whenever the files
+    change on disk, so separate processes see each other's writes.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        path,
+        dimension,
+        hnsw_threshold=20000,
+        hnsw_m=16,
+        hnsw_ef_construction=100,
+        hnsw_ef_search=64,
+        compact_ratio=0.2,
+        dtype="float32",
+        binary_threshold=10000,
+        rerank_factor=20,
+        indexed_fields=INDEXED_FIELDS,
+        postfilter_selectivity=0.5,
+    ):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown vector dtype: {dtype}")
+        self.path = str(path)
+        self.dimension = dimension
+        self.dtype = dtype
+        self.binary_threshold = binary_threshold
+        self.rerank_factor = rerank_factor
+        self.indexed_fields = indexed_fields
+        self.postfilter_selectivity = postfilter_selectivity
+        self.hnsw_threshold = hnsw_threshold
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._loaded_version = None
+        self._reset()
+
+    def _reset(self):
+        self._vectors = np.zeros((0, self.dimension), dtype=self.dtype)
+        self._scales = np.zeros(0, dtype=np.float32) if self.dtype == "int8" else None
+        self._bits = np.zeros((0, (self.dimension + 7) // 8), dtype=np.uint8)
+        self._ids = []
+        self._metadata = []
+        self._id_to_row = {}
+        self._graph = None
+        self._live = np.zeros(0, dtype=bool)
+        self._bitmaps = {}
+
+    def _index_rows(self):
+        self._id_to_row = {
+            id_: row for row, id_ in enumerate(self._ids) if id_ is not None
+        }
+        self._live = np.array([id_ is not None for id_ in self._ids], dtype=bool)
+
+        postings = {field: {} for field in self.indexed_fields}
+        for row in self._id_to_row.values():
+            metadata = self._metadata[row]
+            for field, values in postings.items():
+                value = metadata.get(field)
+                for v in value if isinstance(value, list) else [value]:
+                    if isinstance(v, (str, int, float, bool)):
+                        values.setdefault(v, []).append(row)
+
+        self._bitmaps = {}
+        for field, values in postings.items():
+            self._bitmaps[field] = {}
+            for value, rows in values.items():
+                bitmap = np.zeros(len(self._ids), dtype=bool)
+                bitmap[rows] = True
+                self._bitmaps[field][value] = bitmap
+
+    @property
+    def _records_path(self):
+        return os.path.join(self.path, "records.json")
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def _scales_path(self):
+        return os.path.join(self.path, "scales.npy")
+
+    @property
+    def _bits_path(self):
+        return os.path.join(self.path, "bits.npy")
+
+    @property
+    def _graph_path(self):
+        return os.path.join(self.path, "hnsw.npy")
+
+    @property
+    def _stored(self):
+        return StoredVectors(self._vectors, self._scales)
+
+    def _disk_version(self):
+        try:
+            stat = os.stat(self._records_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self):
+        """Reload from disk if another process has written since our last load"""
+        version = self._disk_version()
+        if version == self._loaded_version:
+            return
+
+        if version is None:
+            self._reset()
+        else:
+            with open(self._records_path) as f:
+                records = json.load(f)
+            self._ids = records["ids"]
+            self._metadata = records["metadata"]
+            self._index_rows()
+            self._vectors = np.load(self._vectors_path, mmap_mode="r")
+            self._scales = (
+                np.load(self._scales_path, mmap_mode="r")
+                if self._vectors.dtype == np.int8
+                else None
+            )
+            if os.path.exists(self._bits_path):
+                self._bits = np.load(self._bits_path, mmap_mode="r")
+            else:
+                # Written before sign bits were stored; the next write saves them
+                self._bits = sign_bits(self._stored[:])
+            self._graph = None
+            if records.get("hnsw"):
+                self._graph = HNSWGraph.from_arrays(
+                    records["hnsw"], np.load(self._graph_path, mmap_mode="r")
+                )
+        self._loaded_version = version
+
+    def _save(self):
+        os.makedirs(self.path, exist_ok=True)
+
+        def replace(target, write):
+            tmp = f"{target}.tmp"
+            write(tmp)
+            os.replace(tmp, target)
+
+        replace(self._vectors_path, lambda p: _save_npy(p, self._vectors))
+        replace(self._bits_path, lambda p: _save_npy(p, self._bits))
+        if self._scales is not None:
+            replace(self._scales_path, lambda p: _save_npy(p, self._scales))
+        elif os.path.exists(self._scales_path):
+            os.remove(self._scales_path)
+        if self._graph is not None:
+            replace(self._graph_path, lambda p: _save_npy(p, self._graph.neighbors))
+        elif os.path.exists(self._graph_path):
+            os.remove(self._graph_path)
+
+        records = {
+            "dimension": self.dimension,
+            "ids": self._ids,
+            "metadata": self._metadata,
+            "hnsw": self._graph.to_config() if self._graph is not None else None,
+        }
+        replace(self._records_path, lambda p: _write_json(p, records))
+        self._loaded_version = self._disk_version()
+
+    def _write_locked(self, mutate):
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                # Detach from the read-only memory maps before mutating
+                self._vectors = np.array(self._vectors)
+                self._bits = np.array(self._bits)
+                if self._scales is not None:
+                    self._scales = np.array(self._scales)
+                if self._vectors.dtype != np.dtype(self.dtype):
+                    # Stored with another dtype: re-encode everything once
+                    self._vectors, self._scales = quantize(self._stored[:], self.dtype)
+                if self._graph is not None:
+                    self._graph.neighbors = np.array(self._graph.neighbors)
+                mutate()
+                self._index_rows()
+                self._maybe_compact()
+                self._maybe_build_graph()
+                self._save()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def live_count(self):
+        return len(self._id_to_row)
+
+    def _maybe_compact(self):
+        dead = len(self._ids) - self.live_count
+        if not dead or dead < self.compact_ratio * len(self._ids):
+            return
+
+        rows = sorted(self._id_to_row.values())
+        self._vectors = self._vectors[rows]
+        self._bits = self._bits[rows]
+        if self._scales is not None:
+            self._scales = self._scales[rows]
+        self._ids = [self._ids[r] for r in rows]
+        self._metadata = [self._metadata[r] for r in rows]
+        self._index_rows()
+        self._graph = None
+
+    def _maybe_build_graph(self):
+        if self.live_count < self.hnsw_threshold:
+            self._graph = None
+            return
+
+        if self._graph is None:
+            self._graph = HNSWGraph(
+                m=self.hnsw_m, ef_construction=self.hnsw_ef_construction
+            )
+        stored = self._stored
+        for row in range(len(self._graph), len(self._ids)):
+            self._graph.add(stored, row)
+
+    def upsert(self, vectors):
+        vectors = list(vectors)
+        if not vectors:
+            return
+
+        values = np.asarray([v[1] for v in vectors], dtype=np.float32)
+        if values.shape[1] != self.dimension:
+            raise ValueError(
+                f"Expected {self.dimension}-dimensional vectors, got {values.shape[1]}"
+            )
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1, norms)
+        data, scales = quantize(values, self.dtype)
+        bits = sign_bits(values)
+
+        def mutate():
+            start = len(self._ids)
+            for offset, (id_, _, metadata) in enumerate(vectors):
+                old_row = self._id_to_row.get(id_)
+                if old_row is not None:
+                    self._ids[old_row] = None
+                    self._metadata[old_row] = None
+                self._ids.append(id_)
+                self._metadata.append(metadata or {})
+                self._id_to_row[id_] = start + offset
+            self._vectors = np.concatenate([self._vectors, data])
+            self._bits = np.concatenate([self._bits, bits])
+            if scales is not None:
+                self._scales = np.concatenate([self._scales, scales])
+
+        self._write_locked(mutate)
+
+    def delete(self, ids):
+        ids = [id_ for id_ in ids if id_]
+        if not ids:
+            return
+
+        def mutate():
+            for id_ in ids:
+                row = self._id_to_row.pop(id_, None)
+                if row is not None:
+                    self._ids[row] = None
+                    self._metadata[row] = None
+
+        self._write_locked(mutate)
+
+    def ids(self):
+        with self._lock:
+            self._refresh()
+            return list(self._id_to_row)
+
+    def _binary_candidates(self, query, count, rows=None):
+        """The ``count`` rows whose sign bits are nearest the query's"""
+        bits = self._bits if rows is None else self._bits[rows]
+        distances = np.bitwise_count(bits ^ sign_bits(query)).sum(
+            axis=1, dtype=np.int32
+        )
+        if rows is None:
+            distances[~self._live] = np.iinfo(np.int32).max
+
+        count = min(count, len(distances))
+        best = np.argpartition(distances, count - 1)[:count]
+        if rows is None:
+            return best[self._live[best]]
+        return rows[best]
+
+    def _scan(self, query, top_k, rows=None):
+        scanned = self.live_count if rows is None else len(rows)
+        if scanned < self.binary_threshold:
+            return self._exact_rows(query, top_k, rows)
+
+        count = max(top_k * self.rerank_factor, MIN_RERANK_CANDIDATES)
+        candidates = self._binary_candidates(query, count, rows)
+        return self._exact_rows(query, top_k, candidates)
+
+    def _any_of(self, field, values):
+        bitmaps = self._bitmaps[field]
+        mask = np.zeros(len(self._ids), dtype=bool)
+        for value in values:
+            if value in bitmaps:
+                mask |= bitmaps[value]
+        return mask
+
+    def _bitmap(self, field, condition):
+        """Live rows matching condition on an indexed field, or None if unsupported"""
+        if field not in self._bitmaps:
+            return None
+        if not isinstance(condition, dict):
+            return self._any_of(field, [condition])
+
+        mask = self._live.copy()
+        for op, expected in condition.items():
+            if op == "$eq":
+                mask &= self._any_of(field, [expected])
+            elif op == "$in":
+                mask &= self._any_of(field, expected)
+            elif op == "$ne":
+                mask &= ~self._any_of(field, [expected])
+            elif op == "$nin":
+                mask &= ~self._any_of(field, expected)
+            else:
+                return None
+        return mask
+
+    def _plan_filter(self, filter):
+        """Split filter into a row mask from the bitmaps and a residual filter"""
+        mask = self._live.copy()
+        residual = {}
+        for key, condition in filter.items():
+            if key == "$and":
+                for part in condition:
+                    part_mask, part_residual = self._plan_filter(part)
+                    mask &= part_mask
+                    if part_residual:
+                        residual.setdefault("$and", []).append(part_residual)
+            elif key == "$or":
+                parts = [self._plan_filter(part) for part in condition]
+                if any(part_residual for _, part_residual in parts):
+                    residual[key] = condition
+                else:
+                    mask &= np.logical_or.reduce([m for m, _ in parts])
+            else:
+                bitmap = self._bitmap(key, condition)
+                if bitmap is None:
+                    residual[key] = condition
+                else:
+                    mask &= bitmap
+        return mask, residual
+
+    def _filter_rows(self, filter):
+        mask, residual = self._plan_filter(filter)
+        rows = np.flatnonzero(mask)
+        if residual:
+            rows = rows[
+                np.fromiter(
+                    (metadata_matches(self._metadata[r], residual) for r in rows),
+                    dtype=bool,
+                    count=len(rows),
+                )
+            ]
+        return rows
+
+    def _postfilter(self, query, top_k, rows):
+        """HNSW search widened by the filter's selectivity, keeping matching rows"""
+        allowed = np.zeros(len(self._ids), dtype=bool)
+        allowed[rows] = True
+        k = math.ceil(top_k * self.live_count / len(rows))
+        found = self._graph.search(
+            self._stored, query, k, ef=max(self.hnsw_ef_search, k)
+        )
+        return [(s, r) for s, r in found if allowed[r]][:top_k]
+
+    def _exact_rows(self, query, top_k, rows=None):
+        if rows is None:
+            scores = np.where(self._live, self._stored.dot(query), -np.inf)
+            candidates = np.arange(len(scores))
+        else:
+            candidates = np.asarray(rows, dtype=np.int64)
+            scores = self._stored.dot(query, candidates)
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            (float(scores[i]), int(candidates[i]))
+            for i in best
+            if np.isfinite(scores[i])
+        ]
+
+    def query(self, vector, top_k=5, filter=None):
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            self._refresh()
+            if not self.live_count:
+                return []
+
+            if filter:
+                rows = self._filter_rows(filter)
+                hits = None
+                if (
+                    self._graph is not None
+                    and len(rows) >= self.postfilter_selectivity * self.live_count
+                ):
+                    hits = self._postfilter(query, top_k, rows)
+                    if len(hits) < min(top_k, len(rows)):
+                        hits = None
+                if hits is None:
+                    hits = self._scan(query, top_k, rows)
+            elif self._graph is not None:
+                # Tombstoned rows stay in the graph, so ask for enough extra
+                # results that dropping them still leaves top_k
+                k = top_k + len(self._ids) - self.live_count
+                found = self._graph.search(
+                    self._stored, query, k, ef=max(self.hnsw_ef_search, k)
+                )
+                hits = [(s, r) for s, r in found if self._ids[r] is not None][:top_k]
+                if len(hits) < min(top_k, self.live_count):
+                    hits = self._scan(query, top_k)
+            else:
+                hits = self._scan(query, top_k)
+
+            # Callers may modify what they get back; the store's copy must not
+            return [
+                {
+                    "id": self._ids[row],
+                    "score": score,
+                    "metadata": copy.deepcopy(self._metadata[row]),
+                }
+                for score, row in hits
+            ]
+
+
+def _save_npy(path, array):
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+def _write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
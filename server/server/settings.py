@@ -1,7 +1,10 @@
 from pathlib import Path
 from datetime import timedelta
+from dotenv import load_dotenv
 import os
 
+load_dotenv()
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -90,6 +93,33 @@ TEMPLATES = [
 WSGI_APPLICATION = "server.wsgi.application"
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared by every worker on the host, see EMBEDDING_CACHE_ALIAS
+    "embeddings": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "EMBEDDING_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "embeddings")
+        ),
+        "TIMEOUT": 7 * 24 * 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+    # Shared by every worker on the host, see AUTH_USER_CACHE_ALIAS
+    "auth": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "AUTH_USER_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "auth")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -152,8 +182,29 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Cursor-paginated list endpoints (api/pagination.py)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+
+# Users resolved by CookieJWTAuthentication (api/auth_cache.py). The alias must
+# be shared by every worker so a save in one invalidates the others' entries:
+# the file-based "auth" cache spans one host, use Redis or Memcached across
+# hosts. A local-memory alias disables the cache
+AUTH_USER_CACHE_ALIAS = os.getenv("AUTH_USER_CACHE_ALIAS", "auth")
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "300"))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "10000"))
+
 AUTH_USER_MODEL = "api.User"
 
 SIMPLE_JWT = {
@@ -165,3 +216,131 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
 }
+
+# RAG / LLM settings
+
+# Load the embedding model and connect to the vector index in a background
+# thread when the app starts, instead of on the first search request.
+RAG_WARMUP_ON_STARTUP = os.getenv("RAG_WARMUP_ON_STARTUP", "False") == "True"
+
+# Upper bound (seconds) for importing server.wsgi, checked by llm/bench_startup.py
+STARTUP_IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", "1.0"))
+
+# Vector index backend: "pinecone" or "local" (in-process index in llm/vector_store.py)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv(
+    "LOCAL_VECTOR_STORE_PATH", os.path.join(BASE_DIR, "vector_store")
+)
+# Live vector count above which the local store switches from an exact scan to HNSW
+LOCAL_VECTOR_STORE_HNSW_THRESHOLD = int(
+    os.getenv("LOCAL_VECTOR_STORE_HNSW_THRESHOLD", "20000")
+)
+# Storage for the local store's vectors: "float32", "float16" or "int8"
+LOCAL_VECTOR_STORE_DTYPE = os.getenv("LOCAL_VECTOR_STORE_DTYPE", "float32")
+# Scans over at least this many rows rank by sign bits first, then re-rank
+# top_k * RERANK_FACTOR candidates exactly
+LOCAL_VECTOR_STORE_BINARY_THRESHOLD = int(
+    os.getenv("LOCAL_VECTOR_STORE_BINARY_THRESHOLD", "10000")
+)
+LOCAL_VECTOR_STORE_RERANK_FACTOR = int(os.getenv("LOCAL_VECTOR_STORE_RERANK_FACTOR", "20"))
+
+# Query embedding cache: per-process LRU plus the shared cache alias below
+EMBEDDING_CACHE_ALIAS = "embeddings"
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Batched embedding/upsert pipeline (llm.rag.upsert_fitness_contents)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+VECTOR_UPSERT_BATCH_SIZE = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "100"))
+VECTOR_UPSERT_THREADS = int(os.getenv("VECTOR_UPSERT_THREADS", "4"))
+# Intra-op threads for the embedding model; unset leaves the runtime's default
+EMBEDDING_THREADS = (
+    int(os.getenv("EMBEDDING_THREADS", os.getenv("EMBEDDING_TORCH_THREADS", "0")))
+    or None
+)
+
+# Embedding backend (llm/embedding_backends.py): "torch" runs the
+# sentence-transformers model, "onnx" the export from
+# manage.py export_embedding_model under ONNX Runtime
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_PATH = os.getenv(
+    "EMBEDDING_ONNX_PATH", os.path.join(BASE_DIR, "models", "bge-m3-onnx")
+)
+# Use the int8 dynamically quantized ONNX model rather than the fp32 one
+EMBEDDING_ONNX_QUANTIZED = os.getenv("EMBEDDING_ONNX_QUANTIZED", "True") == "True"
+# Tokens kept per text; BGE-M3 accepts 8192, but our content fits well within 512
+EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "512"))
+
+# Shared embedding server (manage.py run_embedding_server). When the URL is
+# set -- "http://127.0.0.1:8001" or "unix:///run/fitfusion/embeddings.sock" --
+# workers send texts to it instead of loading the model themselves. The
+# server encodes texts arriving within MAX_WAIT_MS of each other as one batch.
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL", "")
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "30"))
+EMBEDDING_SERVICE_MAX_CONNECTIONS = int(
+    os.getenv("EMBEDDING_SERVICE_MAX_CONNECTIONS", "20")
+)
+EMBEDDING_SERVICE_MAX_BATCH_SIZE = int(
+    os.getenv("EMBEDDING_SERVICE_MAX_BATCH_SIZE", "64")
+)
+EMBEDDING_SERVICE_MAX_WAIT_MS = float(os.getenv("EMBEDDING_SERVICE_MAX_WAIT_MS", "5"))
+# Wire format of vectors from the server: "float32", or "float16" for half the bytes
+EMBEDDING_SERVICE_DTYPE = os.getenv("EMBEDDING_SERVICE_DTYPE", "float32")
+
+# Background indexing queue (llm.models.IndexJob, manage.py run_index_worker)
+INDEX_JOB_BATCH_SIZE = int(os.getenv("INDEX_JOB_BATCH_SIZE", "64"))
+INDEX_JOB_MAX_ATTEMPTS = int(os.getenv("INDEX_JOB_MAX_ATTEMPTS", "8"))
+INDEX_JOB_BACKOFF_SECONDS = 5
+INDEX_JOB_BACKOFF_MAX_SECONDS = 15 * 60
+INDEX_JOB_STALE_SECONDS = 600
+# Delta sync of the index with FitnessContent (llm/sync.py); run_index_worker
+# runs one every INDEX_SYNC_INTERVAL_SECONDS, 0 leaves it to manage.py
+# sync_vector_index
+INDEX_SYNC_INTERVAL_SECONDS = int(os.getenv("INDEX_SYNC_INTERVAL_SECONDS", "0"))
+INDEX_SYNC_BATCH_SIZE = int(os.getenv("INDEX_SYNC_BATCH_SIZE", "256"))
+
+# Connection pool for the shared AsyncAnthropic client used by llm/async_views.py
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "200"))
+ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS", "50")
+)
+
+# Upper bound for the "limit" of POST /api/vector/search/
+VECTOR_SEARCH_MAX_LIMIT = int(os.getenv("VECTOR_SEARCH_MAX_LIMIT", "50"))
+
+# Hybrid search (llm/search.py): candidates taken from each of the full-text
+# and vector retrievers before reciprocal-rank fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+HYBRID_RRF_K = 60
+HYBRID_SEARCH_THREADS = int(os.getenv("HYBRID_SEARCH_THREADS", "8"))
+
+# Retrieval-augmented chat (llm/chat.py): matches fetched, prompt budget for the
+# profile plus references, and the answer length
+CHAT_RETRIEVAL_TOP_K = int(os.getenv("CHAT_RETRIEVAL_TOP_K", "8"))
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "1200"))
+CHAT_MAX_TOKENS = int(os.getenv("CHAT_MAX_TOKENS", "600"))
+
+# How long generated recommendations are reused while the profile is unchanged
+RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", str(24 * 60 * 60)))
+
+# Per-user limits for the endpoints that call Claude (llm/limits.py): a token
+# bucket per endpoint allowing "burst" requests at once and "per_minute"
+# sustained, enforced per worker, plus a daily input+output token quota
+# (0 disables it) counted from llm.models.TokenUsage
+LLM_RATE_LIMITS = {
+    "chat": {
+        "burst": int(os.getenv("CHAT_RATE_LIMIT_BURST", "5")),
+        "per_minute": float(os.getenv("CHAT_RATE_LIMIT_PER_MINUTE", "6")),
+    },
+    "recommendations": {
+        "burst": int(os.getenv("RECOMMENDATION_RATE_LIMIT_BURST", "2")),
+        "per_minute": float(os.getenv("RECOMMENDATION_RATE_LIMIT_PER_MINUTE", "0.5")),
+    },
+}
+LLM_DAILY_TOKEN_QUOTA = int(os.getenv("LLM_DAILY_TOKEN_QUOTA", "500000"))
+
+# Single-flight for identical concurrent vector searches and recommendation
+# requests (llm/singleflight.py). Calls only coalesce across worker processes
+# when this alias is a shared backend such as Redis or Memcached
+SINGLEFLIGHT_CACHE_ALIAS = os.getenv("SINGLEFLIGHT_CACHE_ALIAS", "default")
+SINGLEFLIGHT_RESULT_TTL = 30
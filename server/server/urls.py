@@ -16,6 +16,7 @@ Including another URLconf
 """
 
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 from api.views import (
     RegisterView,
@@ -28,16 +29,21 @@ from api.views import (
     logout_view,
     CustomTokenObtainPairView,
     CustomTokenRefreshView,
+    fitness_content_search_view,
 )
 
-from llm.views import (
+from llm.async_views import (
+    ai_chat,
+    recommendations_stream_view,
     recommendations_view,
     search_content_view,
+)
+from llm.views import (
     upsert_content_view,
     delete_content_view,
+    vector_stats_view,
     fitness_content_search,
     fitness_content_management,
-    ai_chat,
 )
 
 urlpatterns = [
@@ -56,12 +62,22 @@ urlpatterns = [
     path("api/profile/detail/", user_detail_view, name="user_detail"),
     # NOTE: RECOMMENDATION ENDPOINTS
     path("api/recommendations/", recommendations_view, name="recommendations"),
+    path(
+        "api/recommendations/stream/",
+        recommendations_stream_view,
+        name="recommendations_stream",
+    ),
     # NOTE: FITNESS CONTENT ENDPOINTS
     path(
         "api/fitness-content/search/",
         fitness_content_search,
         name="fitness_content_search",
     ),
+    path(
+        "api/fitness-content/keyword-search/",
+        fitness_content_search_view,
+        name="fitness_content_keyword_search",
+    ),
     path(
         "api/fitness-content/", fitness_content_management, name="fitness_content_list"
     ),
@@ -78,6 +94,10 @@ urlpatterns = [
         name="vector_delete",
     ),
     path("api/vector/delete/", delete_content_view, name="vector_delete_by_body"),
+    path("api/vector/stats/", vector_stats_view, name="vector_stats"),
     # NOTE: AI CHAT ENDPOINTS
     path("api/chat/", ai_chat, name="ai_chat"),
 ]
+
+# Admin and browsable API assets when DEBUG, which runserver used to serve itself
+urlpatterns += staticfiles_urlpatterns()